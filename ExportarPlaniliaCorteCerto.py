@@ -1,111 +1,165 @@
+import time
+
+# Início do script, antes do PyQt5: base dos tempos de inicialização informados no log
+_INICIO = time.perf_counter()
+
+import collections
 import os
 import sys
-import zipfile
-import tempfile
-import shutil
+import threading
 from PyQt5 import QtWidgets, QtCore, QtGui
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from natsort import natsorted
+# Só a configuração do núcleo é importada aqui: exportacao, comparacao e
+# trabalhos (e com eles reportlab, natsort, sqlite3, zipfile...) são
+# importados pelos workers, quando um processamento começa
+from corte_certo import config
+
+_FIM_IMPORTS = time.perf_counter()
+
+# Linhas mantidas no log da interface (as mais antigas são descartadas)
+LIMITE_LINHAS_LOG = 2000
+
+# Intervalo em que o log e a barra de progresso são atualizados durante o processamento
+INTERVALO_ATUALIZACAO_MS = 100
+
+# Verificação opcional de dependências (CORTE_CERTO_VERIFICAR_DEPENDENCIAS): módulo e pacote do pip
+DEPENDENCIAS = (
+    ('reportlab', 'reportlab'),
+    ('natsort', 'natsort'),
+    ('rarfile', 'rarfile'),
+    ('openpyxl', 'openpyxl'),
+    ('numpy', 'numpy'),
+)
+
+# Cores do tema escuro (paleta da aplicação e folha de estilo usam as mesmas)
+COR_FUNDO = '#2D2D2D'
+COR_CAMPO = '#3D3D3D'
+COR_TEXTO = '#E0E0E0'
+COR_DESTAQUE = '#0078D7'
+
+
+def aplicar_tema(app):
+    """Tema escuro com azul claro: as cores ficam na paleta, a folha de estilo só ajusta bordas e botões"""
+    app.setStyle('Fusion')
+    palette = QtGui.QPalette()
+    for role, cor in (
+        (QtGui.QPalette.Window, COR_FUNDO),
+        (QtGui.QPalette.WindowText, COR_TEXTO),
+        (QtGui.QPalette.Base, COR_CAMPO),
+        (QtGui.QPalette.AlternateBase, COR_FUNDO),
+        (QtGui.QPalette.ToolTipBase, COR_CAMPO),
+        (QtGui.QPalette.ToolTipText, COR_TEXTO),
+        (QtGui.QPalette.Text, COR_TEXTO),
+        (QtGui.QPalette.Button, COR_CAMPO),
+        (QtGui.QPalette.ButtonText, COR_TEXTO),
+        (QtGui.QPalette.BrightText, '#FF5555'),
+        (QtGui.QPalette.Highlight, COR_DESTAQUE),
+        (QtGui.QPalette.HighlightedText, '#FFFFFF'),
+    ):
+        palette.setColor(role, QtGui.QColor(cor))
+    palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.Text, QtGui.QColor('#888888'))
+    palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.WindowText, QtGui.QColor('#888888'))
+    palette.setColor(QtGui.QPalette.Disabled, QtGui.QPalette.ButtonText, QtGui.QColor('#888888'))
+    app.setPalette(palette)
+    app.setFont(QtGui.QFont('Segoe UI'))
 
-# Imports otimizados - carregados apenas quando necessário
-rarfile = None
 
 class MaterialListApp(QtWidgets.QMainWindow):
+    # Emitido depois da primeira pintura, com os tempos de inicialização
+    startup_signal = QtCore.pyqtSignal(dict)
+    
     def __init__(self):
+        inicio = time.perf_counter()
         super().__init__()
-        self.temp_dir = None
+        self.worker = None
+        self.dependency_worker = None
+        self.startup_times = {'imports_ms': round(1000 * (_FIM_IMPORTS - _INICIO), 1)}
+        self._painted = False
         self.setup_style()  # Configurar estilo antes de initUI
         self.initUI()
+        self.startup_times['janela_ms'] = round(1000 * (time.perf_counter() - inicio), 1)
         self.show()
-        QtWidgets.QApplication.processEvents()
 
     def setup_style(self):
-        """Configura o tema escuro com azul claro"""
-        self.setStyleSheet("""
-            QMainWindow {
-                background-color: #2D2D2D;
-            }
-            QWidget {
-                background-color: #2D2D2D;
-                color: #E0E0E0;
-                font-family: 'Segoe UI';
-            }
-            QLabel {
-                color: #E0E0E0;
-            }
-            QLineEdit {
-                background-color: #3D3D3D;
+        """Bordas, botões e barra de progresso; as cores vêm da paleta (aplicar_tema)
+
+        Sem regras para QWidget: uma regra universal obriga o Qt a estilizar
+        cada widget pela folha de estilo e sobrepunha a paleta.
+        """
+        self.setStyleSheet(f"""
+            QLineEdit {{
+                background-color: {COR_CAMPO};
                 border: 1px solid #555;
                 border-radius: 4px;
                 padding: 5px;
-                color: #E0E0E0;
-                selection-background-color: #0078D7;
-            }
-            QPushButton {
-                background-color: #0078D7;
+            }}
+            QPushButton {{
+                background-color: {COR_DESTAQUE};
                 color: white;
                 border: none;
                 border-radius: 4px;
                 padding: 8px 16px;
                 min-width: 80px;
-            }
-            QPushButton:hover {
+            }}
+            QPushButton:hover {{
                 background-color: #0086F0;
-            }
-            QPushButton:pressed {
+            }}
+            QPushButton:pressed {{
                 background-color: #005A9E;
-            }
-            QProgressBar {
+            }}
+            QPushButton:disabled {{
+                background-color: #555;
+                color: #999;
+            }}
+            QProgressBar {{
                 border: 1px solid #555;
                 border-radius: 4px;
                 text-align: center;
-                background-color: #3D3D3D;
-            }
-            QProgressBar::chunk {
-                background-color: #0078D7;
+                background-color: {COR_CAMPO};
+            }}
+            QProgressBar::chunk {{
+                background-color: {COR_DESTAQUE};
                 width: 10px;
-            }
-            QGroupBox {
+            }}
+            QGroupBox {{
                 border: 1px solid #555;
                 border-radius: 4px;
                 margin-top: 10px;
                 padding-top: 15px;
-                color: #E0E0E0;
-            }
-            QGroupBox::title {
+            }}
+            QGroupBox::title {{
                 subcontrol-origin: margin;
                 left: 10px;
                 padding: 0 3px;
-            }
-            QTextEdit {
-                background-color: #3D3D3D;
+            }}
+            QPlainTextEdit {{
+                background-color: {COR_CAMPO};
                 border: 1px solid #555;
                 border-radius: 4px;
-                color: #E0E0E0;
                 font-family: 'Consolas';
-            }
-            QMenuBar {
-                background-color: #252525;
-                color: #E0E0E0;
-            }
-            QMenuBar::item {
-                background-color: transparent;
-                padding: 5px 10px;
-            }
-            QMenuBar::item:selected {
-                background-color: #0078D7;
-            }
-            QMenu {
-                background-color: #3D3D3D;
-                border: 1px solid #555;
-                color: #E0E0E0;
-            }
-            QMenu::item:selected {
-                background-color: #0078D7;
-            }
+            }}
         """)
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted:
+            # Primeira pintura da janela: os tempos são registrados depois que ela termina
+            self._painted = True
+            self.startup_times['primeira_pintura_ms'] = round(1000 * (time.perf_counter() - _INICIO), 1)
+            QtCore.QTimer.singleShot(0, self.startup_finished)
+
+    def startup_finished(self):
+        """Informa os tempos de inicialização e só então inicia a verificação opcional de dependências"""
+        tempos = self.startup_times
+        self.log_message(
+            f"Inicialização: imports {tempos['imports_ms']:.0f} ms, janela {tempos['janela_ms']:.0f} ms, "
+            f"primeira pintura em {tempos['primeira_pintura_ms']:.0f} ms"
+        )
+        self.startup_signal.emit(tempos)
+        if config.VERIFICAR_DEPENDENCIAS in ('1', 'instalar'):
+            self.dependency_worker = DependencyWorker(config.VERIFICAR_DEPENDENCIAS == 'instalar')
+            self.dependency_worker.message_signal.connect(self.log_message)
+            self.dependency_worker.start()
+
     def initUI(self):
         # Configuração da janela principal
         self.setWindowTitle('Gerador de Lista de Materiais - Corte Certo')
@@ -165,8 +219,37 @@ class MaterialListApp(QtWidgets.QMainWindow):
         pdf_layout.addWidget(QtWidgets.QLabel('Nome do arquivo PDF:'))
         self.pdf_name_edit = QtWidgets.QLineEdit('lista_materiais.pdf')
         pdf_layout.addWidget(self.pdf_name_edit, 1)
+        
+        # Quantidade de workers do pool de parsing (0 = automático, calculado quando o processamento começa)
+        pdf_layout.addWidget(QtWidgets.QLabel('Workers:'))
+        self.workers_spin = QtWidgets.QSpinBox()
+        self.workers_spin.setRange(0, 64)
+        self.workers_spin.setSpecialValueText('Automático')
+        self.workers_spin.setValue(config.POOL_WORKERS)
+        pdf_layout.addWidget(self.workers_spin)
         layout.addLayout(pdf_layout)
         
+        # Formatos extras gerados na mesma passada (mesmo nome do PDF)
+        formatos_layout = QtWidgets.QHBoxLayout()
+        formatos_layout.addWidget(QtWidgets.QLabel('Gerar também:'))
+        self.formato_checks = {}
+        for formato, rotulo in (('csv', 'CSV'), ('xlsx', 'Excel (XLSX)'), ('jsonl', 'JSON Lines'),
+                                ('busca', 'Índice de busca')):
+            check = QtWidgets.QCheckBox(rotulo)
+            formatos_layout.addWidget(check)
+            self.formato_checks[formato] = check
+        
+        # Agrupamento do PDF (sumário e marcadores por grupo); '' = lista corrida
+        formatos_layout.addSpacing(12)
+        formatos_layout.addWidget(QtWidgets.QLabel('Agrupar PDF:'))
+        self.group_combo = QtWidgets.QComboBox()
+        for rotulo, agrupar in (('Nenhum', ''), ('Família', 'familia'), ('Letra inicial', 'letra')):
+            self.group_combo.addItem(rotulo, agrupar)
+        self.group_combo.setCurrentIndex(max(self.group_combo.findData(config.AGRUPAR_PDF), 0))
+        formatos_layout.addWidget(self.group_combo)
+        formatos_layout.addStretch(1)
+        layout.addLayout(formatos_layout)
+        
         # Barra de progresso
         self.progress_bar = QtWidgets.QProgressBar()
         self.progress_bar.setValue(0)
@@ -178,24 +261,63 @@ class MaterialListApp(QtWidgets.QMainWindow):
         self.status_label.setAlignment(QtCore.Qt.AlignCenter)
         layout.addWidget(self.status_label)
         
+        # Trabalhos do lote (só aparece quando um lote é executado)
+        self.jobs_table = QtWidgets.QTableWidget(0, 3)
+        self.jobs_table.setHorizontalHeaderLabels(['Origem', 'Situação', 'Progresso'])
+        self.jobs_table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.Stretch)
+        self.jobs_table.verticalHeader().setVisible(False)
+        self.jobs_table.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+        self.jobs_table.setVisible(False)
+        layout.addWidget(self.jobs_table)
+        
         # Log
         self.log_group = QtWidgets.QGroupBox('Log de Operações')
         log_layout = QtWidgets.QVBoxLayout(self.log_group)
-        self.log_text = QtWidgets.QTextEdit()
+        self.log_text = QtWidgets.QPlainTextEdit()
         self.log_text.setReadOnly(True)
+        self.log_text.setMaximumBlockCount(LIMITE_LINHAS_LOG)
+        self.log_text.setLineWrapMode(QtWidgets.QPlainTextEdit.NoWrap)
         log_layout.addWidget(self.log_text)
         layout.addWidget(self.log_group)
         
-        # Botão para gerar PDF
-        generate_btn = QtWidgets.QPushButton('Gerar PDF')
-        generate_btn.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_DialogSaveButton))
-        generate_btn.clicked.connect(self.generate_pdf)
-        generate_btn.setMinimumHeight(40)
+        # Log e progresso do worker são aplicados em lote, a cada INTERVALO_ATUALIZACAO_MS
+        self.update_timer = QtCore.QTimer(self)
+        self.update_timer.setInterval(INTERVALO_ATUALIZACAO_MS)
+        self.update_timer.timeout.connect(self.apply_updates)
+        
+        # Botões para gerar PDF e cancelar o processamento em andamento
+        buttons_layout = QtWidgets.QHBoxLayout()
+        self.generate_btn = QtWidgets.QPushButton('Gerar PDF')
+        self.generate_btn.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_DialogSaveButton))
+        self.generate_btn.clicked.connect(self.generate_pdf)
+        self.generate_btn.setMinimumHeight(40)
         font = QtGui.QFont()
         font.setBold(True)
         font.setPointSize(10)
-        generate_btn.setFont(font)
-        layout.addWidget(generate_btn)
+        self.generate_btn.setFont(font)
+        buttons_layout.addWidget(self.generate_btn, 1)
+        
+        # Lote: lista de pastas/arquivos, cada um com seu PDF
+        self.batch_btn = QtWidgets.QPushButton('Lote...')
+        self.batch_btn.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_FileDialogDetailedView))
+        self.batch_btn.clicked.connect(self.generate_batch)
+        self.batch_btn.setMinimumHeight(40)
+        buttons_layout.addWidget(self.batch_btn)
+        
+        # Comparação: versão selecionada acima contra um backup/exportação anterior
+        self.compare_btn = QtWidgets.QPushButton('Comparar...')
+        self.compare_btn.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_FileDialogContentsView))
+        self.compare_btn.clicked.connect(self.generate_comparison)
+        self.compare_btn.setMinimumHeight(40)
+        buttons_layout.addWidget(self.compare_btn)
+        
+        self.cancel_btn = QtWidgets.QPushButton('Cancelar')
+        self.cancel_btn.setIcon(self.style().standardIcon(QtWidgets.QStyle.SP_DialogCancelButton))
+        self.cancel_btn.clicked.connect(self.cancel_process)
+        self.cancel_btn.setMinimumHeight(40)
+        self.cancel_btn.setEnabled(False)
+        buttons_layout.addWidget(self.cancel_btn)
+        layout.addLayout(buttons_layout)
         
         # Rodapé
         footer = QtWidgets.QHBoxLayout()
@@ -229,11 +351,31 @@ class MaterialListApp(QtWidgets.QMainWindow):
             self.log_message(f"Arquivo selecionado: {file_path}")
     
     def log_message(self, message):
-        """Adiciona mensagem ao log e rola para o final"""
-        self.log_text.append(message)
-        self.log_text.moveCursor(QtGui.QTextCursor.End)
-        # Processar eventos para manter a interface responsiva
-        QtWidgets.QApplication.processEvents()
+        """Adiciona mensagem ao log (a rolagem acompanha o final)"""
+        self.log_text.appendPlainText(message)
+    
+    def apply_updates(self):
+        """Aplica de uma vez as linhas de log e o último progresso acumulados pelo worker"""
+        if self.worker is None:
+            return
+        lines, discarded, progress = self.worker.take_updates()
+        if discarded:
+            lines.insert(0, f"... {discarded} linhas de log omitidas")
+        if lines:
+            self.log_text.appendPlainText('\n'.join(lines))
+        if progress is not None and progress != self.progress_bar.value():
+            self.progress_bar.setValue(progress)
+        if isinstance(self.worker, BatchWorker):
+            self.update_jobs_table()
+    
+    def update_jobs_table(self):
+        """Atualiza situação e progresso de cada trabalho do lote"""
+        executor = self.worker.executor
+        if executor is None:
+            return  # o worker ainda não montou o executor
+        for row, (situacao, percentual) in enumerate(zip(executor.situacoes, executor.percentuais)):
+            self.jobs_table.item(row, 1).setText(situacao)
+            self.jobs_table.item(row, 2).setText(f"{percentual}%")
     
     def generate_pdf(self):
         # Verificar se um caminho foi selecionado
@@ -251,17 +393,96 @@ class MaterialListApp(QtWidgets.QMainWindow):
         self.status_label.setText('Processando...')
         
         # Iniciar em uma thread separada para não congelar a interface
-        self.worker = ProcessWorker(path, pdf_name)
-        self.worker.progress_signal.connect(self.update_progress)
-        self.worker.log_signal.connect(self.log_message)
+        formatos = ['pdf'] + [f for f, check in self.formato_checks.items() if check.isChecked()]
+        self.worker = ProcessWorker(path, pdf_name, self.workers_spin.value() or None, formatos,
+                                    self.group_combo.currentData())
         self.worker.finished_signal.connect(self.process_finished)
+        self.jobs_table.setVisible(False)
+        self.start_worker()
+    
+    def start_worker(self):
+        self.progress_bar.setValue(0)
+        self.generate_btn.setEnabled(False)
+        self.batch_btn.setEnabled(False)
+        self.compare_btn.setEnabled(False)
+        self.cancel_btn.setEnabled(True)
+        self.update_timer.start()
         self.worker.start()
     
-    def update_progress(self, value):
-        self.progress_bar.setValue(value)
+    def generate_comparison(self):
+        """Compara a origem selecionada com uma versão anterior (ZIP/RAR ou CSV/JSONL exportado)"""
+        path = self.path_edit.text()
+        if not path:
+            QtWidgets.QMessageBox.warning(self, 'Aviso', 'Selecione primeiro a versão atual (pasta ou arquivo)!')
+            return
+        previous_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            'Selecionar Versão Anterior',
+            '',
+            'Backups e Exportações (*.zip *.rar *.csv *.jsonl)'
+        )
+        if not previous_path:
+            return
+        
+        self.log_text.clear()
+        self.log_message(f"Comparando {path} com {previous_path}")
+        self.status_label.setText('Comparando...')
+        formatos = ['pdf'] + (['csv'] if self.formato_checks['csv'].isChecked() else [])
+        self.worker = CompareWorker(previous_path, path, formatos, self.workers_spin.value() or None)
+        self.worker.finished_signal.connect(self.process_finished)
+        self.jobs_table.setVisible(False)
+        self.start_worker()
+    
+    def generate_batch(self):
+        """Executa uma lista de trabalhos (JSON ou texto 'origem;saida' por linha)"""
+        list_path, _ = QtWidgets.QFileDialog.getOpenFileName(
+            self,
+            'Selecionar Lista de Trabalhos',
+            '',
+            'Listas de Trabalhos (*.json *.txt)'
+        )
+        if not list_path:
+            return
+        from corte_certo.trabalhos import carregar_trabalhos
+        try:
+            trabalhos = carregar_trabalhos(list_path)
+        except (OSError, ValueError) as e:
+            QtWidgets.QMessageBox.critical(self, 'Erro', f"Lista de trabalhos inválida:\n{e}")
+            return
+        
+        self.log_text.clear()
+        self.log_message(f"Lote: {list_path} ({len(trabalhos)} trabalhos)")
+        self.status_label.setText('Processando lote...')
+        self.jobs_table.setRowCount(len(trabalhos))
+        for row, trabalho in enumerate(trabalhos):
+            self.jobs_table.setItem(row, 0, QtWidgets.QTableWidgetItem(trabalho.origem))
+            self.jobs_table.setItem(row, 1, QtWidgets.QTableWidgetItem(''))
+            self.jobs_table.setItem(row, 2, QtWidgets.QTableWidgetItem('0%'))
+        self.jobs_table.setVisible(True)
+        
+        formatos = ['pdf'] + [f for f, check in self.formato_checks.items() if check.isChecked()]
+        self.worker = BatchWorker(trabalhos, self.workers_spin.value() or None, formatos)
+        self.worker.finished_signal.connect(self.batch_finished)
+        self.start_worker()
+    
+    def cancel_process(self):
+        """Pede o cancelamento; o worker termina em instantes e chama process_finished"""
+        if self.worker is not None:
+            self.worker.cancel()
+            self.cancel_btn.setEnabled(False)
+            self.status_label.setText('Cancelando...')
     
     def process_finished(self, success, message, pdf_path):
-        if success:
+        self.update_timer.stop()
+        self.apply_updates()
+        self.generate_btn.setEnabled(True)
+        self.batch_btn.setEnabled(True)
+        self.compare_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        if self.worker is not None and self.worker.cancelled:
+            self.status_label.setText("Processamento cancelado")
+            self.progress_bar.setValue(0)
+        elif success:
             self.status_label.setText(f"PDF gerado com sucesso: {pdf_path}")
             result = QtWidgets.QMessageBox.question(
                 self, 
@@ -274,322 +495,243 @@ class MaterialListApp(QtWidgets.QMainWindow):
         else:
             self.status_label.setText("Erro ao gerar PDF")
             QtWidgets.QMessageBox.critical(self, 'Erro', message)
+    
+    def batch_finished(self, success, message, _):
+        self.update_timer.stop()
+        self.apply_updates()
+        self.generate_btn.setEnabled(True)
+        self.batch_btn.setEnabled(True)
+        self.compare_btn.setEnabled(True)
+        self.cancel_btn.setEnabled(False)
+        self.status_label.setText(message)
+        if self.worker.cancelled:
+            self.progress_bar.setValue(0)
+            return
+        if success:
+            QtWidgets.QMessageBox.information(self, 'Lote concluído', message)
+        else:
+            QtWidgets.QMessageBox.warning(self, 'Lote concluído com falhas', message)
 
 
 class ProcessWorker(QtCore.QThread):
-    progress_signal = QtCore.pyqtSignal(int)
-    log_signal = QtCore.pyqtSignal(str)
+    """Executa a exportação fora da thread da interface
+
+    Log e progresso não viram um sinal por chamada: ficam acumulados aqui e
+    a interface busca tudo de uma vez (take_updates) no timer de atualização.
+    """
     finished_signal = QtCore.pyqtSignal(bool, str, str)
     
-    def __init__(self, path, pdf_name):
+    def __init__(self, path, pdf_name, workers=None, formatos=('pdf',), agrupar=None):
         super().__init__()
         self.path = path
         self.pdf_name = pdf_name
-        self.temp_dir = None
+        self.workers = workers
+        self.formatos = formatos
+        self.agrupar = agrupar
+        self._lock = threading.Lock()
+        self._lines = collections.deque(maxlen=LIMITE_LINHAS_LOG - 1)
+        self._discarded = 0
+        self._progress = None
+        # O Cancelamento (e o núcleo) só é criado em run(); até lá vale o pedido registrado aqui
+        self._cancel_requested = False
+        self._cancelamento = None
+    
+    @property
+    def cancelled(self):
+        return self._cancel_requested
+    
+    def cancel(self):
+        """Pode ser chamado da thread da interface a qualquer momento"""
+        self._cancel_requested = True
+        if self._cancelamento is not None:
+            self._cancelamento.cancelar()
+    
+    def create_cancelamento(self):
+        """Cria o Cancelamento na thread do worker, já cancelado se o pedido veio antes"""
+        from corte_certo.pipeline import Cancelamento
+        self._cancelamento = Cancelamento()
+        if self._cancel_requested:
+            self._cancelamento.cancelar()
+        return self._cancelamento
+    
+    def log(self, message):
+        with self._lock:
+            if len(self._lines) == self._lines.maxlen:
+                self._discarded += 1
+            self._lines.append(message)
+    
+    def progress(self, value):
+        # Só o último valor interessa; a atribuição é atômica
+        self._progress = value
+    
+    def take_updates(self):
+        """Retorna (linhas pendentes, linhas descartadas, último progresso) e limpa o acumulado"""
+        with self._lock:
+            lines = list(self._lines)
+            self._lines.clear()
+            discarded, self._discarded = self._discarded, 0
+        return lines, discarded, self._progress
     
     def run(self):
+        from corte_certo.exportacao import Exportador, NenhumDadoEncontrado, caminho_saida_padrao
+        from corte_certo.pipeline import ExportacaoCancelada
         try:
-            # Identificar se é um arquivo compactado ou pasta
-            is_archive = os.path.isfile(self.path) and (self.path.lower().endswith('.zip') or self.path.lower().endswith('.rar'))
-            
-            if is_archive:
-                self.log_signal.emit(f"Extraindo arquivo compactado: {self.path}")
-                self.temp_dir = tempfile.mkdtemp()
-                self.extract_archive(self.path, self.temp_dir)
-                input_path = self.temp_dir
-            else:
-                input_path = self.path
-            
-            # Processar os arquivos
-            self.log_signal.emit("Iniciando processamento dos arquivos INI...")
-            dados = self.processar_arquivos_pasta(input_path)
-            
-            if not dados:
-                self.log_signal.emit("Nenhum dado encontrado nos arquivos.")
-                self.finished_signal.emit(False, "Nenhum dado foi encontrado nos arquivos INI.", "")
-                return
-            
-            # Ordenar e gerar PDF
-            self.log_signal.emit(f"Encontrados {len(dados)} materiais. Ordenando...")
-            dados_ordenados = self.ordenar_alfabeticamente(dados)
-            
-            # Determinar o caminho do PDF de saída
-            if os.path.isfile(self.path):
-                output_dir = os.path.dirname(self.path)
-            else:
-                output_dir = self.path
-                
-            output_pdf = os.path.join(output_dir, self.pdf_name)
-            
-            self.log_signal.emit(f"Gerando PDF: {output_pdf}")
-            self.gerar_pdf(dados_ordenados, output_pdf)
-            
-            # Limpar diretório temporário se necessário
-            if self.temp_dir:
-                shutil.rmtree(self.temp_dir)
-                self.temp_dir = None
-            
-            self.finished_signal.emit(True, "PDF gerado com sucesso!", output_pdf)
+            exportador = Exportador(
+                self.path,
+                caminho_saida_padrao(self.path, self.pdf_name),
+                workers=self.workers,
+                log=self.log,
+                progresso=self.progress,
+                formatos=self.formatos,
+                cancelamento=self.create_cancelamento(),
+                agrupar=self.agrupar
+            )
+            resumo = exportador.executar()
+            self.finished_signal.emit(True, "PDF gerado com sucesso!", resumo['saida'])
             
+        except ExportacaoCancelada as e:
+            self.log(str(e))
+            self.finished_signal.emit(False, str(e), "")
+        except NenhumDadoEncontrado as e:
+            self.finished_signal.emit(False, str(e), "")
         except Exception as e:
-            self.log_signal.emit(f"Erro: {str(e)}")
-            # Limpar diretório temporário em caso de erro
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir)
+            self.log(f"Erro: {str(e)}")
             self.finished_signal.emit(False, f"Erro ao processar: {str(e)}", "")
+
+
+class BatchWorker(ProcessWorker):
+    """Executa um lote de trabalhos com o mesmo acúmulo de log/progresso do ProcessWorker
+
+    O progresso acumulado é o geral do lote; a situação de cada trabalho fica
+    em self.executor (situacoes/percentuais), lida pela interface no timer.
+    """
     
-    def extract_archive(self, archive_path, extract_path):
-        """Extrai arquivo ZIP ou RAR para o diretório especificado"""
+    def __init__(self, trabalhos, workers=None, formatos=('pdf',)):
+        super().__init__(None, None, workers, formatos)
+        # Formatos marcados na interface somam-se aos de cada trabalho da lista
+        self.trabalhos = [t._replace(formatos=tuple(dict.fromkeys(t.formatos + tuple(formatos)))) for t in trabalhos]
+        self.total = len(self.trabalhos)
+        self.executor = None
+    
+    def log_job(self, indice, message):
+        self.log(f"[{indice + 1}/{self.total}] {message}")
+    
+    def progress_job(self, indice, value):
+        self.progress(self.executor.percentual_geral)
+    
+    def run(self):
+        from corte_certo.trabalhos import ExecutorTrabalhos, linhas_resumo
         try:
-            # Carregar rarfile apenas quando for necessário para arquivos .rar
-            global rarfile
-            
-            if archive_path.lower().endswith('.zip'):
-                with zipfile.ZipFile(archive_path, 'r') as zip_ref:
-                    total_files = len(zip_ref.namelist())
-                    for i, file in enumerate(zip_ref.namelist()):
-                        zip_ref.extract(file, extract_path)
-                        self.progress_signal.emit(int((i+1) / total_files * 50))  # 50% para extração
-                    self.log_signal.emit(f"Arquivo ZIP extraído com sucesso: {len(zip_ref.namelist())} arquivos")
-            
-            elif archive_path.lower().endswith('.rar'):
-                # Importar rarfile apenas quando necessário
-                if rarfile is None:
-                    import rarfile
-                    
-                    # Configurar o caminho do UnRAR em sistemas Windows
-                    if os.name == 'nt':
-                        unrar_paths = [
-                            r'C:\Program Files\WinRAR\UnRAR.exe',
-                            r'C:\Program Files (x86)\WinRAR\UnRAR.exe',
-                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'UnRAR.exe')
-                        ]
-                        
-                        for path in unrar_paths:
-                            if os.path.exists(path):
-                                rarfile.UNRAR_TOOL = path
-                                break
-                
-                with rarfile.RarFile(archive_path, 'r') as rar_ref:
-                    total_files = len(rar_ref.namelist())
-                    for i, file in enumerate(rar_ref.namelist()):
-                        rar_ref.extract(file, extract_path)
-                        self.progress_signal.emit(int((i+1) / total_files * 50))  # 50% para extração
-                    self.log_signal.emit(f"Arquivo RAR extraído com sucesso: {len(rar_ref.namelist())} arquivos")
-        
+            self.executor = ExecutorTrabalhos(
+                self.trabalhos,
+                workers=self.workers,
+                log=self.log_job,
+                progresso=self.progress_job,
+                cancelamento=self.create_cancelamento()
+            )
+            resumo = self.executor.executar()
         except Exception as e:
-            self.log_signal.emit(f"Erro ao extrair arquivo: {str(e)}")
-            raise
+            self.log(f"Erro: {str(e)}")
+            self.finished_signal.emit(False, f"Erro ao processar o lote: {str(e)}", "")
+            return
+        self.progress(self.executor.percentual_geral)
+        linhas = linhas_resumo(resumo)
+        for linha in linhas:
+            self.log(linha)
+        self.finished_signal.emit(not resumo['falhas'] and not resumo['cancelados'], linhas[0], "")
 
-    def extrair_dados_arquivo_ini(self, caminho_arquivo):
-        """Extrai o CAMPO1 de um arquivo INI"""
-        codificacoes = ['utf-8', 'latin-1', 'cp1252']
-        
-        for codificacao in codificacoes:
-            try:
-                with open(caminho_arquivo, 'r', encoding=codificacao) as arquivo:
-                    for linha in arquivo:
-                        if linha.startswith('CAMPO1='):
-                            campo1 = linha.split('=')[1].strip()
-                            campo1 = campo1.replace("MDF", "").strip()  # Remove "MDF" e espaços em branco
-                            return campo1
-                return None
-            except UnicodeDecodeError:
-                self.log_signal.emit(f"Erro com '{codificacao}' no arquivo: {os.path.basename(caminho_arquivo)}, tentando próxima codificação.")
-            except Exception as e:
-                self.log_signal.emit(f"Erro ao ler o arquivo: {os.path.basename(caminho_arquivo)} | Erro: {e}")
-        
-        # Se nenhuma codificação funcionou, tente ler como bytes e decodificar
-        try:
-            with open(caminho_arquivo, 'rb') as arquivo:
-                conteudo = arquivo.read()
-                for codificacao in codificacoes:
-                    try:
-                        texto = conteudo.decode(codificacao)
-                        if 'CAMPO1=' in texto:
-                            campo1 = texto.split('CAMPO1=')[1].split('\n')[0].strip().replace("MDF", "").strip()
-                            return campo1
-                    except (UnicodeDecodeError, IndexError):
-                        continue
-        except Exception as e:
-            self.log_signal.emit(f"Não foi possível ler o arquivo: {os.path.basename(caminho_arquivo)} | Erro: {e}")
-        
-        self.log_signal.emit(f"Conteúdo do arquivo não lido: {os.path.basename(caminho_arquivo)}")
-        return None
 
-    def processar_arquivos_pasta(self, caminho_pasta):
-        """Processa todos os arquivos INI na pasta (e subpastas)"""
-        dados = []
-        arquivos_ini = []
-        
-        # Encontrar todos os arquivos INI
-        for raiz, _, arquivos in os.walk(caminho_pasta):
-            for arquivo in arquivos:
-                if arquivo.lower().endswith('.ini'):
-                    arquivos_ini.append(os.path.join(raiz, arquivo))
-        
-        total_arquivos = len(arquivos_ini)
-        self.log_signal.emit(f"Encontrados {total_arquivos} arquivos INI para processar")
-        
-        # Processar cada arquivo
-        for i, caminho_arquivo in enumerate(arquivos_ini):
-            nome_arquivo = os.path.basename(caminho_arquivo)
-            campo1 = self.extrair_dados_arquivo_ini(caminho_arquivo)
-            if campo1:
-                codigo = os.path.splitext(nome_arquivo)[0].replace("M", "")  # Remove o 'M' do nome do arquivo
-                dados.append((campo1, codigo))  # (nome do material, código)
-            
-            # Atualizar progresso (50% a 90%)
-            self.progress_signal.emit(50 + int((i+1) / total_arquivos * 40))
+class CompareWorker(ProcessWorker):
+    """Compara duas versões da base com o mesmo acúmulo de log/progresso do ProcessWorker"""
+    
+    def __init__(self, previous_path, path, formatos=('pdf',), workers=None):
+        super().__init__(path, None, workers, formatos)
+        self.previous_path = previous_path
+    
+    def run(self):
+        from corte_certo.comparacao import caminho_relatorio_padrao, gerar_comparacao
+        from corte_certo.exportacao import NenhumDadoEncontrado
+        from corte_certo.pipeline import ExportacaoCancelada
+        report_path = caminho_relatorio_padrao(self.path)
+        caminhos = {formato: os.path.splitext(report_path)[0] + '.' + formato for formato in self.formatos}
+        try:
+            resumo = gerar_comparacao(
+                self.previous_path,
+                self.path,
+                caminhos,
+                workers=self.workers,
+                log=self.log,
+                progresso=self.progress,
+                cancelamento=self.create_cancelamento()
+            )
+            self.finished_signal.emit(True, "Relatório de comparação gerado!", resumo['saida'])
         
-        self.log_signal.emit(f"Processamento concluído. Dados extraídos: {len(dados)}/{total_arquivos}")
-        return dados
-
-    def ordenar_alfabeticamente(self, dados):
-        """Ordena a lista de materiais alfabeticamente usando natsort"""
-        return natsorted(dados)
-
-    def gerar_pdf(self, dados, caminho_pdf):
-        """Gera o PDF com a lista de materiais"""
-        pdf = canvas.Canvas(caminho_pdf, pagesize=A4)
-        largura, altura = A4
-
-        def adicionar_rodape(pdf, largura, altura):
-            """Adiciona rodapé em todas as páginas"""
-            # Salvar estado atual
-            pdf.saveState()
-            
-            # Linha separadora do rodapé
-            pdf.line(30, 35, largura - 30, 35)
-            
-            # Texto do rodapé com crédito ao desenvolvedor
-            pdf.setFont("Helvetica", 8)
-            pdf.drawString(30, 25, "© RedBlack")
-            
-            # Número da página
-            pdf.drawString(30, 15, f"Página {pdf.getPageNumber()}")
-            
-            # Data e hora
-            import datetime
-            data_hora = datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            pdf.drawRightString(largura - 30, 15, f"Gerado em: {data_hora}")
-            
-            # Restaurar estado
-            pdf.restoreState()
+        except ExportacaoCancelada as e:
+            self.log(str(e))
+            self.finished_signal.emit(False, str(e), "")
+        except NenhumDadoEncontrado as e:
+            self.finished_signal.emit(False, str(e), "")
+        except Exception as e:
+            self.log(f"Erro: {str(e)}")
+            self.finished_signal.emit(False, f"Erro ao comparar: {str(e)}", "")
 
-        pdf.setFont("Helvetica-Bold", 14)
-        y = altura - 40  # Começar no topo da página
-        espacamento = 20  # Espaçamento entre as linhas
 
-        # Título do documento
-        pdf.drawString(30, y, "Lista de Materiais (Ordenada Alfabeticamente)")
-        pdf.line(30, y - 5, largura - 30, y - 5)  # Linha horizontal abaixo do título
-        y -= espacamento * 2  # Espaço maior após o título
+class DependencyWorker(QtCore.QThread):
+    """Verificação opcional das dependências, em segundo plano e só depois da primeira pintura
 
-        pdf.setFont("Helvetica", 12)
-        
-        # Iterar pelos materiais, exibindo dois por linha
-        for i in range(0, len(dados), 2):
-            if y < 50:  # Quando chegar no final da página, cria uma nova
-                # Adicionar rodapé antes de criar nova página
-                adicionar_rodape(pdf, largura, altura)
-                pdf.showPage()
-                pdf.setFont("Helvetica", 12)
-                y = altura - 40
+    Procura os módulos com importlib.util.find_spec (sem importá-los) e
+    configura o UnRAR no Windows; com instalar=True, instala os que faltam
+    com o pip. Nunca é iniciada sem CORTE_CERTO_VERIFICAR_DEPENDENCIAS.
+    """
+    message_signal = QtCore.pyqtSignal(str)
+    
+    def __init__(self, instalar=False):
+        super().__init__()
+        self.instalar = instalar
+    
+    def run(self):
+        import importlib.util
+        try:
+            faltando = [pacote for modulo, pacote in DEPENDENCIAS if importlib.util.find_spec(modulo) is None]
+            if not faltando:
+                self.message_signal.emit("Dependências: todas instaladas")
+            elif not self.instalar:
+                self.message_signal.emit(f"Dependências ausentes: {', '.join(faltando)}")
+            else:
+                import subprocess
+                self.message_signal.emit(f"Instalando dependências: {', '.join(faltando)}")
+                resultado = subprocess.run(
+                    [sys.executable, '-m', 'pip', 'install', *faltando],
+                    stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True
+                )
+                if resultado.returncode == 0:
+                    self.message_signal.emit("Dependências instaladas")
+                else:
+                    ultima = resultado.stdout.strip().splitlines()[-1:] or ['']
+                    self.message_signal.emit(f"Falha ao instalar dependências: {ultima[0]}")
             
-            # Formatar a string para mostrar o código e o material
-            material1 = f"{dados[i][1]} = {dados[i][0]}"  # Primeiro material
-            material2 = f"{dados[i + 1][1]} = {dados[i + 1][0]}" if i + 1 < len(dados) else ""  # Segundo material, se existir
-
-            # Desenha os dois materiais na mesma linha, com espaçamento entre eles
-            pdf.drawString(30, y, material1)  # Margem esquerda reduzida para 30
-            pdf.drawString(largura / 2 + 10, y, material2)  # Ajuste correspondente para o segundo material
-            y -= espacamento
-        
-        # Adicionar rodapé na última página
-        adicionar_rodape(pdf, largura, altura)
-        
-        pdf.save()
-        self.progress_signal.emit(100)
-        self.log_signal.emit("PDF salvo com sucesso!")
+            if os.name == 'nt' and importlib.util.find_spec('rarfile') is not None:
+                import shutil
+                from corte_certo.fontes import carregar_rarfile
+                rarfile = carregar_rarfile()
+                # UNRAR_TOOL pode ser só o nome do executável: procura também no PATH
+                if shutil.which(rarfile.UNRAR_TOOL) is None:
+                    self.message_signal.emit("UnRAR não encontrado: arquivos .rar não poderão ser lidos")
+        except Exception as e:
+            self.message_signal.emit(f"Erro ao verificar dependências: {e}")
 
 
 if __name__ == '__main__':
     # Iniciar a aplicação primeiro para mostrar a interface mais rapidamente
     app = QtWidgets.QApplication(sys.argv)
-    app.setStyle('Fusion')
-    
-    # Definir uma paleta de cores adequada
-    palette = QtGui.QPalette()
-    palette.setColor(QtGui.QPalette.Window, QtGui.QColor(240, 240, 240))
-    palette.setColor(QtGui.QPalette.WindowText, QtGui.QColor(0, 0, 0))
-    palette.setColor(QtGui.QPalette.Base, QtGui.QColor(255, 255, 255))
-    palette.setColor(QtGui.QPalette.AlternateBase, QtGui.QColor(245, 245, 245))
-    palette.setColor(QtGui.QPalette.ToolTipBase, QtGui.QColor(255, 255, 255))
-    palette.setColor(QtGui.QPalette.ToolTipText, QtGui.QColor(0, 0, 0))
-    palette.setColor(QtGui.QPalette.Text, QtGui.QColor(0, 0, 0))
-    palette.setColor(QtGui.QPalette.Button, QtGui.QColor(240, 240, 240))
-    palette.setColor(QtGui.QPalette.ButtonText, QtGui.QColor(0, 0, 0))
-    palette.setColor(QtGui.QPalette.BrightText, QtGui.QColor(255, 0, 0))
-    palette.setColor(QtGui.QPalette.Highlight, QtGui.QColor(42, 130, 218))
-    palette.setColor(QtGui.QPalette.HighlightedText, QtGui.QColor(255, 255, 255))
-    app.setPalette(palette)
+    aplicar_tema(app)
     
     # Criar a janela principal
     ex = MaterialListApp()
     
-    
+    # --medir-inicio: imprime os tempos de inicialização em JSON e sai (para comparar máquinas)
+    if '--medir-inicio' in sys.argv:
+        import json
+        ex.startup_signal.connect(lambda tempos: (print(json.dumps(tempos)), app.quit()))
     
     sys.exit(app.exec_())
-
-# Função para verificar dependências em segundo plano
-def check_dependencies_async():
-    try:
-        # Iniciar uma thread para verificar/instalar dependências
-        thread = QtCore.QThread()
-        worker = DependencyWorker()
-        worker.moveToThread(thread)
-        thread.started.connect(worker.run)
-        worker.finished.connect(thread.quit)
-        thread.start()
-    except Exception as e:
-        print(f"Erro ao verificar dependências: {e}")
-        # Verificar dependências em segundo plano após a interface já estar visível
-    QtCore.QTimer.singleShot(100, lambda: check_dependencies_async())
-
-# Classe para gerenciar dependências em thread separada
-class DependencyWorker(QtCore.QObject):
-    finished = QtCore.pyqtSignal()
-    
-    def run(self):
-        try:
-            # Verificar rarfile
-            try:
-                import rarfile
-            except ImportError:
-                # Instalar sem bloquear a interface
-                import subprocess
-                subprocess.Popen([sys.executable, "-m", "pip", "install", "rarfile"])
-            
-            # Configurar UnRAR apenas se necessário (em Windows)
-            if os.name == 'nt':
-                try:
-                    import rarfile
-                    # Verificar se já tem um caminho configurado
-                    if not hasattr(rarfile, 'UNRAR_TOOL') or not os.path.exists(rarfile.UNRAR_TOOL):
-                        unrar_paths = [
-                            r'C:\Program Files\WinRAR\UnRAR.exe',
-                            r'C:\Program Files (x86)\WinRAR\UnRAR.exe',
-                            os.path.join(os.path.dirname(os.path.abspath(__file__)), 'UnRAR.exe')
-                        ]
-                        
-                        for path in unrar_paths:
-                            if os.path.exists(path):
-                                rarfile.UNRAR_TOOL = path
-                                break
-                except Exception:
-                    pass  # Ignorar erros na configuração do UnRAR
-        except Exception as e:
-            print(f"Erro ao verificar dependências: {e}")
-        
-        self.finished.emit()
\ No newline at end of file
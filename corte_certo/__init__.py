@@ -0,0 +1,5 @@
+"""Núcleo de processamento do exportador de materiais do Corte Certo.
+
+Este pacote não importa PyQt5: a interface gráfica (ExportarPlaniliaCorteCerto.py)
+apenas consome as funções daqui.
+"""
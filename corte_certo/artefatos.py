@@ -0,0 +1,90 @@
+"""Cache de artefatos: não regerar as saídas quando nada mudou na origem.
+
+Ao final de cada exportação, um JSON ao lado do PDF
+(lista_materiais.artefato.json) guarda o digest das entradas e o tamanho e
+o mtime de cada saída gerada. O digest cobre:
+
+- os INI descobertos (caminho, tamanho e mtime_ns de cada um) ou, para
+  ZIP/RAR, o próprio arquivo compactado;
+- a configuração que muda o resultado: origem, saídas pedidas, filtros de
+  materiais e de arquivos, e VERSAO_ARTEFATOS (aumentar quando o formato de
+  alguma saída mudar).
+
+Na próxima execução, se as saídas ainda são as mesmas que foram gravadas e o
+digest bate, o Exportador devolve as saídas existentes sem ler nenhum INI.
+A descoberta usa o índice de pastas do cache (um stat por arquivo, sem listar
+de novo as pastas inalteradas), então a verificação toda é rápida.
+"""
+import hashlib
+import json
+import os
+
+SUFIXO_ARTEFATO = '.artefato.json'
+
+# Aumentar quando o conteúdo de alguma saída mudar para a mesma entrada
+VERSAO_ARTEFATOS = 2
+
+
+def caminho_artefato(caminho_saida):
+    """JSON do artefato ao lado da saída: lista_materiais.pdf -> lista_materiais.artefato.json"""
+    return os.path.splitext(caminho_saida)[0] + SUFIXO_ARTEFATO
+
+
+def digesto_entradas(entradas, configuracao):
+    """Digest das entradas (caminho, tamanho, mtime_ns) e da configuração, independente da ordem"""
+    resumo = hashlib.blake2b(digest_size=16)
+    resumo.update(json.dumps(configuracao, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+    linhas = sorted(f'{caminho}\0{tamanho}\0{mtime_ns}' for caminho, tamanho, mtime_ns in entradas)
+    resumo.update('\n'.join(linhas).encode('utf-8', 'surrogateescape'))
+    return resumo.hexdigest()
+
+
+def entrada_arquivo(caminho):
+    """(caminho, tamanho, mtime_ns) de um único arquivo (ZIP/RAR de origem)"""
+    informacoes = os.stat(caminho)
+    return caminho, informacoes.st_size, informacoes.st_mtime_ns
+
+
+def _estado_saida(caminho):
+    try:
+        informacoes = os.stat(caminho)
+    except OSError:
+        return None
+    return [informacoes.st_size, informacoes.st_mtime_ns]
+
+
+def carregar_artefato(caminho_json):
+    """Conteúdo do JSON do artefato (None se não existir ou for inválido)"""
+    try:
+        with open(caminho_json, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return dados if isinstance(dados, dict) else None
+
+
+def saidas_intactas(artefato, caminhos):
+    """As saídas pedidas são exatamente as registradas e não foram alteradas nem apagadas"""
+    registradas = artefato.get('saidas') if artefato else None
+    if not isinstance(registradas, dict) or set(registradas) != set(caminhos):
+        return False
+    for formato, caminho in caminhos.items():
+        registro = registradas[formato]
+        if registro.get('caminho') != caminho or registro.get('estado') != _estado_saida(caminho):
+            return False
+    return True
+
+
+def salvar_artefato(caminho_json, digesto, caminhos, extras=None):
+    """Registra o digest e o estado atual das saídas (gravação atômica, como as saídas)"""
+    dados = dict(extras or {})
+    dados['versao'] = VERSAO_ARTEFATOS
+    dados['digesto'] = digesto
+    dados['saidas'] = {
+        formato: {'caminho': caminho, 'estado': _estado_saida(caminho)} for formato, caminho in caminhos.items()
+    }
+    temporario = f'{caminho_json}.{os.getpid()}.tmp'
+    with open(temporario, 'w', encoding='utf-8') as arquivo:
+        json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho_json)
+    return caminho_json
@@ -0,0 +1,393 @@
+"""Benchmark do exportador, etapa por etapa.
+
+Gera bases sintéticas (corte_certo.sintetico) e mede separadamente cada
+etapa do fluxo: descoberta dos INI, leitura dos compactados (.zip/.rar),
+parsing, ordenação e geração do PDF (no canvas único e por faixas de páginas
+em paralelo, pdf_paralelo). Para cada etapa registra o tempo
+(melhor de N repetições), a vazão (arquivos/s e MB/s) e o pico de memória
+(tracemalloc, numa execução separada para não distorcer o tempo; no pool de
+processos só a memória do processo principal entra na conta).
+
+Os resultados são acrescentados a um arquivo JSON Lines junto com a versão
+(commit do git) e comparados com a última medição da mesma base e
+configuração, apontando as etapas que ficaram mais lentas.
+
+O comando busca mede o índice de busca aproximada (corte_certo.busca)
+contra a varredura linear do bot e contra a mesma pontuação por trigramas
+calculada material por material:
+
+    python -m corte_certo.benchmark gerar /tmp/bases -n 1000,10000,100000
+    python -m corte_certo.benchmark medir /tmp/bases/mat_10000 -r 3
+    python -m corte_certo.benchmark busca /tmp/bases/mat_10000 -c 200
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from . import busca, pdf, pdf_paralelo
+from .exportacao import ordenar_alfabeticamente
+from .fontes import FonteCompactada, listar_arquivos_ini
+from .parser import MotorParsing
+from .sintetico import gerar_base
+
+ARQUIVO_RESULTADOS = 'benchmark_resultados.jsonl'
+
+# Variação acima deste percentual (mais lento) é apontada como regressão
+LIMITE_REGRESSAO = 10.0
+
+
+def _log_stderr(mensagem):
+    print(mensagem, file=sys.stderr, flush=True)
+
+
+def versao_codigo():
+    """Commit atual do repositório (com '+' se houver alterações locais), ou None"""
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=raiz, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        alterado = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=raiz,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ('+' if alterado else '')
+
+
+def medir_etapa(funcao, repeticoes=1, medir_memoria=True):
+    """Executa funcao() e retorna (resultado, melhor tempo em s, pico de memória em bytes ou None)"""
+    melhor = None
+    resultado = None
+    for _ in range(max(1, repeticoes)):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        duracao = time.perf_counter() - inicio
+        melhor = duracao if melhor is None else min(melhor, duracao)
+
+    pico = None
+    if medir_memoria:
+        tracemalloc.start()
+        try:
+            funcao()
+            pico = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return resultado, melhor, pico
+
+
+def _metricas(segundos, arquivos, total_bytes, pico):
+    return {
+        'segundos': round(segundos, 4),
+        'arquivos': arquivos,
+        'bytes': total_bytes,
+        'arquivos_por_s': round(arquivos / segundos, 1) if segundos else None,
+        'mb_por_s': round(total_bytes / 1024 / 1024 / segundos, 2) if segundos and total_bytes else None,
+        'pico_memoria_mb': round(pico / 1024 / 1024, 2) if pico is not None else None,
+    }
+
+
+def _ler_compactado(caminho):
+    with FonteCompactada(caminho) as fonte:
+        quantidade = sum(1 for _ in fonte.membros())
+        return quantidade, fonte.bytes_lidos
+
+
+def medir_base(pasta, repeticoes=1, workers=None, modo=None, medir_memoria=True, log=None, pdf_processos=None):
+    """Mede todas as etapas para a pasta (e as cópias .zip/.rar ao lado dela, se existirem)
+
+    pdf_processos: processos da etapa pdf_paralelo (None = um por núcleo).
+    """
+    log = log or (lambda mensagem: None)
+    pasta = os.path.abspath(pasta)
+    etapas = {}
+
+    arquivos, segundos, pico = medir_etapa(lambda: listar_arquivos_ini(pasta), repeticoes, medir_memoria)
+    total_bytes = sum(os.path.getsize(caminho) for caminho in arquivos)
+    etapas['descoberta'] = _metricas(segundos, len(arquivos), total_bytes, pico)
+    log(f"descoberta: {len(arquivos)} arquivos em {segundos:.3f}s")
+
+    for extensao in ('.zip', '.rar'):
+        caminho = pasta + extensao
+        if not os.path.isfile(caminho):
+            continue
+        try:
+            (quantidade, lidos), segundos, pico = medir_etapa(lambda: _ler_compactado(caminho),
+                                                             repeticoes, medir_memoria)
+        except (ImportError, OSError) as e:
+            log(f"extracao{extensao}: ignorada ({e})")
+            continue
+        etapas[f'extracao{extensao}'] = _metricas(segundos, quantidade, lidos, pico)
+        log(f"extracao{extensao}: {quantidade} membros em {segundos:.3f}s")
+
+    motor = MotorParsing(workers=workers, modo=modo)
+    dados, segundos, pico = medir_etapa(lambda: motor.processar(arquivos), repeticoes, medir_memoria)
+    etapas['parsing'] = _metricas(segundos, len(arquivos), total_bytes, pico)
+    log(f"parsing: {len(dados)} materiais em {segundos:.3f}s ({motor.workers} workers, {motor.modo})")
+
+    ordenados, segundos, pico = medir_etapa(lambda: ordenar_alfabeticamente(dados), repeticoes, medir_memoria)
+    etapas['ordenacao'] = _metricas(segundos, len(dados), 0, pico)
+    log(f"ordenacao: {segundos:.3f}s")
+
+    with tempfile.TemporaryDirectory(prefix='corte_certo_bench_') as temporaria:
+        caminho_pdf = os.path.join(temporaria, 'lista_materiais.pdf')
+        paginas, segundos, pico = medir_etapa(lambda: pdf.gerar_pdf(ordenados, caminho_pdf),
+                                              repeticoes, medir_memoria)
+        etapas['pdf'] = _metricas(segundos, len(ordenados), os.path.getsize(caminho_pdf), pico)
+        etapas['pdf']['paginas'] = paginas
+        log(f"pdf: {paginas} páginas em {segundos:.3f}s")
+
+        paginas, segundos, pico = medir_etapa(
+            lambda: pdf_paralelo.gerar_pdf_paralelo(ordenados, caminho_pdf, pdf_processos), repeticoes, medir_memoria)
+        etapas['pdf_paralelo'] = _metricas(segundos, len(ordenados), os.path.getsize(caminho_pdf), pico)
+        etapas['pdf_paralelo']['paginas'] = paginas
+        log(f"pdf_paralelo: {paginas} páginas em {segundos:.3f}s ({pdf_processos or os.cpu_count()} processos)")
+
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'versao': versao_codigo(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'base': os.path.basename(pasta),
+        'arquivos': len(arquivos),
+        'modo': motor.modo,
+        'workers': motor.workers,
+        'repeticoes': repeticoes,
+        'etapas': etapas,
+    }
+
+
+# Termos fixos da medição da busca (com e sem acento, palavras incompletas)
+TERMOS_BUSCA = ['cinza cristal', 'acai 15', 'jequitiba compensado', 'carvalho mdp 18mm', 'freijo',
+                'louro frei', 'ebano', 'titanio osb', 'pau ferro 9', 'grafite tx']
+
+
+def termos_busca(dados, quantidade, semente=42):
+    """Termos fixos, códigos existentes e pedaços de nomes sorteados da base"""
+    aleatorio = random.Random(semente)
+    termos = list(TERMOS_BUSCA)
+    while len(termos) < quantidade and dados:
+        nome, codigo = aleatorio.choice(dados)
+        palavras = nome.split()
+        escolha = aleatorio.random()
+        if escolha < 0.2:
+            termos.append(codigo)
+        elif escolha < 0.6 or len(palavras) < 2:
+            termos.append(' '.join(palavras[:2]))
+        else:
+            termos.append(' '.join(aleatorio.sample(palavras, 2)))
+    return termos[:quantidade]
+
+
+def medir_busca(pasta, consultas=200, limite=10, workers=None, modo=None, log=None):
+    """Mede montagem/abertura do índice e o tempo por consulta contra as buscas lineares"""
+    log = log or (lambda mensagem: None)
+    pasta = os.path.abspath(pasta)
+    dados = MotorParsing(workers=workers, modo=modo).processar(listar_arquivos_ini(pasta))
+    termos = termos_busca(dados, consultas)
+    etapas = {}
+
+    with tempfile.TemporaryDirectory(prefix='corte_certo_bench_') as temporaria:
+        caminho = os.path.join(temporaria, busca.NOME_INDICE_PADRAO)
+        _, segundos, _ = medir_etapa(lambda: busca.gravar_indice(dados, caminho), medir_memoria=False)
+        etapas['montagem'] = {'segundos': round(segundos, 4), 'bytes': os.path.getsize(caminho)}
+        log(f"montagem: {len(dados)} materiais em {segundos:.3f}s ({os.path.getsize(caminho) / 1024:.0f} KB)")
+
+        busca._carregar_numpy()  # a importação do numpy não entra no tempo de abertura
+        indice, segundos, _ = medir_etapa(lambda: busca.IndiceBusca.abrir(caminho), medir_memoria=False)
+        etapas['abertura'] = {'segundos': round(segundos, 6)}
+        try:
+            indice.buscar(termos[0], limite)  # aquece o numpy e o cache de páginas
+            buscas = {
+                'indice': lambda termo: indice.buscar(termo, limite),
+                'linear_bot': lambda termo: busca.busca_linear(dados, termo),
+                'linear_trigramas': lambda termo: busca.busca_linear_trigramas(dados, termo, limite),
+            }
+            for nome, funcao in buscas.items():
+                tempos = []
+                for termo in termos:
+                    inicio = time.perf_counter()
+                    funcao(termo)
+                    tempos.append(time.perf_counter() - inicio)
+                tempos.sort()
+                etapas[nome] = {
+                    'consultas': len(tempos),
+                    'media_ms': round(sum(tempos) / len(tempos) * 1000, 4),
+                    'p50_ms': round(tempos[len(tempos) // 2] * 1000, 4),
+                    'p99_ms': round(tempos[min(len(tempos) - 1, int(len(tempos) * 0.99))] * 1000, 4),
+                }
+                log(f"{nome}: {etapas[nome]['media_ms']:.3f} ms por consulta")
+        finally:
+            indice.fechar()
+
+    return {
+        'data': datetime.datetime.now().isoformat(timespec='seconds'),
+        'versao': versao_codigo(),
+        'python': platform.python_version(),
+        'base': os.path.basename(pasta),
+        'materiais': len(dados),
+        'limite': limite,
+        'busca': etapas,
+    }
+
+
+def formatar_tabela_busca(resultado):
+    linhas = [f"{'busca':<20}{'média (ms)':>12}{'p50 (ms)':>11}{'p99 (ms)':>11}{'vs. índice':>12}"]
+    referencia = resultado['busca']['indice']['media_ms'] or 1e-9
+    for nome in ('indice', 'linear_bot', 'linear_trigramas'):
+        m = resultado['busca'][nome]
+        linhas.append(f"{nome:<20}{m['media_ms']:>12.3f}{m['p50_ms']:>11.3f}{m['p99_ms']:>11.3f}"
+                      f"{m['media_ms'] / referencia:>11.0f}x")
+    return '\n'.join(linhas)
+
+
+def carregar_resultados(caminho):
+    """Lê as medições anteriores (uma por linha); linhas inválidas são ignoradas"""
+    resultados = []
+    try:
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                try:
+                    resultados.append(json.loads(linha))
+                except ValueError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return resultados
+
+
+def salvar_resultado(caminho, resultado):
+    with open(caminho, 'a', encoding='utf-8') as arquivo:
+        arquivo.write(json.dumps(resultado, ensure_ascii=False) + '\n')
+
+
+def comparar(resultado, anteriores, limite=LIMITE_REGRESSAO):
+    """Compara com a última medição da mesma base/configuração
+
+    Retorna (referencia, {etapa: variação % do tempo}, [etapas com regressão]).
+    """
+    mesma_configuracao = [
+        r for r in anteriores
+        if (r.get('base'), r.get('arquivos'), r.get('modo'), r.get('workers'))
+        == (resultado['base'], resultado['arquivos'], resultado['modo'], resultado['workers'])
+    ]
+    if not mesma_configuracao:
+        return None, {}, []
+
+    referencia = mesma_configuracao[-1]
+    variacoes = {}
+    regressoes = []
+    for etapa, metricas in resultado['etapas'].items():
+        anterior = referencia['etapas'].get(etapa)
+        if not anterior or not anterior.get('segundos'):
+            continue
+        variacao = (metricas['segundos'] - anterior['segundos']) / anterior['segundos'] * 100
+        variacoes[etapa] = round(variacao, 1)
+        if variacao > limite:
+            regressoes.append(etapa)
+    return referencia, variacoes, regressoes
+
+
+def formatar_tabela(resultado, variacoes=None):
+    variacoes = variacoes or {}
+    linhas = [f"{'etapa':<15}{'tempo (s)':>11}{'arq/s':>12}{'MB/s':>9}{'pico MB':>10}{'vs. anterior':>14}"]
+    for etapa, m in resultado['etapas'].items():
+        variacao = f"{variacoes[etapa]:+.1f}%" if etapa in variacoes else '-'
+        linhas.append(
+            f"{etapa:<15}{m['segundos']:>11.3f}{m['arquivos_por_s'] or 0:>12.0f}{m['mb_por_s'] or 0:>9.1f}"
+            f"{m['pico_memoria_mb'] if m['pico_memoria_mb'] is not None else '-':>10}{variacao:>14}"
+        )
+    return '\n'.join(linhas)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(prog='python -m corte_certo.benchmark',
+                                     description='Gera bases sintéticas e mede o exportador etapa por etapa.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    gerar = subparsers.add_parser('gerar', help='gera pastas mat_N (e cópias .zip/.rar) com N arquivos INI')
+    gerar.add_argument('destino', help='pasta onde as bases são criadas')
+    gerar.add_argument('-n', '--tamanhos', default='1000,10000,100000',
+                       help='quantidades de arquivos separadas por vírgula (padrão: 1000,10000,100000)')
+    gerar.add_argument('--semente', type=int, default=42, help='semente do gerador (bases reproduzíveis)')
+    gerar.add_argument('--sem-zip', action='store_true', help='não gera a cópia .zip')
+    gerar.add_argument('--sem-rar', action='store_true', help='não gera a cópia .rar')
+
+    medir = subparsers.add_parser('medir', help='mede as etapas para uma ou mais pastas de materiais')
+    medir.add_argument('pastas', nargs='+', help='pastas geradas (as cópias .zip/.rar ao lado também são medidas)')
+    medir.add_argument('-r', '--repeticoes', type=int, default=1, help='repetições por etapa (vale o melhor tempo)')
+    medir.add_argument('-w', '--workers', type=int, help='quantidade de workers do pool de parsing')
+    medir.add_argument('--pool', choices=['thread', 'process'], help='tipo de pool de parsing')
+    medir.add_argument('--pdf-processos', type=int,
+                       help='processos da etapa pdf_paralelo (padrão: um por núcleo)')
+    medir.add_argument('--sem-memoria', action='store_true', help='não mede o pico de memória (mais rápido)')
+    medir.add_argument('--resultados', default=ARQUIVO_RESULTADOS,
+                       help=f'arquivo JSON Lines onde os resultados são acumulados (padrão: {ARQUIVO_RESULTADOS})')
+    medir.add_argument('--limite', type=float, default=LIMITE_REGRESSAO,
+                       help='variação percentual a partir da qual uma etapa é considerada regressão')
+    medir.add_argument('--falhar-em-regressao', action='store_true',
+                       help='termina com código 1 se alguma etapa regredir')
+    medir_busca_parser = subparsers.add_parser('busca', help='mede o índice de busca contra as buscas lineares')
+    medir_busca_parser.add_argument('pastas', nargs='+', help='pastas de materiais (geradas ou reais)')
+    medir_busca_parser.add_argument('-c', '--consultas', type=int, default=200, help='quantidade de consultas')
+    medir_busca_parser.add_argument('--limite', type=int, default=10, help='resultados por consulta')
+    medir_busca_parser.add_argument('--resultados', default=ARQUIVO_RESULTADOS,
+                                    help=f'arquivo JSON Lines onde os resultados são acumulados '
+                                         f'(padrão: {ARQUIVO_RESULTADOS})')
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+
+    if args.comando == 'gerar':
+        compactados = [c for c, pular in (('zip', args.sem_zip), ('rar', args.sem_rar)) if not pular]
+        os.makedirs(args.destino, exist_ok=True)
+        for tamanho in (int(t) for t in args.tamanhos.split(',') if t.strip()):
+            gerar_base(args.destino, tamanho, args.semente, compactados, log=_log_stderr)
+        return 0
+
+    if args.comando == 'busca':
+        for pasta in args.pastas:
+            if not os.path.isdir(pasta):
+                _log_stderr(f"Pasta não encontrada: {pasta}")
+                return 2
+            resultado = medir_busca(pasta, args.consultas, args.limite, log=_log_stderr)
+            salvar_resultado(args.resultados, resultado)
+            montagem = resultado['busca']['montagem']
+            print(f"\n{resultado['base']} ({resultado['materiais']} materiais, índice de "
+                  f"{montagem['bytes'] / 1024:.0f} KB montado em {montagem['segundos']:.3f}s, "
+                  f"aberto em {resultado['busca']['abertura']['segundos'] * 1000:.2f} ms)")
+            print(formatar_tabela_busca(resultado))
+        return 0
+
+    houve_regressao = False
+    for pasta in args.pastas:
+        if not os.path.isdir(pasta):
+            _log_stderr(f"Pasta não encontrada: {pasta}")
+            return 2
+        resultado = medir_base(pasta, args.repeticoes, args.workers, args.pool,
+                               medir_memoria=not args.sem_memoria, log=_log_stderr,
+                               pdf_processos=args.pdf_processos)
+        referencia, variacoes, regressoes = comparar(resultado, carregar_resultados(args.resultados), args.limite)
+        salvar_resultado(args.resultados, resultado)
+
+        print(f"\n{resultado['base']} ({resultado['arquivos']} arquivos, {resultado['workers']} workers "
+              f"{resultado['modo']}, versão {resultado['versao'] or '?'})")
+        print(formatar_tabela(resultado, variacoes))
+        if referencia:
+            print(f"Comparado com a medição de {referencia['data']} (versão {referencia.get('versao') or '?'})")
+        if regressoes:
+            houve_regressao = True
+            print(f"REGRESSÃO acima de {args.limite:.0f}%: {', '.join(regressoes)}")
+    return 1 if houve_regressao and args.falhar_em_regressao else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,319 @@
+"""Índice de busca aproximada dos materiais, gravado junto com a exportação.
+
+O bot (materialSearchService / corteCertoService.searchMaterials) relê todos
+os INI e percorre a lista inteira a cada busca. Como o exportador já lê
+todos os CAMPO1, ele grava também um índice (formato 'busca' das saídas,
+lista_materiais.busca) que responde buscas sem percorrer os materiais:
+
+- os nomes são normalizados como no normalizeText do bot (minúsculas, sem
+  acentos, espaços simples), então "acai" encontra "Açaí";
+- cada palavra vira trigramas no estilo do pg_trgm ("  mdf " -> "  m",
+  " md", "mdf", "df "), e o índice guarda, para cada trigrama, a lista dos
+  materiais que o contêm;
+- a busca soma os acertos por material (numpy.bincount sobre as listas dos
+  trigramas do termo) e pontua pelo coeficiente de Dice; quem contém o termo
+  inteiro (o `includes` do bot) ganha um bônus, e um código exato vem
+  primeiro.
+
+O arquivo é binário e aberto com mmap: as seções viram arrays do numpy sem
+cópia, então abrir o índice é instantâneo e cada busca leva frações de
+milissegundo mesmo com dezenas de milhares de materiais.
+
+    indice = IndiceBusca.abrir('C:/CC_DATA_BASE/MAT/lista_materiais.busca')
+    indice.buscar('cinza cristal 15')  # [Resultado(codigo, material, pontuacao), ...]
+"""
+import mmap
+import os
+import struct
+import unicodedata
+from array import array
+from collections import namedtuple
+
+# Imports otimizados - carregados apenas quando necessário
+numpy = None
+
+NOME_INDICE_PADRAO = 'lista_materiais.busca'
+
+MAGICO = b'CCBUSCA\x00'
+VERSAO = 1
+
+# Cabeçalho: mágico, versão, materiais, trigramas, entradas nas listas, códigos numéricos, bytes de texto
+_CABECALHO = struct.Struct('<8sIIIIII')
+
+# Separador dos campos de cada material no bloco de texto (codigo, nome, nome normalizado)
+_SEPARADOR = '\x1f'
+
+# Pontuação mínima (Dice) para um material entrar no resultado
+PONTUACAO_MINIMA = 0.3
+
+# Bônus para quem contém o termo normalizado inteiro e para o código exato
+BONUS_CONTEM = 1.0
+BONUS_CODIGO = 2.0
+
+# Candidatos (pela pontuação de Dice) conferidos com o nome completo, por resultado pedido
+CANDIDATOS_POR_RESULTADO = 8
+
+Resultado = namedtuple('Resultado', 'codigo material pontuacao')
+
+
+def _carregar_numpy():
+    global numpy
+    if numpy is None:
+        import numpy
+    return numpy
+
+
+def normalizar(texto):
+    """Minúsculas, sem acentos e com espaços simples (mesmo resultado do normalizeText do bot)"""
+    decomposto = unicodedata.normalize('NFD', texto.lower())
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.split())
+
+
+def trigramas(normalizado):
+    """Trigramas de cada palavra, com dois espaços antes e um depois (como o pg_trgm)"""
+    encontrados = set()
+    for palavra in normalizado.split():
+        palavra = f'  {palavra} '
+        encontrados.update(palavra[i:i + 3] for i in range(len(palavra) - 2))
+    return encontrados
+
+
+def chave_trigrama(trigrama):
+    """Trigrama como inteiro de 63 bits (três code points de 21 bits)"""
+    return (ord(trigrama[0]) << 42) | (ord(trigrama[1]) << 21) | ord(trigrama[2])
+
+
+def construir_indice(materiais):
+    """Monta o conteúdo do índice para os pares (campo1, codigo); retorna os bytes do arquivo"""
+    listas = {}
+    quantidades = array('H')
+    inicio_textos = array('I', [0])
+    textos = []
+    codigos = []
+    tamanho_textos = 0
+    for posicao, (nome, codigo) in enumerate(materiais):
+        normalizado = normalizar(nome)
+        chaves = {chave_trigrama(t) for t in trigramas(normalizado)}
+        for chave in chaves:
+            lista = listas.get(chave)
+            if lista is None:
+                lista = listas[chave] = array('I')
+            lista.append(posicao)
+        quantidades.append(min(len(chaves), 0xFFFF))
+        texto = f'{codigo}{_SEPARADOR}{nome}{_SEPARADOR}{normalizado}'.encode('utf-8')
+        textos.append(texto)
+        tamanho_textos += len(texto)
+        inicio_textos.append(tamanho_textos)
+        # isdecimal: isdigit aceita '²', que o int() recusa
+        if str(codigo).isdecimal():
+            codigos.append((int(codigo), posicao))
+
+    chaves = array('q', sorted(listas))
+    inicio_listas = array('I', [0])
+    entradas = array('I')
+    for chave in chaves:
+        entradas.extend(listas[chave])
+        inicio_listas.append(len(entradas))
+    codigos.sort()
+    valores_codigos = array('q', (codigo for codigo, _ in codigos))
+    posicoes_codigos = array('I', (posicao for _, posicao in codigos))
+
+    # Seções de 8 bytes primeiro, depois as de 4 e 2: todas ficam alinhadas no mmap
+    partes = [
+        _CABECALHO.pack(MAGICO, VERSAO, len(quantidades), len(chaves), len(entradas),
+                        len(valores_codigos), tamanho_textos),
+        chaves.tobytes(), valores_codigos.tobytes(),
+        inicio_listas.tobytes(), entradas.tobytes(), posicoes_codigos.tobytes(), inicio_textos.tobytes(),
+        quantidades.tobytes(),
+    ]
+    partes.extend(textos)
+    return b''.join(partes)
+
+
+def gravar_indice(materiais, caminho):
+    """Grava o índice dos pares (campo1, codigo) em `caminho`; retorna a quantidade de materiais"""
+    conteudo = construir_indice(materiais)
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(conteudo)
+    return _CABECALHO.unpack_from(conteudo)[2]
+
+
+class IndiceBusca:
+    """Índice aberto com mmap; buscar(termo) responde sem percorrer os materiais"""
+
+    def __init__(self, conteudo, caminho=None):
+        np = _carregar_numpy()
+        self.caminho = caminho
+        self._conteudo = conteudo
+        magico, versao, materiais, quantidade_chaves, quantidade_entradas, quantidade_codigos, _ = \
+            _CABECALHO.unpack_from(conteudo)
+        if magico != MAGICO or versao != VERSAO:
+            raise ValueError(f"Arquivo não é um índice de busca do Corte Certo (versão {VERSAO}): {caminho}")
+
+        deslocamento = _CABECALHO.size
+
+        def secao(tipo, quantidade):
+            nonlocal deslocamento
+            valores = np.frombuffer(conteudo, dtype=tipo, count=quantidade, offset=deslocamento)
+            deslocamento += valores.nbytes
+            return valores
+
+        self.chaves = secao('<i8', quantidade_chaves)
+        self.codigos = secao('<i8', quantidade_codigos)
+        self.inicio_listas = secao('<u4', quantidade_chaves + 1)
+        self.entradas = secao('<u4', quantidade_entradas)
+        self.posicoes_codigos = secao('<u4', quantidade_codigos)
+        self.inicio_textos = secao('<u4', materiais + 1)
+        self.quantidades = secao('<u2', materiais)
+        self._inicio_bloco = deslocamento
+        self.materiais = materiais
+        self._normalizados = None
+
+    @classmethod
+    def abrir(cls, caminho):
+        with open(caminho, 'rb') as arquivo:
+            conteudo = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(conteudo, caminho)
+
+    def fechar(self):
+        if isinstance(self._conteudo, mmap.mmap):
+            # Arrays do numpy ainda apontam para o mmap: solta-os antes de fechar
+            self.chaves = self.codigos = self.inicio_listas = self.entradas = None
+            self.posicoes_codigos = self.inicio_textos = self.quantidades = None
+            self._conteudo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.fechar()
+
+    def __len__(self):
+        return self.materiais
+
+    def material(self, posicao):
+        """(codigo, nome, nome normalizado) do material na posição"""
+        inicio = self._inicio_bloco + int(self.inicio_textos[posicao])
+        fim = self._inicio_bloco + int(self.inicio_textos[posicao + 1])
+        return tuple(self._conteudo[inicio:fim].decode('utf-8').split(_SEPARADOR))
+
+    def _nomes_normalizados(self):
+        """Nome normalizado de cada material, decodificados uma única vez por índice aberto"""
+        if self._normalizados is None:
+            self._normalizados = [self.material(posicao)[2] for posicao in range(self.materiais)]
+        return self._normalizados
+
+    def _posicao_codigo(self, termo):
+        if not termo.isdecimal() or not len(self.codigos):
+            return None
+        np = numpy
+        indice = int(np.searchsorted(self.codigos, int(termo)))
+        if indice < len(self.codigos) and self.codigos[indice] == int(termo):
+            return int(self.posicoes_codigos[indice])
+        return None
+
+    def _acertos(self, chaves):
+        """(acertos, encontrados): quantos dos trigramas cada material tem e quantos existem no índice"""
+        np = numpy
+        indices = np.searchsorted(self.chaves, chaves)
+        validos = indices < len(self.chaves)
+        indices = indices[validos]
+        indices = indices[self.chaves[indices] == chaves[validos]]
+        if not len(indices):
+            return None, 0
+        inicio = self.inicio_listas
+        entradas = np.concatenate([self.entradas[inicio[i]:inicio[i + 1]] for i in indices])
+        return np.bincount(entradas, minlength=self.materiais), len(indices)
+
+    def _contem(self, normalizado):
+        """Posições dos materiais cujo nome normalizado contém o termo inteiro
+
+        Quem contém o termo tem todos os trigramas de dentro das palavras dele
+        (os das bordas dependem de onde o termo cai no nome), então só esses
+        materiais são conferidos. Termo só com palavras de até duas letras
+        não tem trigrama interno: todos os nomes são conferidos.
+        """
+        np = numpy
+        internos = np.fromiter(
+            (chave_trigrama(t) for t in trigramas(normalizado) if ' ' not in t), dtype='<i8'
+        )
+        if len(internos):
+            acertos, encontrados = self._acertos(internos)
+            if encontrados < len(internos):
+                return []
+            posicoes = np.flatnonzero(acertos == len(internos)).tolist()
+            return [posicao for posicao in posicoes if normalizado in self.material(posicao)[2]]
+        return [posicao for posicao, nome in enumerate(self._nomes_normalizados()) if normalizado in nome]
+
+    def buscar(self, termo, limite=10, minimo=PONTUACAO_MINIMA):
+        """Materiais mais parecidos com o termo, do mais para o menos parecido
+
+        Quem contém o termo inteiro ou todos os trigramas dele sempre entra;
+        a pontuação mínima (Dice) só filtra os demais.
+        """
+        np = numpy
+        normalizado = normalizar(termo)
+        if not normalizado or not self.materiais:
+            return []
+        resultados = {}
+        posicao_codigo = self._posicao_codigo(normalizado)
+        if posicao_codigo is not None:
+            resultados[posicao_codigo] = BONUS_CODIGO
+        contem = self._contem(normalizado)
+        for posicao in contem:
+            resultados[posicao] = resultados.get(posicao, 0.0) + BONUS_CONTEM
+
+        chaves = np.fromiter((chave_trigrama(t) for t in trigramas(normalizado)), dtype='<i8')
+        acertos, encontrados = self._acertos(chaves)
+        if encontrados:
+            pontuacoes = 2.0 * acertos / (len(chaves) + self.quantidades)
+
+            # Dos demais, só os melhores pela pontuação de Dice
+            candidatos = np.flatnonzero(pontuacoes >= min(minimo, 1.0))
+            quantidade = max(limite * CANDIDATOS_POR_RESULTADO, limite)
+            if len(candidatos) > quantidade:
+                melhores = np.argpartition(pontuacoes[candidatos], -quantidade)[-quantidade:]
+                candidatos = candidatos[melhores]
+            completos = np.flatnonzero(acertos == len(chaves))
+            for posicao in set(candidatos.tolist()).union(completos.tolist(), contem):
+                resultados[posicao] = resultados.get(posicao, 0.0) + float(pontuacoes[posicao])
+
+        ordenados = sorted(resultados.items(), key=lambda item: (-item[1], item[0]))[:limite]
+        return [Resultado(*self.material(posicao)[:2], round(pontuacao, 4)) for posicao, pontuacao in ordenados]
+
+
+def busca_linear(materiais, termo):
+    """Busca do bot (searchMaterials): normaliza cada nome e testa se contém o termo"""
+    normalizado = normalizar(termo)
+    return [(nome, codigo) for nome, codigo in materiais if normalizado in normalizar(nome)]
+
+
+def busca_linear_trigramas(materiais, termo, limite=10, minimo=PONTUACAO_MINIMA):
+    """Mesma pontuação e mesmos critérios do índice, material por material (referência do benchmark)"""
+    normalizado = normalizar(termo)
+    do_termo = trigramas(normalizado)
+    pontuados = []
+    for posicao, (nome, codigo) in enumerate(materiais):
+        nome_normalizado = normalizar(nome)
+        do_nome = trigramas(nome_normalizado)
+        pontuacao = 2.0 * len(do_termo & do_nome) / (len(do_termo) + len(do_nome))
+        if normalizado in nome_normalizado:
+            pontuacao += BONUS_CONTEM
+        elif pontuacao < minimo and not do_termo <= do_nome:
+            pontuacao = 0.0
+        if codigo == normalizado:
+            pontuacao += BONUS_CODIGO
+        if not pontuacao:
+            continue
+        pontuados.append((-pontuacao, posicao, codigo, nome))
+    pontuados.sort()
+    return [Resultado(codigo, nome, round(-pontuacao, 4)) for pontuacao, _, codigo, nome in pontuados[:limite]]
+
+
+def caminho_indice_padrao(origem):
+    """Índice dado diretamente, ou lista_materiais.busca junto da origem (como o PDF)"""
+    if os.path.isfile(origem) and not origem.lower().endswith(('.zip', '.rar')):
+        return origem
+    pasta = os.path.dirname(origem) if os.path.isfile(origem) else origem
+    return os.path.join(pasta, NOME_INDICE_PADRAO)
@@ -0,0 +1,335 @@
+"""Cache incremental do parsing, persistido em SQLite ao lado da base de materiais.
+
+Cada arquivo INI é guardado com tamanho, mtime e hash do conteúdo. Numa nova
+execução só os arquivos novos ou alterados são lidos; os removidos saem do cache.
+Em compartilhamentos SMB e discos FAT o mtime tem resolução de até 2s: um
+arquivo cujo mtime não é claramente anterior à leitura pode ter mudado de
+novo sem mudar o mtime, e por isso só é servido do cache se o hash bater.
+O mesmo banco guarda o índice de pastas da descoberta (mtime e conteúdo de
+cada pasta), usado para não listar de novo as pastas que não mudaram, e os
+registros completos (todos os campos) lidos pelo modo serviço.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from . import config
+from .fontes import JANELA_MTIME_NS, itens_com_stat
+
+NOME_ARQUIVO_CACHE = '.exportador_cache.sqlite'
+
+# Incrementar quando o formato do registro (ou a regra de extração) mudar
+VERSAO_CACHE = '4'
+
+
+def hash_conteudo(conteudo):
+    """Hash curto do conteúdo do arquivo, guardado junto com o registro"""
+    return hashlib.blake2b(conteudo, digest_size=16).hexdigest()
+
+
+def _ambiguo(mtime_ns, lido_ns):
+    """O arquivo pode ter mudado depois da leitura sem mudar o mtime (resolução grossa)"""
+    return lido_ns is None or mtime_ns > lido_ns - JANELA_MTIME_NS
+
+
+def _hash_arquivo(caminho_arquivo):
+    try:
+        with open(caminho_arquivo, 'rb') as arquivo:
+            return hash_conteudo(arquivo.read())
+    except OSError:
+        return None
+
+
+def _pasta_cache_usuario():
+    base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'corte_certo')
+
+
+class CacheParsing:
+    """Índice em disco com o CAMPO1 já extraído de cada arquivo da pasta (e o registro completo, no modo serviço)"""
+
+    def __init__(self, caminho_db, pasta_base):
+        self.caminho_db = caminho_db
+        self.pasta_base = os.path.abspath(pasta_base)
+        self.hits = 0
+        self.misses = 0
+        self.removidos = 0
+        # (registros do banco, caminhos vistos) da varredura em andamento
+        self._varredura = None
+        # O monitor do modo serviço usa o cache fora da thread que o abriu (sempre sob a sua trava)
+        self._conexao = sqlite3.connect(caminho_db, check_same_thread=False)
+        self._criar_tabelas()
+
+    @classmethod
+    def para_pasta(cls, pasta):
+        """Abre o cache da pasta, ou None se o cache estiver desativado
+
+        O arquivo fica na própria pasta; se ela for somente leitura (ex: compartilhamento
+        de rede), usa a pasta de cache do usuário. CORTE_CERTO_CACHE pode apontar
+        outra pasta ou ser '0' para desativar.
+        """
+        destino = config.CACHE_DIR
+        if destino == '0':
+            return None
+
+        pasta = os.path.abspath(pasta)
+        if destino:
+            candidatos = [os.path.join(destino, cls._nome_para(pasta))]
+        else:
+            candidatos = [
+                os.path.join(pasta, NOME_ARQUIVO_CACHE),
+                os.path.join(_pasta_cache_usuario(), cls._nome_para(pasta)),
+            ]
+
+        for caminho_db in candidatos:
+            try:
+                os.makedirs(os.path.dirname(caminho_db), exist_ok=True)
+                return cls(caminho_db, pasta)
+            except (OSError, sqlite3.Error):
+                continue
+        return None
+
+    @staticmethod
+    def _nome_para(pasta):
+        chave = hashlib.blake2b(os.path.normcase(pasta).encode('utf-8'), digest_size=8).hexdigest()
+        return f'{chave}.sqlite'
+
+    def _criar_tabelas(self):
+        with self._conexao:
+            self._conexao.execute(
+                'CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT)'
+            )
+            linha = self._conexao.execute("SELECT valor FROM meta WHERE chave = 'versao'").fetchone()
+            if linha is None or linha[0] != VERSAO_CACHE:
+                self._conexao.execute('DROP TABLE IF EXISTS arquivos')
+                self._conexao.execute('DROP TABLE IF EXISTS pastas')
+                self._conexao.execute('DROP TABLE IF EXISTS registros')
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO meta (chave, valor) VALUES ('versao', ?)", (VERSAO_CACHE,)
+                )
+            self._conexao.execute(
+                'CREATE TABLE IF NOT EXISTS arquivos ('
+                ' caminho TEXT PRIMARY KEY, tamanho INTEGER, mtime_ns INTEGER, hash TEXT, campo1 TEXT,'
+                ' lido_ns INTEGER)'
+            )
+            self._conexao.execute(
+                'CREATE TABLE IF NOT EXISTS pastas ('
+                ' caminho TEXT PRIMARY KEY, mtime_ns INTEGER, arquivos TEXT, subpastas TEXT)'
+            )
+            self._conexao.execute(
+                'CREATE TABLE IF NOT EXISTS registros ('
+                ' caminho TEXT PRIMARY KEY, tamanho INTEGER, mtime_ns INTEGER, codigo TEXT, valores TEXT,'
+                ' lido_ns INTEGER)'
+            )
+
+    def relativo(self, caminho_arquivo):
+        # Caminhos vindos da varredura já começam pela pasta base: evita o relpath
+        prefixo = self.pasta_base + os.sep
+        if caminho_arquivo.startswith(prefixo):
+            return caminho_arquivo[len(prefixo):]
+        return os.path.relpath(caminho_arquivo, self.pasta_base)
+
+    def separar(self, arquivos):
+        """Separa os arquivos em já conhecidos e pendentes
+
+        Retorna (conhecidos, pendentes): conhecidos é um dict
+        caminho -> (tamanho, mtime_ns, campo1), com campo1 None se o arquivo
+        não tem CAMPO1, e pendentes é a lista de (caminho, tamanho, mtime_ns)
+        que precisa ser lida de novo.
+        """
+        conhecidos, pendentes = self.classificar(itens_com_stat(arquivos))
+        self.concluir_varredura()
+        return conhecidos, pendentes
+
+    def classificar(self, entradas):
+        """Mesmo retorno de separar, para uma parte das entradas da varredura
+
+        entradas: (caminho, tamanho, mtime_ns), com tamanho -1 se o stat
+        falhou. Permite classificar os arquivos à medida que a descoberta os
+        encontra, reaproveitando o stat que ela já fez. Os removidos da pasta
+        só saem do cache em concluir_varredura(), que não deve ser chamado se
+        a varredura foi interrompida.
+
+        Com tamanho e mtime iguais, mas mtime próximo demais da leitura
+        gravada, o arquivo é lido de novo e só conta como conhecido se o
+        hash do conteúdo for o mesmo.
+        """
+        if self._varredura is None:
+            registros = {
+                caminho: (tamanho, mtime_ns, campo1, hash_, lido_ns)
+                for caminho, tamanho, mtime_ns, campo1, hash_, lido_ns
+                in self._conexao.execute('SELECT caminho, tamanho, mtime_ns, campo1, hash, lido_ns FROM arquivos')
+            }
+            self._varredura = (registros, set())
+        registros, presentes = self._varredura
+
+        conhecidos = {}
+        pendentes = []
+        confirmados = []
+        inicio_ns = time.time_ns()
+        for entrada in entradas:
+            caminho_arquivo, tamanho, mtime_ns = entrada
+            relativo = self.relativo(caminho_arquivo)
+            presentes.add(relativo)
+            registro = registros.get(relativo)
+            # Stat com falha (-1) fica pendente: o parser registra o erro de leitura
+            if not (tamanho >= 0 and registro and registro[0] == tamanho and registro[1] == mtime_ns):
+                pendentes.append(entrada)
+            elif not _ambiguo(mtime_ns, registro[4]):
+                conhecidos[caminho_arquivo] = registro[:3]
+            elif registro[3] is not None and _hash_arquivo(caminho_arquivo) == registro[3]:
+                conhecidos[caminho_arquivo] = registro[:3]
+                confirmados.append((inicio_ns, relativo))
+            else:
+                pendentes.append(entrada)
+        if confirmados:
+            # Conteúdo conferido agora: a próxima execução não precisa reler
+            with self._conexao:
+                self._conexao.executemany('UPDATE arquivos SET lido_ns = ? WHERE caminho = ?', confirmados)
+
+        self.hits += len(conhecidos)
+        self.misses += len(pendentes)
+        return conhecidos, pendentes
+
+    def concluir_varredura(self):
+        """Remove do cache os arquivos que não apareceram na varredura"""
+        if self._varredura is None:
+            return
+        registros, presentes = self._varredura
+        self._varredura = None
+        ausentes = [(caminho,) for caminho in registros if caminho not in presentes]
+        if ausentes:
+            with self._conexao:
+                self._conexao.executemany('DELETE FROM arquivos WHERE caminho = ?', ausentes)
+        self.removidos += len(ausentes)
+
+    def gravar(self, registros, lido_ns=None):
+        """Grava registros (caminho, tamanho, mtime_ns, hash, campo1) recém-lidos
+
+        lido_ns é o instante (time.time_ns()) em que a leitura dos arquivos
+        começou; sem ele, vale o instante da gravação.
+        """
+        lido_ns = time.time_ns() if lido_ns is None else lido_ns
+        linhas = [
+            (self.relativo(caminho), tamanho, mtime_ns, hash_, campo1, lido_ns)
+            for caminho, tamanho, mtime_ns, hash_, campo1 in registros
+            if tamanho >= 0
+        ]
+        with self._conexao:
+            self._conexao.executemany(
+                'INSERT OR REPLACE INTO arquivos (caminho, tamanho, mtime_ns, hash, campo1, lido_ns)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                linhas
+            )
+
+    def remover(self, caminhos):
+        """Remove do cache os arquivos informados (ex: apagados da pasta)"""
+        relativos = [(self.relativo(c),) for c in caminhos]
+        with self._conexao:
+            self._conexao.executemany('DELETE FROM arquivos WHERE caminho = ?', relativos)
+            self._conexao.executemany('DELETE FROM registros WHERE caminho = ?', relativos)
+        self.removidos += len(caminhos)
+
+    def classificar_registros(self, entradas, assinatura):
+        """Como separar, para os registros completos (codigo, valores) do modo serviço
+
+        entradas: todos os (caminho, tamanho, mtime_ns) da pasta; os
+        registros de arquivos que não estão entre elas saem do cache.
+        assinatura identifica os campos extraídos: registros gravados com
+        outros campos são descartados. Retorna (conhecidos, pendentes), com
+        conhecidos caminho -> (tamanho, mtime_ns, (codigo, valores)).
+        Os registros não guardam hash: com mtime próximo demais da leitura,
+        o arquivo fica pendente.
+        """
+        linha = self._conexao.execute("SELECT valor FROM meta WHERE chave = 'campos_registros'").fetchone()
+        if linha is None or linha[0] != assinatura:
+            with self._conexao:
+                self._conexao.execute('DELETE FROM registros')
+                self._conexao.execute(
+                    "INSERT OR REPLACE INTO meta (chave, valor) VALUES ('campos_registros', ?)", (assinatura,)
+                )
+        guardados = {
+            caminho: (tamanho, mtime_ns, codigo, valores, lido_ns)
+            for caminho, tamanho, mtime_ns, codigo, valores, lido_ns
+            in self._conexao.execute('SELECT caminho, tamanho, mtime_ns, codigo, valores, lido_ns FROM registros')
+        }
+
+        conhecidos = {}
+        pendentes = []
+        for entrada in entradas:
+            caminho_arquivo, tamanho, mtime_ns = entrada
+            guardado = guardados.pop(self.relativo(caminho_arquivo), None)
+            if (tamanho >= 0 and guardado and guardado[0] == tamanho and guardado[1] == mtime_ns
+                    and not _ambiguo(mtime_ns, guardado[4])):
+                conhecidos[caminho_arquivo] = (tamanho, mtime_ns, (guardado[2], tuple(json.loads(guardado[3]))))
+            else:
+                pendentes.append(entrada)
+        if guardados:
+            with self._conexao:
+                self._conexao.executemany('DELETE FROM registros WHERE caminho = ?', [(c,) for c in guardados])
+
+        self.hits += len(conhecidos)
+        self.misses += len(pendentes)
+        self.removidos += len(guardados)
+        return conhecidos, pendentes
+
+    def gravar_registros(self, registros, lido_ns=None):
+        """Grava registros completos (caminho, tamanho, mtime_ns, (codigo, valores)) recém-lidos
+
+        lido_ns tem o mesmo sentido que em gravar().
+        """
+        lido_ns = time.time_ns() if lido_ns is None else lido_ns
+        linhas = [
+            (self.relativo(caminho), tamanho, mtime_ns, codigo, json.dumps(valores, ensure_ascii=False), lido_ns)
+            for caminho, tamanho, mtime_ns, (codigo, valores) in registros
+            if tamanho >= 0
+        ]
+        with self._conexao:
+            self._conexao.executemany(
+                'INSERT OR REPLACE INTO registros (caminho, tamanho, mtime_ns, codigo, valores, lido_ns)'
+                ' VALUES (?, ?, ?, ?, ?, ?)',
+                linhas
+            )
+
+    def carregar_indice_pastas(self, assinatura):
+        """Índice de pastas da varredura anterior (formato de fontes.VarreduraPasta)
+
+        Retorna None se não houver índice ou se ele foi gravado com outros
+        filtros de descoberta (assinatura diferente).
+        """
+        linha = self._conexao.execute("SELECT valor FROM meta WHERE chave = 'filtro_pastas'").fetchone()
+        if linha is None or linha[0] != assinatura:
+            return None
+        indice = {}
+        for caminho, mtime_ns, arquivos, subpastas in self._conexao.execute(
+                'SELECT caminho, mtime_ns, arquivos, subpastas FROM pastas'):
+            indice[caminho] = (mtime_ns, [tuple(a) for a in json.loads(arquivos)], json.loads(subpastas))
+        return indice
+
+    def gravar_indice_pastas(self, indice, assinatura):
+        """Substitui o índice de pastas pelo da varredura que acabou de terminar"""
+        with self._conexao:
+            self._conexao.execute('DELETE FROM pastas')
+            self._conexao.executemany(
+                'INSERT INTO pastas (caminho, mtime_ns, arquivos, subpastas) VALUES (?, ?, ?, ?)',
+                [
+                    (caminho, mtime_ns, json.dumps(arquivos, ensure_ascii=False),
+                     json.dumps(subpastas, ensure_ascii=False))
+                    for caminho, (mtime_ns, arquivos, subpastas) in indice.items()
+                ]
+            )
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO meta (chave, valor) VALUES ('filtro_pastas', ?)", (assinatura,)
+            )
+
+    def fechar(self):
+        self._conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+        return False
@@ -0,0 +1,432 @@
+"""Modo linha de comando (sem interface gráfica) do exportador.
+
+Não importa PyQt5, então pode rodar em servidor sem display (cron, bot Node):
+
+    python -m corte_certo C:\\CC_DATA_BASE\\MAT -o lista_materiais.pdf --json
+
+Se a origem não mudou desde a última exportação (mesmos INI, tamanhos e mtimes,
+mesmas opções), as saídas existentes são mantidas em milissegundos; --forcar
+gera de novo. As saídas são gravadas num temporário e renomeadas no final.
+Para listas muito grandes, --pdf-processos N renderiza o PDF por faixas de
+páginas em N processos (0 = um por núcleo). --agrupar familia|letra gera o
+PDF agrupado, com sumário no início e um marcador por grupo.
+
+Com --watch o processo continua rodando e regenera o PDF a cada alteração na pasta.
+Com --servico o processo fica rodando com os materiais da pasta em memória e
+atende pedidos JSON (gerar lista, consultar código, buscar), um por linha,
+pela entrada padrão ou por --socket (ver corte_certo.servico):
+
+    python -m corte_certo C:\\CC_DATA_BASE\\MAT --servico
+
+Com --lote exporta várias origens de uma lista de trabalhos (ver corte_certo.trabalhos):
+
+    python -m corte_certo --lote filiais.json --json
+
+Com --buscar consulta o índice de busca gravado pelo formato 'busca'
+(origem = o arquivo .busca, ou a pasta/arquivo exportado com -f pdf,busca):
+
+    python -m corte_certo C:\\CC_DATA_BASE\\MAT --buscar "cinza cristal 15" --json
+
+Com --estoque gera o relatório de estoque (chapas e retalhos das tabelas CHP/RET).
+Com --comparar compara a origem com uma versão anterior (pasta, ZIP/RAR ou
+CSV/JSON Lines exportado) e gera o relatório de materiais adicionados,
+removidos e renomeados (ver corte_certo.comparacao):
+
+    python -m corte_certo D:\\Backup\\MAT_novo.zip --comparar D:\\Backup\\MAT_antigo.zip -f pdf,csv
+
+Códigos de saída:
+    0  PDF gerado
+    1  nenhum material encontrado nos arquivos INI
+    2  argumentos inválidos
+    3  pasta ou arquivo de origem não encontrado
+    4  erro durante o processamento (no --lote: algum trabalho falhou)
+    5  dependência ausente (reportlab, natsort, rarfile, openpyxl ou numpy)
+    6  processamento cancelado (Ctrl+C); nenhuma saída pela metade fica no disco
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from . import config
+from .exportacao import AGRUPAMENTOS, Exportador, NenhumDadoEncontrado, OrigemNaoEncontrada, caminho_saida_padrao
+from .fontes import FiltroArquivos
+from .pipeline import ExportacaoCancelada
+
+SAIDA_OK = 0
+SAIDA_SEM_DADOS = 1
+SAIDA_ARGUMENTOS = 2
+SAIDA_ORIGEM_INEXISTENTE = 3
+SAIDA_ERRO = 4
+SAIDA_DEPENDENCIA = 5
+SAIDA_CANCELADA = 6
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m corte_certo',
+        description='Gera a lista de materiais do Corte Certo em PDF, sem interface gráfica.'
+    )
+    parser.add_argument('origem', nargs='?', help='pasta com os arquivos INI ou arquivo .zip/.rar')
+    parser.add_argument('-o', '--saida', help='caminho do PDF (padrão: lista_materiais.pdf junto da origem)')
+    parser.add_argument('-f', '--formatos', default='pdf',
+                        help='formatos gerados na mesma passada, separados por vírgula: pdf,csv,xlsx,jsonl,busca')
+    parser.add_argument('-w', '--workers', type=int, help='quantidade de workers do pool de parsing')
+    parser.add_argument('--pool', choices=['thread', 'process'], help='tipo de pool de parsing')
+    parser.add_argument('--familia', help='inclui apenas os materiais desta família (DESC/FAMILIA)')
+    parser.add_argument('--espessura', type=int, help='inclui apenas os materiais desta espessura (PROP_FISIC/ESPESSURA)')
+    parser.add_argument('--sem-cache', action='store_true', help='ignora o cache incremental de parsing')
+    parser.add_argument('--incluir',
+                        help="padrões de arquivo incluídos, separados por vírgula (ex: 'M*.INI'; padrão: *.ini)")
+    parser.add_argument('--excluir', help='padrões de arquivo excluídos, separados por vírgula')
+    parser.add_argument('--ignorar-pastas',
+                        help="pastas puladas na descoberta, separadas por vírgula (ex: 'BACKUP*,BKP*'; padrão: nenhuma)")
+    parser.add_argument('--varredura-completa', action='store_true',
+                        help='lista todas as pastas, sem usar o índice de pastas inalteradas do cache')
+    parser.add_argument('--forcar', action='store_true',
+                        help='gera de novo mesmo que a origem não tenha mudado desde a última exportação')
+    parser.add_argument('--pdf-processos', type=int,
+                        help='processos da renderização do PDF por faixas de páginas (1 = único, 0 = um por núcleo)')
+    parser.add_argument('--agrupar', choices=AGRUPAMENTOS,
+                        help='agrupa o PDF por família ou letra inicial, com sumário e marcadores')
+    parser.add_argument('--perfil', action='store_true',
+                        help='roda sob o cProfile e grava <saida>.perfil e <saida>.perfil.txt')
+    parser.add_argument('--json', action='store_true', help='imprime o resumo em JSON na saída padrão')
+    parser.add_argument('-q', '--quiet', action='store_true', help='não imprime o log de operações')
+    parser.add_argument('--watch', action='store_true', help='monitora a pasta e regenera o PDF a cada alteração')
+    parser.add_argument('--servico', action='store_true',
+                        help='mantém os materiais em memória e atende pedidos JSON (um por linha)')
+    parser.add_argument('--socket', help='socket Unix do --servico (padrão: entrada e saída padrão)')
+    parser.add_argument('--lote', help='lista de trabalhos (JSON ou "origem;saida" por linha) exportados em paralelo')
+    parser.add_argument('--simultaneos', type=int, help='trabalhos do lote executados ao mesmo tempo')
+    parser.add_argument('--buscar', metavar='TERMO', help='consulta o índice de busca (formato busca) da origem')
+    parser.add_argument('--limite', type=int, default=10, help='quantidade máxima de resultados do --buscar')
+    parser.add_argument('--estoque', action='store_true',
+                        help='gera o relatório de estoque (pdf e/ou csv) em vez da lista de materiais')
+    parser.add_argument('--comparar', metavar='ANTERIOR',
+                        help='versão anterior (pasta, .zip/.rar ou .csv/.jsonl exportado) comparada com a origem')
+    parser.add_argument('--chapas', help='pasta das tabelas CHP*.TAB/RET*.TAB (padrão: pasta CHP ao lado da origem)')
+    parser.add_argument('--intervalo', type=float, help='segundos entre varreduras no modo watch sem watchdog')
+    parser.add_argument('--debounce', type=float, help='segundos sem alterações antes de regenerar no modo watch')
+    return parser
+
+
+def _log_stderr(mensagem):
+    print(mensagem, file=sys.stderr, flush=True)
+
+
+def _lista(valor):
+    if valor is None:
+        return None
+    return [item.strip() for item in valor.split(',') if item.strip()]
+
+
+def _filtro_arquivos(args):
+    return FiltroArquivos(_lista(args.incluir), _lista(args.excluir), _lista(args.ignorar_pastas))
+
+
+def _finalizar(args, codigo, resumo):
+    resumo = dict(resumo, ok=codigo == SAIDA_OK, codigo_saida=codigo)
+    if args.json:
+        print(json.dumps(resumo, ensure_ascii=False))
+    elif codigo == SAIDA_OK:
+        for caminho in resumo['saidas'].values():
+            print(f"{'Sem alterações' if resumo.get('reaproveitado') else 'Gerado'}: {caminho}")
+        print(f"{resumo['materiais']} materiais em {resumo['tempos']['total']:.2f}s")
+    else:
+        _log_stderr(f"Erro: {resumo['erro']}")
+    return codigo
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.workers is not None and args.workers < 1:
+        criar_parser().error('--workers precisa ser maior que zero')
+    if args.pdf_processos is not None and args.pdf_processos < 0:
+        criar_parser().error('--pdf-processos não pode ser negativo')
+
+    if args.lote:
+        return executar_lote(args)
+    if not args.origem:
+        criar_parser().error('informe a origem (pasta ou arquivo .zip/.rar) ou --lote')
+    if args.buscar is not None:
+        return executar_busca(args)
+    if args.servico:
+        return executar_servico(args)
+    if args.watch:
+        return executar_watch(args)
+    if args.estoque:
+        return executar_estoque(args)
+    if args.comparar:
+        return executar_comparacao(args)
+
+    try:
+        exportador = Exportador(
+            args.origem,
+            args.saida or caminho_saida_padrao(args.origem),
+            workers=args.workers,
+            modo=args.pool,
+            usar_cache=not args.sem_cache,
+            log=None if args.quiet else _log_stderr,
+            formatos=[f.strip() for f in args.formatos.split(',') if f.strip()],
+            filtros={'familia': args.familia, 'espessura': args.espessura},
+            perfil=args.perfil or None,
+            filtro_arquivos=_filtro_arquivos(args),
+            usar_indice=False if args.varredura_completa else None,
+            reaproveitar=False if args.forcar else None,
+            processos_pdf=args.pdf_processos,
+            agrupar=args.agrupar
+        )
+    except ValueError as e:
+        criar_parser().error(str(e))
+
+    try:
+        resumo = exportador.executar()
+    except (ExportacaoCancelada, KeyboardInterrupt):
+        # Encerra os workers que ainda estiverem no meio de um lote
+        exportador.cancelar()
+        return _finalizar(args, SAIDA_CANCELADA, {'origem': args.origem, 'erro': "Processamento cancelado"})
+    except NenhumDadoEncontrado as e:
+        return _finalizar(args, SAIDA_SEM_DADOS, {'origem': args.origem, 'erro': str(e)})
+    except OrigemNaoEncontrada as e:
+        return _finalizar(args, SAIDA_ORIGEM_INEXISTENTE, {'origem': args.origem, 'erro': str(e)})
+    except ImportError as e:
+        return _finalizar(args, SAIDA_DEPENDENCIA, {'origem': args.origem, 'erro': f"Dependência ausente: {e.name or e}"})
+    except Exception as e:
+        return _finalizar(args, SAIDA_ERRO, {'origem': args.origem, 'erro': f"Erro ao processar: {str(e)}"})
+
+    return _finalizar(args, SAIDA_OK, resumo)
+
+
+def executar_busca(args):
+    """Busca aproximada no índice gravado pela exportação (formato 'busca')"""
+    from .busca import IndiceBusca, caminho_indice_padrao
+
+    caminho = caminho_indice_padrao(args.origem)
+    if not os.path.isfile(caminho):
+        return _finalizar(args, SAIDA_ORIGEM_INEXISTENTE, {
+            'origem': args.origem,
+            'erro': f"Índice de busca não encontrado: {caminho} (gere com -f pdf,busca)"
+        })
+    inicio = time.perf_counter()
+    try:
+        with IndiceBusca.abrir(caminho) as indice:
+            resultados = indice.buscar(args.buscar, limite=args.limite)
+    except ImportError as e:
+        return _finalizar(args, SAIDA_DEPENDENCIA, {'origem': args.origem, 'erro': f"Dependência ausente: {e.name or e}"})
+    except (OSError, ValueError) as e:
+        return _finalizar(args, SAIDA_ERRO, {'origem': args.origem, 'erro': f"Erro ao ler o índice: {str(e)}"})
+    segundos = time.perf_counter() - inicio
+
+    if args.json:
+        print(json.dumps({
+            'origem': caminho,
+            'termo': args.buscar,
+            'resultados': [resultado._asdict() for resultado in resultados],
+            'tempos': {'total': round(segundos, 6)},
+            'ok': bool(resultados),
+            'codigo_saida': SAIDA_OK if resultados else SAIDA_SEM_DADOS,
+        }, ensure_ascii=False))
+    else:
+        for resultado in resultados:
+            print(f"{resultado.codigo} = {resultado.material} ({resultado.pontuacao:.2f})")
+        if not resultados:
+            _log_stderr(f"Nenhum material parecido com: {args.buscar}")
+    return SAIDA_OK if resultados else SAIDA_SEM_DADOS
+
+
+def executar_estoque(args):
+    """Relatório de estoque: totais de chapas, retalhos e valor por material e por família"""
+    from .estoque import ESCRITORES, NOME_RELATORIO_PADRAO, gerar_relatorio_estoque
+
+    formatos = [f.strip().lower().lstrip('.') for f in args.formatos.split(',') if f.strip()]
+    invalidos = [f for f in formatos if f not in ESCRITORES]
+    if invalidos or not formatos:
+        criar_parser().error(f"Formatos do relatório de estoque: {', '.join(ESCRITORES)}")
+    if not os.path.exists(args.origem):
+        return _finalizar(args, SAIDA_ORIGEM_INEXISTENTE,
+                          {'origem': args.origem, 'erro': f"Pasta ou arquivo não encontrado: {args.origem}"})
+
+    raiz = os.path.splitext(args.saida or caminho_saida_padrao(args.origem, NOME_RELATORIO_PADRAO))[0]
+    inicio = time.perf_counter()
+    try:
+        resumo = gerar_relatorio_estoque(
+            args.origem,
+            {formato: f"{raiz}.{formato}" for formato in formatos},
+            pasta_chapas=args.chapas,
+            workers=args.workers,
+            modo=args.pool,
+            log=None if args.quiet else _log_stderr
+        )
+    except ImportError as e:
+        return _finalizar(args, SAIDA_DEPENDENCIA, {'origem': args.origem, 'erro': f"Dependência ausente: {e.name or e}"})
+    except Exception as e:
+        return _finalizar(args, SAIDA_ERRO, {'origem': args.origem, 'erro': f"Erro ao processar: {str(e)}"})
+
+    if not resumo['totais']['materiais']:
+        return _finalizar(args, SAIDA_SEM_DADOS, dict(resumo, erro="Nenhum material com estoque encontrado."))
+    resumo['materiais'] = resumo['totais']['materiais']
+    resumo['tempos'] = {'total': round(time.perf_counter() - inicio, 4)}
+    return _finalizar(args, SAIDA_OK, resumo)
+
+
+def executar_comparacao(args):
+    """Relatório de diferenças entre a versão anterior (--comparar) e a origem"""
+    from .comparacao import ESCRITORES, caminho_relatorio_padrao, gerar_comparacao
+
+    formatos = [f.strip().lower().lstrip('.') for f in args.formatos.split(',') if f.strip()]
+    invalidos = [f for f in formatos if f not in ESCRITORES]
+    if invalidos or not formatos:
+        criar_parser().error(f"Formatos do relatório de comparação: {', '.join(ESCRITORES)}")
+    for origem in (args.comparar, args.origem):
+        if not os.path.exists(origem):
+            return _finalizar(args, SAIDA_ORIGEM_INEXISTENTE,
+                              {'origem': origem, 'erro': f"Pasta ou arquivo não encontrado: {origem}"})
+
+    raiz = os.path.splitext(args.saida or caminho_relatorio_padrao(args.origem))[0]
+    inicio = time.perf_counter()
+    try:
+        resumo = gerar_comparacao(
+            args.comparar,
+            args.origem,
+            {formato: f"{raiz}.{formato}" for formato in formatos},
+            workers=args.workers,
+            modo=args.pool,
+            usar_cache=not args.sem_cache,
+            log=None if args.quiet else _log_stderr,
+            filtro_arquivos=_filtro_arquivos(args)
+        )
+    except KeyboardInterrupt:
+        return _finalizar(args, SAIDA_CANCELADA, {'origem': args.origem, 'erro': "Processamento cancelado"})
+    except NenhumDadoEncontrado as e:
+        return _finalizar(args, SAIDA_SEM_DADOS, {'origem': args.origem, 'erro': str(e)})
+    except ImportError as e:
+        return _finalizar(args, SAIDA_DEPENDENCIA, {'origem': args.origem, 'erro': f"Dependência ausente: {e.name or e}"})
+    except Exception as e:
+        return _finalizar(args, SAIDA_ERRO, {'origem': args.origem, 'erro': f"Erro ao processar: {str(e)}"})
+
+    resumo['tempos'] = {'total': round(time.perf_counter() - inicio, 4)}
+    if not args.json:
+        print(f"{resumo['adicionados']} adicionados, {resumo['removidos']} removidos, "
+              f"{resumo['renomeados']} renomeados")
+    return _finalizar(args, SAIDA_OK, resumo)
+
+
+def executar_lote(args):
+    """Lote: vários trabalhos em paralelo sobre um pool de parsing compartilhado"""
+    from .trabalhos import ExecutorTrabalhos, carregar_trabalhos, linhas_resumo
+
+    try:
+        trabalhos = carregar_trabalhos(args.lote)
+    except OSError as e:
+        return _finalizar(args, SAIDA_ORIGEM_INEXISTENTE, {'origem': args.lote, 'erro': f"Lista de trabalhos: {e}"})
+    except ValueError as e:
+        criar_parser().error(str(e))
+
+    def log(indice, mensagem):
+        _log_stderr(f"[{indice + 1}/{len(trabalhos)}] {mensagem}")
+
+    executor = ExecutorTrabalhos(
+        trabalhos,
+        workers=args.workers,
+        modo=args.pool,
+        simultaneos=args.simultaneos,
+        usar_cache=not args.sem_cache,
+        log=None if args.quiet else log
+    )
+    try:
+        resumo = executor.executar()
+    except KeyboardInterrupt:
+        executor.cancelar()
+        return _finalizar(args, SAIDA_CANCELADA, {'origem': args.lote, 'erro': "Processamento cancelado"})
+
+    if resumo['cancelados']:
+        codigo = SAIDA_CANCELADA
+    else:
+        codigo = SAIDA_ERRO if resumo['falhas'] else SAIDA_OK
+    if args.json:
+        print(json.dumps(dict(resumo, origem=args.lote, ok=codigo == SAIDA_OK, codigo_saida=codigo),
+                         ensure_ascii=False))
+    else:
+        for linha in linhas_resumo(resumo):
+            print(linha)
+    return codigo
+
+
+def executar_watch(args):
+    """Modo watch: regenera o PDF a cada alteração até Ctrl+C"""
+    from .monitor import MonitorPasta
+
+    if not os.path.isdir(args.origem):
+        return _finalizar(args, SAIDA_ORIGEM_INEXISTENTE,
+                          {'origem': args.origem, 'erro': f"Pasta não encontrada: {args.origem}"})
+
+    def ao_atualizar(resultado):
+        if args.json:
+            print(json.dumps(dict(resultado, origem=args.origem), ensure_ascii=False), flush=True)
+
+    monitor = MonitorPasta(
+        args.origem,
+        args.saida or caminho_saida_padrao(args.origem),
+        workers=args.workers,
+        modo=args.pool,
+        usar_cache=not args.sem_cache,
+        intervalo=args.intervalo,
+        debounce=args.debounce,
+        log=None if args.quiet else _log_stderr,
+        filtro=_filtro_arquivos(args)
+    )
+    try:
+        monitor.executar(ao_atualizar)
+    except KeyboardInterrupt:
+        monitor.parar()
+    except ImportError as e:
+        return _finalizar(args, SAIDA_DEPENDENCIA, {'origem': args.origem, 'erro': f"Dependência ausente: {e.name or e}"})
+    except Exception as e:
+        return _finalizar(args, SAIDA_ERRO, {'origem': args.origem, 'erro': f"Erro ao processar: {str(e)}"})
+    finally:
+        monitor.fechar()
+    return SAIDA_OK
+
+
+def executar_servico(args):
+    """Modo serviço: atende pedidos JSON com os materiais em memória até 'encerrar' ou Ctrl+C"""
+    from .servico import ServicoMateriais, atender_fluxo, atender_socket
+
+    if not os.path.isdir(args.origem):
+        return _finalizar(args, SAIDA_ORIGEM_INEXISTENTE,
+                          {'origem': args.origem, 'erro': f"Pasta não encontrada: {args.origem}"})
+
+    servico = ServicoMateriais(
+        args.origem,
+        args.saida,
+        workers=args.workers,
+        modo=args.pool,
+        usar_cache=not args.sem_cache,
+        intervalo=args.intervalo,
+        debounce=args.debounce,
+        log=None if args.quiet else _log_stderr,
+        filtro=_filtro_arquivos(args)
+    )
+    socket = args.socket or config.SERVICO_SOCKET
+    try:
+        servico.iniciar_monitoramento()
+        if socket:
+            atender_socket(servico, socket)
+        else:
+            atender_fluxo(servico)
+    except KeyboardInterrupt:
+        pass
+    except ImportError as e:
+        return _finalizar(args, SAIDA_DEPENDENCIA, {'origem': args.origem, 'erro': f"Dependência ausente: {e.name or e}"})
+    except Exception as e:
+        return _finalizar(args, SAIDA_ERRO, {'origem': args.origem, 'erro': f"Erro ao processar: {str(e)}"})
+    finally:
+        servico.parar()
+        servico.fechar()
+    return SAIDA_OK
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,298 @@
+"""Comparação entre duas versões da base de materiais (pastas, ZIP/RAR ou exportações).
+
+Cada lado é lido pelo mesmo caminho da exportação (Exportador.ler: pasta,
+arquivo compactado em memória, cache de parsing) ou, se for uma exportação
+anterior em CSV/JSON Lines, direto do arquivo. Os dois lados viram um
+dicionário código -> material e a comparação é uma passada por cada um:
+
+    adicionado  código só na versão atual
+    removido    código só na versão anterior
+    renomeado   mesmo código com outro material
+
+Só as diferenças são ordenadas (natsort pelo código), então bases de 50 mil
+materiais com poucas mudanças são comparadas em uma fração de segundo depois
+da leitura. O relatório sai em PDF e/ou CSV.
+"""
+import csv
+import json
+import os
+from collections import namedtuple
+
+from .exportacao import Exportador, NenhumDadoEncontrado, caminho_saida_padrao
+from .pipeline import Cancelamento
+from .saidas import publicar_arquivos
+
+NOME_RELATORIO_PADRAO = 'comparacao_materiais.pdf'
+
+ADICIONADO = 'adicionado'
+REMOVIDO = 'removido'
+RENOMEADO = 'renomeado'
+
+CABECALHO_CSV = ('tipo', 'codigo', 'material_anterior', 'material_atual')
+
+# Exportações anteriores aceitas como um dos lados da comparação
+EXTENSOES_EXPORTACAO = ('.csv', '.jsonl')
+
+# Separador dos materiais quando o mesmo código aparece mais de uma vez na base
+SEPARADOR_REPETIDOS = ' | '
+
+Comparacao = namedtuple('Comparacao', 'adicionados removidos renomeados inalterados total_anterior total_atual')
+
+
+def eh_exportacao(caminho):
+    """CSV/JSON Lines gerado por uma exportação anterior (saidas.SaidaCSV/SaidaJSONL)"""
+    return os.path.isfile(caminho) and caminho.lower().endswith(EXTENSOES_EXPORTACAO)
+
+
+def ler_exportacao(caminho):
+    """Pares (material, codigo) de um CSV ou JSON Lines gerado pela exportação"""
+    dados = []
+    if caminho.lower().endswith('.jsonl'):
+        with open(caminho, encoding='utf-8') as arquivo:
+            for linha in arquivo:
+                if linha.strip():
+                    item = json.loads(linha)
+                    dados.append((item['material'], str(item['codigo'])))
+    else:
+        with open(caminho, encoding='utf-8-sig', newline='') as arquivo:
+            leitor = csv.reader(arquivo, delimiter=';')
+            cabecalho = next(leitor, None)
+            if cabecalho is None or [c.strip().lower() for c in cabecalho[:2]] != ['codigo', 'material']:
+                raise ValueError(f"CSV sem o cabeçalho 'codigo;material' da exportação: {caminho}")
+            for linha in leitor:
+                if len(linha) >= 2:
+                    dados.append((linha[1], linha[0]))
+    if not dados:
+        raise NenhumDadoEncontrado(f"Nenhum material na exportação {caminho}")
+    return dados
+
+
+def indexar(dados):
+    """Dicionário código -> material; retorna (indice, códigos repetidos)
+
+    Um código repetido com materiais diferentes (mesmo M*.INI em duas
+    subpastas) fica com os materiais ordenados e unidos por
+    SEPARADOR_REPETIDOS, então o resultado não depende da ordem de leitura.
+    """
+    indice = {}
+    repetidos = {}
+    for material, codigo in dados:
+        anterior = indice.setdefault(codigo, material)
+        if anterior != material:
+            repetidos.setdefault(codigo, [anterior]).append(material)
+    for codigo, materiais in repetidos.items():
+        indice[codigo] = SEPARADOR_REPETIDOS.join(sorted(set(materiais)))
+    return indice, len(repetidos)
+
+
+def comparar(anterior, atual):
+    """Compara dois índices código -> material (uma passada por lado)"""
+    from natsort import natsort_keygen
+
+    adicionados = []
+    renomeados = []
+    inalterados = 0
+    buscar = anterior.get
+    for codigo, material in atual.items():
+        antigo = buscar(codigo)
+        if antigo is None:
+            adicionados.append((codigo, material))
+        elif antigo != material:
+            renomeados.append((codigo, antigo, material))
+        else:
+            inalterados += 1
+    removidos = [(codigo, material) for codigo, material in anterior.items() if codigo not in atual]
+
+    chave_natural = natsort_keygen()
+
+    def chave(item):
+        return chave_natural(item[0])
+    return Comparacao(
+        sorted(adicionados, key=chave),
+        sorted(removidos, key=chave),
+        sorted(renomeados, key=chave),
+        inalterados,
+        len(anterior),
+        len(atual),
+    )
+
+
+def linhas_relatorio(comparacao):
+    """Linhas (tipo, codigo, material_anterior, material_atual) na ordem do relatório"""
+    for codigo, material in comparacao.adicionados:
+        yield ADICIONADO, codigo, '', material
+    for codigo, material in comparacao.removidos:
+        yield REMOVIDO, codigo, material, ''
+    for codigo, antigo, novo in comparacao.renomeados:
+        yield RENOMEADO, codigo, antigo, novo
+
+
+def escrever_csv(comparacao, caminho, origens=None):
+    """CSV com uma linha por diferença (';' e BOM, como as demais saídas CSV)"""
+    with open(caminho, 'w', encoding='utf-8-sig', newline='') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(CABECALHO_CSV)
+        escritor.writerows(linhas_relatorio(comparacao))
+
+
+_TAMANHO_PDF = 9
+_ESPACAMENTO_PDF = 13
+
+
+def _cortar(texto, limite):
+    return texto if len(texto) <= limite else texto[:limite - 1] + '…'
+
+
+def escrever_pdf(comparacao, caminho, origens=None):
+    """PDF com o resumo e uma seção por tipo de diferença (adicionados, removidos, renomeados)"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    from . import pdf as pdf_lista
+
+    largura, altura = A4
+    documento = canvas.Canvas(caminho, pagesize=A4, pageCompression=1)
+    data_hora = pdf_lista.carimbo_data_hora()
+    margem = pdf_lista.MARGEM
+
+    def nova_pagina():
+        pdf_lista.adicionar_rodape(documento, largura, data_hora)
+        documento.showPage()
+        return altura - pdf_lista.TOPO
+
+    def cabecalho(y, colunas):
+        documento.setFont("Helvetica-Bold", _TAMANHO_PDF)
+        for titulo, x in colunas:
+            documento.drawString(x, y, titulo)
+        documento.line(margem, y - 4, largura - margem, y - 4)
+        return y - _ESPACAMENTO_PDF - 2
+
+    def secao(y, titulo, colunas, linhas):
+        """Título da seção e a tabela, continuando nas páginas seguintes se preciso"""
+        if y - pdf_lista.ESPACAMENTO * 3 < pdf_lista.LIMITE_INFERIOR:
+            y = nova_pagina()
+        documento.setFont("Helvetica-Bold", 11)
+        documento.drawString(margem, y, f"{titulo} ({len(linhas)})")
+        y -= pdf_lista.ESPACAMENTO
+        if not linhas:
+            documento.setFont("Helvetica", _TAMANHO_PDF)
+            documento.drawString(margem, y, "Nenhum")
+            return y - pdf_lista.ESPACAMENTO * 1.5
+        while linhas:
+            y = cabecalho(y, colunas)
+            cabem = max(1, int((y - pdf_lista.LIMITE_INFERIOR) // _ESPACAMENTO_PDF) + 1)
+            pagina, linhas = linhas[:cabem], linhas[cabem:]
+            # Uma coluna da tabela por bloco de texto, como na lista de materiais
+            for indice, (_, x) in enumerate(colunas):
+                pdf_lista.desenhar_coluna(documento, x, y, [linha[indice] for linha in pagina],
+                                          _TAMANHO_PDF, _ESPACAMENTO_PDF)
+            y -= _ESPACAMENTO_PDF * len(pagina) + pdf_lista.ESPACAMENTO
+            if linhas:
+                y = nova_pagina()
+        return y
+
+    # Título, origens e totais
+    y = altura - pdf_lista.TOPO
+    documento.setFont("Helvetica-Bold", 14)
+    documento.drawString(margem, y, "Comparação de Materiais")
+    documento.line(margem, y - 5, largura - margem, y - 5)
+    y -= pdf_lista.ESPACAMENTO * 1.5
+    documento.setFont("Helvetica", 10)
+    anterior, atual = origens or ('', '')
+    for rotulo, origem, total in (('Anterior', anterior, comparacao.total_anterior),
+                                  ('Atual', atual, comparacao.total_atual)):
+        documento.drawString(margem, y, _cortar(f"{rotulo}: {origem} ({total} materiais)", 100))
+        y -= pdf_lista.ESPACAMENTO
+    documento.drawString(
+        margem, y,
+        f"{len(comparacao.adicionados)} adicionados | {len(comparacao.removidos)} removidos | "
+        f"{len(comparacao.renomeados)} renomeados | {comparacao.inalterados} sem alteração"
+    )
+    y -= pdf_lista.ESPACAMENTO * 2
+
+    colunas_material = (('Código', margem), ('Material', 90))
+    y = secao(y, "Adicionados", colunas_material,
+              [(codigo, _cortar(material, 90)) for codigo, material in comparacao.adicionados])
+    y = secao(y, "Removidos", colunas_material,
+              [(codigo, _cortar(material, 90)) for codigo, material in comparacao.removidos])
+    secao(y, "Renomeados", (('Código', margem), ('Material anterior', 90), ('Material atual', 335)),
+          [(codigo, _cortar(antigo, 46), _cortar(novo, 46)) for codigo, antigo, novo in comparacao.renomeados])
+    pdf_lista.adicionar_rodape(documento, largura, data_hora)
+    documento.save()
+
+
+ESCRITORES = {'pdf': escrever_pdf, 'csv': escrever_csv}
+
+
+def caminho_relatorio_padrao(atual):
+    """Relatório ao lado da versão atual (dentro da pasta, ou junto do ZIP/RAR/exportação)"""
+    return caminho_saida_padrao(atual, NOME_RELATORIO_PADRAO)
+
+
+def gerar_comparacao(anterior, atual, caminhos, workers=None, modo=None, usar_cache=True,
+                     log=None, progresso=None, cancelamento=None, filtro_arquivos=None):
+    """Lê as duas versões, compara e grava o relatório nos formatos pedidos
+
+    caminhos: dict formato ('pdf'/'csv') -> caminho. progresso(percentual)
+    vai de 0 a 100: 45% para cada leitura e o restante para o relatório.
+    Retorna o resumo com as contagens de cada tipo de diferença.
+    """
+    log = log or (lambda mensagem: None)
+    progresso = progresso or (lambda percentual: None)
+    cancelamento = cancelamento or Cancelamento()
+
+    def ler(origem, inicio):
+        if eh_exportacao(origem):
+            log(f"Lendo exportação anterior: {origem}")
+            dados = ler_exportacao(origem)
+        else:
+            exportador = Exportador(
+                origem,
+                workers=workers,
+                modo=modo,
+                usar_cache=usar_cache,
+                log=log,
+                progresso=lambda percentual: progresso(inicio + percentual * 45 // 100),
+                cancelamento=cancelamento,
+                filtro_arquivos=filtro_arquivos
+            )
+            dados = exportador.ler()
+        indice, repetidos = indexar(dados)
+        if repetidos:
+            log(f"{repetidos} códigos aparecem mais de uma vez em {origem}")
+        log(f"{len(indice)} materiais em {origem}")
+        progresso(inicio + 45)
+        return indice
+
+    indice_anterior = ler(anterior, 0)
+    cancelamento.verificar()
+    indice_atual = ler(atual, 45)
+    cancelamento.verificar()
+
+    comparacao = comparar(indice_anterior, indice_atual)
+    log(f"Diferenças: {len(comparacao.adicionados)} adicionados, {len(comparacao.removidos)} removidos, "
+        f"{len(comparacao.renomeados)} renomeados ({comparacao.inalterados} sem alteração)")
+    cancelamento.verificar()
+
+    def escrever(temporarios):
+        for formato, temporario in temporarios.items():
+            log(f"Gerando {formato.upper()}: {caminhos[formato]}")
+            ESCRITORES[formato](comparacao, temporario, (anterior, atual))
+            cancelamento.verificar()
+
+    # Sem relatório pela metade no disco: o anterior só é substituído quando todos foram gerados
+    publicar_arquivos(caminhos, escrever)
+    progresso(100)
+
+    return {
+        'anterior': anterior,
+        'origem': atual,
+        'saidas': caminhos,
+        'saida': next(iter(caminhos.values())),
+        'materiais': comparacao.total_atual,
+        'materiais_anterior': comparacao.total_anterior,
+        'adicionados': len(comparacao.adicionados),
+        'removidos': len(comparacao.removidos),
+        'renomeados': len(comparacao.renomeados),
+        'inalterados': comparacao.inalterados,
+    }
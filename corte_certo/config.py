@@ -0,0 +1,81 @@
+"""Configurações centralizadas do exportador.
+
+Todos os valores podem ser sobrescritos por variáveis de ambiente,
+no mesmo espírito do config/index.js do bot.
+"""
+import os
+
+
+def _int_env(nome, padrao):
+    """Lê um inteiro de uma variável de ambiente, com valor padrão"""
+    try:
+        return int(os.environ.get(nome, ''))
+    except ValueError:
+        return padrao
+
+
+def _lista_env(nome, padrao):
+    """Lê uma lista separada por vírgulas de uma variável de ambiente (como os .split(',') do bot)"""
+    valor = os.environ.get(nome, padrao)
+    return [item.strip() for item in valor.split(',') if item.strip()]
+
+
+# Pool de parsing: 'thread' (padrão, bom para I/O em compartilhamento de rede)
+# ou 'process' (melhor quando o gargalo é CPU)
+POOL_MODO = os.environ.get('CORTE_CERTO_POOL', 'thread').lower()
+
+# Quantidade de workers do pool (0 = automático)
+POOL_WORKERS = _int_env('CORTE_CERTO_WORKERS', 0)
+
+# Quantidade de arquivos por lote enviado ao pool
+TAMANHO_LOTE = _int_env('CORTE_CERTO_LOTE', 256)
+
+# Processos da renderização do PDF por faixas de páginas
+# (1 = canvas único do reportlab, 0 = um processo por núcleo)
+PDF_PROCESSOS = _int_env('CORTE_CERTO_PDF_PROCESSOS', 1)
+
+# Agrupamento do PDF, com sumário e um marcador por grupo ('' = lista corrida, 'familia' ou 'letra')
+AGRUPAR_PDF = os.environ.get('CORTE_CERTO_AGRUPAR', '').lower()
+
+# Trabalhos em lote executados ao mesmo tempo (o parsing de todos divide o mesmo pool)
+TRABALHOS_SIMULTANEOS = _int_env('CORTE_CERTO_TRABALHOS_SIMULTANEOS', 2)
+
+# Pasta do cache incremental de parsing (vazio = ao lado da base, '0' = desativado)
+CACHE_DIR = os.environ.get('CORTE_CERTO_CACHE', '')
+
+# Descoberta dos INI: padrões de nome incluídos/excluídos e pastas puladas
+# (padrões estilo fnmatch, sem diferenciar maiúsculas; ex: CORTE_CERTO_INCLUIR=M*.INI).
+# Nenhuma pasta é pulada por padrão; ex: CORTE_CERTO_IGNORAR_PASTAS=BACKUP*,BKP*
+PADROES_INCLUIR = _lista_env('CORTE_CERTO_INCLUIR', '*.ini')
+PADROES_EXCLUIR = _lista_env('CORTE_CERTO_EXCLUIR', '')
+PASTAS_IGNORADAS = _lista_env('CORTE_CERTO_IGNORAR_PASTAS', '')
+
+# Índice de pastas no cache: pastas com o mesmo mtime da varredura anterior não são listadas de novo,
+# mas os arquivos delas ainda recebem um stat ('0' desativa)
+INDICE_PASTAS = os.environ.get('CORTE_CERTO_INDICE_PASTAS', '1') != '0'
+
+# Saídas mantidas sem regerar quando as entradas e a configuração não mudaram desde a última exportação ('0' desativa)
+REAPROVEITAR_SAIDAS = os.environ.get('CORTE_CERTO_REAPROVEITAR', '1') != '0'
+
+# Modo watch: intervalo da varredura por polling e tempo de silêncio antes de regenerar (segundos)
+WATCH_INTERVALO = float(os.environ.get('CORTE_CERTO_WATCH_INTERVALO', '5'))
+WATCH_DEBOUNCE = float(os.environ.get('CORTE_CERTO_WATCH_DEBOUNCE', '2'))
+
+# Modo serviço: socket Unix onde os pedidos são atendidos (vazio = entrada e saída padrão)
+SERVICO_SOCKET = os.environ.get('CORTE_CERTO_SOCKET', '')
+
+# Quantidade mínima de chapas usada quando o INI não define QTD_MIN_CHP (mesma variável do bot)
+QTD_MIN_CHP = _int_env('QTD_MIN_CHP', 15)
+
+# Pasta das tabelas de chapas e retalhos (CHP*.TAB / RET*.TAB), ao lado da pasta MAT (mesma variável do bot)
+PASTA_CHAPAS = os.environ.get('CHAPAS_FOLDER', 'CHP')
+
+# Interface: verificação das dependências em segundo plano, depois da primeira pintura
+# ('0' desativada, '1' só informa as que faltam, 'instalar' instala as que faltam com o pip)
+VERIFICAR_DEPENDENCIAS = os.environ.get('CORTE_CERTO_VERIFICAR_DEPENDENCIAS', '0').lower()
+
+# Métricas por etapa: JSON gravado ao lado do PDF ('0' desativa)
+METRICAS = os.environ.get('CORTE_CERTO_METRICAS', '1') != '0'
+
+# Perfil do cProfile da exportação inteira, gravado ao lado do PDF ('1' ativa)
+PERFIL = os.environ.get('CORTE_CERTO_PERFIL', '0') == '1'
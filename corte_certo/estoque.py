@@ -0,0 +1,452 @@
+"""Relatório de estoque: chapas e retalhos cruzados com o cadastro de materiais.
+
+As quantidades ficam em CHP{codigo}.TAB (chapas) e RET{codigo}.TAB (retalhos),
+com o código com 5 dígitos, na pasta CHP do banco (config.PASTA_CHAPAS). O
+formato das linhas é o mesmo que o corteCertoService.loadChapas/loadRetalhos
+do bot lê:
+
+    CHP: ativo numero quantidade altura largura descricao...   (separado por espaços)
+    RET: numero,+,quantidade,altura,largura,descricao          ('+' = ativo)
+
+Todas as tabelas são lidas em uma só varredura da pasta para colunas planas
+(uma linha de tabela por posição). A junção com os materiais e os totais por
+material e por família são feitos com NumPy (searchsorted + bincount), sem
+laço em Python sobre os materiais.
+"""
+import csv
+import os
+import re
+from array import array
+
+from . import config
+from .materiais import CampoINI, carregar_materiais, limpar_nome
+from .saidas import publicar_arquivos
+
+# Imports otimizados - carregados apenas quando necessário
+numpy = None
+
+NOME_RELATORIO_PADRAO = 'relatorio_estoque.pdf'
+
+# Chapa inteira usada pelo alerta de estoque do bot (stockAlertService)
+CHAPA_BASE = (2740, 1840)
+
+CAMPOS_ESTOQUE = (
+    CampoINI('nome', 'DESC', 'CAMPO1', 'texto', ''),
+    CampoINI('familia', 'DESC', 'FAMILIA', 'categoria', ''),
+    CampoINI('preco', 'PROP_COMERC', 'PRECO_CHAPA', 'float', 0.0),
+    CampoINI('qtd_min_chp', 'ESTOQUE', 'QTD_MIN_CHP', 'int', config.QTD_MIN_CHP),
+)
+
+CABECALHO_CSV = ('codigo', 'material', 'familia', 'chapas', 'chapas_base', 'retalhos',
+                 'area_retalhos_m2', 'preco_chapa', 'valor_chapas', 'qtd_min_chp', 'abaixo_minimo')
+
+_ARQUIVO_TABELA = re.compile(r'^(CHP|RET)(\d+)\.TAB$', re.IGNORECASE)
+_INTEIRO = re.compile(rb'\s*([+-]?\d+)')
+_DECIMAL = re.compile(rb'\s*([+-]?(?:\d+\.?\d*|\.\d+))')
+
+
+def _carregar_numpy():
+    global numpy
+    if numpy is None:
+        import numpy
+    return numpy
+
+
+def _int_js(valor):
+    """parseInt do JavaScript (0 quando inválido, como o `|| 0` do bot)"""
+    encontrado = _INTEIRO.match(valor)
+    return int(encontrado.group(1)) if encontrado else 0
+
+
+def _float_js(valor):
+    """parseFloat do JavaScript (0.0 quando inválido)"""
+    encontrado = _DECIMAL.match(valor)
+    return float(encontrado.group(1)) if encontrado else 0.0
+
+
+def localizar_pasta_chapas(origem):
+    """Pasta CHP ao lado da pasta de materiais (ou do compactado); senão a própria pasta da origem"""
+    origem = os.path.abspath(origem)
+    if os.path.isdir(origem):
+        candidatos = [os.path.join(os.path.dirname(origem), config.PASTA_CHAPAS), origem]
+    else:
+        pasta = os.path.dirname(origem)
+        candidatos = [os.path.join(pasta, config.PASTA_CHAPAS), pasta]
+    for candidato in candidatos:
+        if os.path.isdir(candidato):
+            return candidato
+    return candidatos[-1]
+
+
+class TabelasEstoque:
+    """Linhas ativas de todas as tabelas CHP/RET em colunas planas
+
+    chapas/retalhos: dict coluna -> array ('codigo', 'quantidade', 'altura', 'largura').
+    codigos_chp: códigos que têm tabela de chapas (mesmo que sem linhas ativas).
+    """
+
+    def __init__(self):
+        self.chapas = {'codigo': array('q'), 'quantidade': array('q'), 'altura': array('d'), 'largura': array('d')}
+        self.retalhos = {'codigo': array('q'), 'quantidade': array('q'), 'altura': array('d'), 'largura': array('d')}
+        self.codigos_chp = array('q')
+        self.arquivos = 0
+        self.erros = []
+
+    def adicionar_chapas(self, codigo, conteudo):
+        colunas = self.chapas
+        self.codigos_chp.append(codigo)
+        for linha in conteudo.split(b'\n'):
+            partes = linha.split()
+            # Como o loadChapas: só linhas com '1' no primeiro campo
+            if len(partes) < 5 or partes[0] != b'1':
+                continue
+            colunas['codigo'].append(codigo)
+            colunas['quantidade'].append(_int_js(partes[2]))
+            colunas['altura'].append(_float_js(partes[3]))
+            colunas['largura'].append(_float_js(partes[4]))
+
+    def adicionar_retalhos(self, codigo, conteudo):
+        colunas = self.retalhos
+        for linha in conteudo.split(b'\n'):
+            partes = linha.split(b',')
+            # Como o loadRetalhos: só retalhos ativos ('+') com quantidade > 0
+            if len(partes) < 5 or partes[1] != b'+':
+                continue
+            quantidade = _int_js(partes[2])
+            if quantidade <= 0:
+                continue
+            colunas['codigo'].append(codigo)
+            colunas['quantidade'].append(quantidade)
+            colunas['altura'].append(_float_js(partes[3]))
+            colunas['largura'].append(_float_js(partes[4]))
+
+
+def ler_tabelas(pasta_chapas):
+    """Lê todas as tabelas CHP*.TAB e RET*.TAB da pasta em uma única varredura"""
+    tabelas = TabelasEstoque()
+    try:
+        entradas = list(os.scandir(pasta_chapas))
+    except OSError as e:
+        tabelas.erros.append(f"Não foi possível listar a pasta de chapas: {pasta_chapas} | Erro: {e}")
+        return tabelas
+
+    for entrada in entradas:
+        encontrado = _ARQUIVO_TABELA.match(entrada.name)
+        if not encontrado or not entrada.is_file():
+            continue
+        try:
+            with open(entrada.path, 'rb') as arquivo:
+                conteudo = arquivo.read()
+        except OSError as e:
+            tabelas.erros.append(f"Não foi possível ler a tabela: {entrada.name} | Erro: {e}")
+            continue
+        tabelas.arquivos += 1
+        codigo = int(encontrado.group(2))
+        if encontrado.group(1).upper() == 'CHP':
+            tabelas.adicionar_chapas(codigo, conteudo)
+        else:
+            tabelas.adicionar_retalhos(codigo, conteudo)
+    return tabelas
+
+
+def _codigo_numerico(codigo):
+    try:
+        return int(codigo)
+    except ValueError:
+        return -1
+
+
+class RelatorioEstoque:
+    """Totais de estoque por material e por família, calculados de forma vetorizada
+
+    Depois de calcular(), self.materiais guarda as colunas NumPy por material
+    (na ordem do armazém) e self.familias os totais por família.
+    """
+
+    def __init__(self, armazem, tabelas):
+        self.armazem = armazem
+        self.tabelas = tabelas
+        self.materiais = {}
+        self.familias = {}
+        self.sem_material = 0
+
+    def _posicoes(self, codigos_tabela, codigos_ordenados, ordem):
+        """Posição no armazém de cada código da tabela (-1 quando o material não existe)"""
+        np = numpy
+        codigos_tabela = np.frombuffer(codigos_tabela, dtype=np.int64)
+        if not len(codigos_ordenados):
+            return np.full(len(codigos_tabela), -1, dtype=np.int64)
+        indices = np.searchsorted(codigos_ordenados, codigos_tabela)
+        indices = np.minimum(indices, len(codigos_ordenados) - 1)
+        encontrados = codigos_ordenados[indices] == codigos_tabela
+        return np.where(encontrados, ordem[indices], -1)
+
+    def _somar(self, posicoes, pesos, total):
+        validos = posicoes >= 0
+        return numpy.bincount(posicoes[validos], weights=pesos[validos], minlength=total)
+
+    def calcular(self):
+        np = _carregar_numpy()
+        armazem = self.armazem
+        total = len(armazem)
+
+        # Junção por código: códigos dos materiais ordenados + busca binária vetorizada
+        codigos = np.fromiter((_codigo_numerico(c) for c in armazem.codigos), dtype=np.int64, count=total)
+        ordem = np.argsort(codigos, kind='stable')
+        codigos_ordenados = codigos[ordem]
+
+        chapas = {nome: np.frombuffer(coluna, dtype=coluna.typecode) for nome, coluna in self.tabelas.chapas.items()}
+        retalhos = {nome: np.frombuffer(coluna, dtype=coluna.typecode) for nome, coluna in self.tabelas.retalhos.items()}
+        pos_chapas = self._posicoes(self.tabelas.chapas['codigo'], codigos_ordenados, ordem)
+        pos_retalhos = self._posicoes(self.tabelas.retalhos['codigo'], codigos_ordenados, ordem)
+        pos_chp = self._posicoes(self.tabelas.codigos_chp, codigos_ordenados, ordem)
+        self.sem_material = int((pos_chapas < 0).sum() + (pos_retalhos < 0).sum())
+
+        quantidade_chapas = chapas['quantidade'].astype(np.float64)
+        eh_base = (np.rint(chapas['altura']) == CHAPA_BASE[0]) & (np.rint(chapas['largura']) == CHAPA_BASE[1])
+        quantidade_retalhos = retalhos['quantidade'].astype(np.float64)
+        area_retalhos = quantidade_retalhos * retalhos['altura'] * retalhos['largura'] / 1000000  # m²
+
+        preco = armazem.coluna_numpy('preco')
+        qtd_min = armazem.coluna_numpy('qtd_min_chp')
+        tem_chp = np.zeros(total, dtype=bool)
+        tem_chp[pos_chp[pos_chp >= 0]] = True
+
+        soma_chapas = self._somar(pos_chapas, quantidade_chapas, total)
+        soma_base = self._somar(pos_chapas, np.where(eh_base, quantidade_chapas, 0.0), total)
+        soma_retalhos = self._somar(pos_retalhos, quantidade_retalhos, total)
+        soma_area = self._somar(pos_retalhos, area_retalhos, total)
+        tem_retalho = self._somar(pos_retalhos, np.ones(len(pos_retalhos)), total) > 0
+
+        self.materiais = {
+            'chapas': soma_chapas.astype(np.int64),
+            'chapas_base': soma_base.astype(np.int64),
+            'retalhos': soma_retalhos.astype(np.int64),
+            'area_retalhos': soma_area,
+            'valor': soma_chapas * preco,
+            # Mesmo critério do alerta do bot: quantidade da chapa inteira abaixo do mínimo do INI
+            'abaixo_minimo': tem_chp & (soma_base < qtd_min),
+            'com_estoque': tem_chp | tem_retalho,
+        }
+
+        familia = armazem.coluna_numpy('familia').astype(np.int64)
+        rotulos = armazem.categorias['familia']
+        selecionados = self.materiais['com_estoque']
+        familia_sel = familia[selecionados]
+        totais = {}
+        for nome in ('chapas', 'retalhos', 'area_retalhos', 'valor', 'abaixo_minimo'):
+            totais[nome] = np.bincount(familia_sel, weights=self.materiais[nome][selecionados].astype(np.float64),
+                                       minlength=len(rotulos))
+        totais['materiais'] = np.bincount(familia_sel, minlength=len(rotulos))
+        self.familias = {
+            rotulo: {
+                'materiais': int(totais['materiais'][indice]),
+                'chapas': int(totais['chapas'][indice]),
+                'retalhos': int(totais['retalhos'][indice]),
+                'area_retalhos': round(float(totais['area_retalhos'][indice]), 3),
+                'valor': round(float(totais['valor'][indice]), 2),
+                'abaixo_minimo': int(totais['abaixo_minimo'][indice]),
+            }
+            for indice, rotulo in enumerate(rotulos)
+            if totais['materiais'][indice]
+        }
+        return self
+
+    def posicoes(self):
+        """Posições dos materiais com estoque, ordenadas por família e nome (ordem natural)"""
+        from natsort import natsort_keygen
+
+        armazem = self.armazem
+        chave_natural = natsort_keygen()
+        nomes = armazem.colunas['nome']
+        posicoes = numpy.flatnonzero(self.materiais['com_estoque']).tolist()
+        return sorted(posicoes, key=lambda i: (armazem.valor('familia', i), chave_natural(nomes[i])))
+
+    def linhas_materiais(self):
+        """Uma tupla por material com estoque, na ordem de CABECALHO_CSV"""
+        armazem = self.armazem
+        m = self.materiais
+        preco = armazem.colunas['preco']
+        qtd_min = armazem.colunas['qtd_min_chp']
+        for i in self.posicoes():
+            yield (
+                armazem.codigos[i],
+                limpar_nome(armazem.colunas['nome'][i]),
+                armazem.valor('familia', i),
+                int(m['chapas'][i]),
+                int(m['chapas_base'][i]),
+                int(m['retalhos'][i]),
+                round(float(m['area_retalhos'][i]), 3),
+                preco[i],
+                round(float(m['valor'][i]), 2),
+                qtd_min[i],
+                bool(m['abaixo_minimo'][i]),
+            )
+
+    def totais(self):
+        """Totais gerais do relatório"""
+        m = self.materiais
+        selecionados = m['com_estoque']
+        return {
+            'materiais': int(selecionados.sum()),
+            'chapas': int(m['chapas'].sum()),
+            'retalhos': int(m['retalhos'].sum()),
+            'area_retalhos': round(float(m['area_retalhos'].sum()), 3),
+            'valor': round(float(m['valor'].sum()), 2),
+            'abaixo_minimo': int(m['abaixo_minimo'].sum()),
+        }
+
+
+def _moeda(valor):
+    """Valor no formato brasileiro: 1.234,56"""
+    return f"{valor:,.2f}".replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def _decimal(valor, casas=2):
+    return f"{valor:.{casas}f}".replace('.', ',')
+
+
+def escrever_csv(relatorio, caminho):
+    """CSV por material (';' e BOM, como as demais saídas CSV)"""
+    with open(caminho, 'w', encoding='utf-8-sig', newline='') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(CABECALHO_CSV)
+        for linha in relatorio.linhas_materiais():
+            escritor.writerow(linha[:6] + (
+                _decimal(linha[6], 3), _decimal(linha[7]), _decimal(linha[8]), linha[9], 'sim' if linha[10] else ''
+            ))
+
+
+# Colunas do PDF (paisagem): (título, x)
+_COLUNAS_PDF = (
+    ('Código', 30), ('Material', 75), ('Família', 360), ('Chapas', 470), ('Retalhos', 520),
+    ('Área ret. (m²)', 575), ('Valor chapas', 650), ('Mínimo', 735), ('Situação', 775),
+)
+_TAMANHO_PDF = 9
+_ESPACAMENTO_PDF = 13
+
+
+def _cortar(texto, limite):
+    return texto if len(texto) <= limite else texto[:limite - 1] + '…'
+
+
+def escrever_pdf(relatorio, caminho):
+    """PDF em paisagem: resumo por família seguido da tabela por material"""
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.pdfgen import canvas
+
+    from . import pdf as pdf_lista
+
+    largura, altura = landscape(A4)
+    documento = canvas.Canvas(caminho, pagesize=(largura, altura), pageCompression=1)
+    data_hora = pdf_lista.carimbo_data_hora()
+    totais = relatorio.totais()
+
+    def cabecalho(y, colunas):
+        documento.setFont("Helvetica-Bold", _TAMANHO_PDF)
+        for titulo, x in colunas:
+            documento.drawString(x, y, titulo)
+        documento.line(pdf_lista.MARGEM, y - 4, largura - pdf_lista.MARGEM, y - 4)
+        return y - _ESPACAMENTO_PDF - 2
+
+    def desenhar_tabela(y, colunas, linhas):
+        """Uma coluna da tabela por bloco de texto, como na lista de materiais"""
+        for indice, (_, x) in enumerate(colunas):
+            pdf_lista.desenhar_coluna(documento, x, y, [linha[indice] for linha in linhas],
+                                      _TAMANHO_PDF, _ESPACAMENTO_PDF)
+
+    def nova_pagina():
+        pdf_lista.adicionar_rodape(documento, largura, data_hora)
+        documento.showPage()
+        return altura - pdf_lista.TOPO
+
+    linhas_por_pagina = int((altura - pdf_lista.TOPO - pdf_lista.LIMITE_INFERIOR) // _ESPACAMENTO_PDF) - 1
+
+    # Título e totais gerais
+    y = altura - pdf_lista.TOPO
+    documento.setFont("Helvetica-Bold", 14)
+    documento.drawString(pdf_lista.MARGEM, y, "Relatório de Estoque")
+    documento.line(pdf_lista.MARGEM, y - 5, largura - pdf_lista.MARGEM, y - 5)
+    y -= pdf_lista.ESPACAMENTO * 1.5
+    documento.setFont("Helvetica", 10)
+    documento.drawString(
+        pdf_lista.MARGEM, y,
+        f"{totais['materiais']} materiais | {totais['chapas']} chapas | {totais['retalhos']} retalhos "
+        f"({_decimal(totais['area_retalhos'])} m²) | Valor em chapas: R$ {_moeda(totais['valor'])} | "
+        f"Abaixo do mínimo: {totais['abaixo_minimo']}"
+    )
+    y -= pdf_lista.ESPACAMENTO * 1.5
+
+    # Resumo por família
+    colunas_familia = (('Família', 30), ('Materiais', 250), ('Chapas', 320), ('Retalhos', 390),
+                       ('Área ret. (m²)', 460), ('Valor chapas', 560), ('Abaixo do mínimo', 680))
+    linhas = [
+        (_cortar(familia or '(sem família)', 45), str(t['materiais']), str(t['chapas']), str(t['retalhos']),
+         _decimal(t['area_retalhos']), _moeda(t['valor']), str(t['abaixo_minimo']))
+        for familia, t in sorted(relatorio.familias.items())
+    ]
+    while True:
+        y = cabecalho(y, colunas_familia)
+        cabem = max(1, int((y - pdf_lista.LIMITE_INFERIOR) // _ESPACAMENTO_PDF))
+        desenhar_tabela(y, colunas_familia, linhas[:cabem])
+        y -= _ESPACAMENTO_PDF * (len(linhas[:cabem]) + 1)
+        linhas = linhas[cabem:]
+        if not linhas:
+            break
+        y = nova_pagina()
+
+    # Tabela por material, sempre começando em página nova
+    y = nova_pagina()
+    pagina = []
+    for linha in relatorio.linhas_materiais():
+        pagina.append((
+            linha[0], _cortar(linha[1], 52), _cortar(linha[2], 20), str(linha[3]), str(linha[5]),
+            _decimal(linha[6]), _moeda(linha[8]), str(linha[9]), 'ABAIXO' if linha[10] else ''
+        ))
+        if len(pagina) >= linhas_por_pagina:
+            desenhar_tabela(cabecalho(y, _COLUNAS_PDF), _COLUNAS_PDF, pagina)
+            pagina = []
+            y = nova_pagina()
+    desenhar_tabela(cabecalho(y, _COLUNAS_PDF), _COLUNAS_PDF, pagina)
+    pdf_lista.adicionar_rodape(documento, largura, data_hora)
+    documento.save()
+
+
+ESCRITORES = {'pdf': escrever_pdf, 'csv': escrever_csv}
+
+
+def gerar_relatorio_estoque(origem, caminhos, pasta_chapas=None, workers=None, modo=None, log=None):
+    """Carrega materiais e tabelas, calcula os totais e grava as saídas pedidas
+
+    caminhos: dict formato ('pdf'/'csv') -> caminho. Retorna o resumo com os totais.
+    """
+    log = log or (lambda mensagem: None)
+    pasta_chapas = pasta_chapas or localizar_pasta_chapas(origem)
+
+    armazem = carregar_materiais(origem, CAMPOS_ESTOQUE, workers=workers, modo=modo, log=log)
+    log(f"{len(armazem)} materiais lidos de {origem}")
+    tabelas = ler_tabelas(pasta_chapas)
+    for erro in tabelas.erros:
+        log(erro)
+    log(f"{tabelas.arquivos} tabelas de estoque lidas de {pasta_chapas}")
+
+    relatorio = RelatorioEstoque(armazem, tabelas).calcular()
+    if relatorio.sem_material:
+        log(f"Linhas de estoque sem material cadastrado: {relatorio.sem_material}")
+
+    def escrever(temporarios):
+        for formato, temporario in temporarios.items():
+            log(f"Gerando {formato.upper()}: {caminhos[formato]}")
+            ESCRITORES[formato](relatorio, temporario)
+
+    # Temporário + os.replace, como nas saídas da exportação: o relatório anterior só é trocado no fim
+    publicar_arquivos(caminhos, escrever)
+
+    return {
+        'origem': origem,
+        'pasta_chapas': pasta_chapas,
+        'saidas': caminhos,
+        'tabelas': tabelas.arquivos,
+        'totais': relatorio.totais(),
+        'familias': relatorio.familias,
+    }
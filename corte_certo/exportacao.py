@@ -0,0 +1,606 @@
+"""Fluxo completo da exportação: leitura dos INI, ordenação e geração do PDF.
+
+Não depende do PyQt5. A interface gráfica (ProcessWorker) e a linha de
+comando (corte_certo.cli) usam o mesmo Exportador, mudando apenas os
+callbacks de log e progresso.
+"""
+import datetime
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .artefatos import (
+    VERSAO_ARTEFATOS, caminho_artefato, carregar_artefato, digesto_entradas, entrada_arquivo, saidas_intactas,
+    salvar_artefato
+)
+from .busca import normalizar
+from .cache import CacheParsing
+from .fontes import FiltroArquivos, FonteCompactada, VarreduraPasta, eh_arquivo_compactado
+from .materiais import carregar_materiais
+from .metricas import (
+    SUFIXO_PERFIL, MetricasExecucao, caminho_metricas, carregar_metricas, contagem_anterior, medir_geracao,
+    pesos_anteriores
+)
+from .parser import MotorParsing, workers_padrao
+from .pipeline import Cancelamento, DescobertaEmFluxo
+from .saidas import ConjuntoSaidas, caminhos_por_formato
+
+NOME_PDF_PADRAO = 'lista_materiais.pdf'
+
+
+class NenhumDadoEncontrado(Exception):
+    """Nenhum CAMPO1 foi encontrado nos arquivos INI da origem"""
+
+
+class OrigemNaoEncontrada(FileNotFoundError):
+    """A pasta ou arquivo compactado de origem não existe"""
+
+
+def _ignorar(*_):
+    pass
+
+
+def caminho_saida_padrao(origem, nome_pdf=NOME_PDF_PADRAO):
+    """PDF ao lado do arquivo compactado, ou dentro da pasta processada"""
+    if os.path.isfile(origem):
+        output_dir = os.path.dirname(origem)
+    else:
+        output_dir = origem
+    return os.path.join(output_dir, nome_pdf)
+
+
+# Agrupamentos do PDF: sumário no início e um marcador por grupo
+AGRUPAMENTOS = ('familia', 'letra')
+
+# Grupo dos materiais sem FAMILIA no INI (fica no fim da lista agrupada)
+SEM_FAMILIA = '(sem família)'
+
+
+def letra_inicial(material):
+    """Grupo por letra inicial: a letra sem acento, ou '#' para números e símbolos"""
+    letra = normalizar(material[0])[:1].upper()
+    return letra if letra.isalpha() else '#'
+
+
+class ChavesNaturais:
+    """Chaves do natsort calculadas uma vez por material e guardadas entre ordenações
+
+    Ordenar de novo (agrupado, ou a lista atualizada do modo watch) só
+    calcula as chaves dos materiais novos; as dos que saíram da lista são
+    descartadas. Com um Cancelamento, o cálculo das chaves é interrompido.
+    """
+
+    def __init__(self):
+        from natsort import natsort_keygen
+        self.chave_natural = natsort_keygen()
+        self._chaves = {}
+
+    def chaves(self, dados, cancelamento=None):
+        """Dicionário material -> chave natural dos dados, reaproveitando as já calculadas"""
+        anteriores = self._chaves
+        chaves = {}
+        for material in (dados if cancelamento is None else cancelamento.interromper(dados)):
+            chave = anteriores.get(material)
+            if chave is None:
+                chave = self.chave_natural(material)
+            chaves[material] = chave
+        if cancelamento is not None:
+            cancelamento.verificar()
+        self._chaves = chaves
+        return chaves
+
+    def ordem_grupo(self, titulo):
+        """Posição de um grupo na lista agrupada: ordem natural do título, sem família por último"""
+        return titulo == SEM_FAMILIA, self.chave_natural(titulo)
+
+    def ordenar(self, dados, grupo=None, cancelamento=None):
+        """Materiais em ordem natural; com grupo(material) -> título, por grupo e depois por material"""
+        chaves = self.chaves(dados, cancelamento)
+        if grupo is None:
+            return sorted(dados, key=chaves.__getitem__)
+        ordem_grupos = {}
+
+        def chave(material):
+            titulo = grupo(material)
+            ordem = ordem_grupos.get(titulo)
+            if ordem is None:
+                ordem = ordem_grupos[titulo] = self.ordem_grupo(titulo)
+            return ordem, chaves[material]
+        return sorted(dados, key=chave)
+
+
+def ordenar_alfabeticamente(dados, cancelamento=None):
+    """Ordena a lista de materiais alfabeticamente usando natsort
+
+    Com um Cancelamento, o cálculo das chaves verifica o pedido de
+    cancelamento, então a ordenação de bases grandes também é interrompida.
+    """
+    return ChavesNaturais().ordenar(dados, cancelamento=cancelamento)
+
+
+class Exportador:
+    """Executa a exportação de uma pasta ou arquivo compactado para PDF
+
+    Outros formatos (csv, xlsx, jsonl, busca) podem ser gerados na mesma passada,
+    com o mesmo nome do PDF. log(mensagem) e progresso(percentual) são
+    opcionais; o resumo da execução (contagens e tempos) fica em self.resumo.
+
+    filtros (ex: {'familia': 'MDF', 'espessura': 18}) restringe a lista aos
+    materiais com esses valores; nesse caso o registro completo de cada INI é
+    lido para o armazenamento colunar (materiais.py) em vez de só o CAMPO1.
+
+    filtro_arquivos (fontes.FiltroArquivos) define os padrões de nome e as
+    pastas puladas na descoberta; usar_indice (padrão: config.INDICE_PASTAS)
+    liga o índice de pastas do cache, que evita listar de novo as pastas que
+    não mudaram.
+
+    pool (parser.criar_pool) e leituras (trabalhos.LeiturasCompartilhadas)
+    são usados pelos trabalhos em lote: o parsing vai para um pool
+    compartilhado e origens repetidas no lote são lidas uma única vez.
+
+    As etapas rodam em fluxo: a descoberta alimenta o parsing por uma fila
+    limitada e as saídas são preparadas em paralelo. cancelar() (de outra
+    thread) interrompe a execução com ExportacaoCancelada, sem deixar
+    saídas pela metade.
+
+    Com reaproveitar (padrão: config.REAPROVEITAR_SAIDAS), se as entradas e a
+    configuração têm o mesmo digest da última exportação (artefatos.py) e as
+    saídas não foram mexidas, elas são devolvidas sem ler nenhum INI
+    (self.resumo['reaproveitado'] fica True).
+
+    processos_pdf (padrão: config.PDF_PROCESSOS) diferente de 1 renderiza o
+    PDF por faixas de páginas em processos separados (pdf_paralelo.py).
+
+    agrupar (padrão: config.AGRUPAR_PDF) ordena por grupo ('familia' ou
+    'letra') e gera o PDF com sumário e um marcador por grupo. Por família,
+    o registro completo de cada INI é lido, como com filtros.
+    """
+
+    def __init__(self, origem, caminho_pdf=None, workers=None, modo=None,
+                 usar_cache=True, log=None, progresso=None, formatos=('pdf',), filtros=None,
+                 perfil=None, cancelamento=None, filtro_arquivos=None, usar_indice=None,
+                 pool=None, leituras=None, reaproveitar=None, processos_pdf=None, agrupar=None):
+        self.origem = origem
+        self.caminho_pdf = caminho_pdf or caminho_saida_padrao(origem)
+        self.caminhos_saida = caminhos_por_formato(self.caminho_pdf, formatos)
+        self.workers = workers
+        self.modo = modo
+        self.usar_cache = usar_cache
+        self.log = log or _ignorar
+        self.progresso = progresso or _ignorar
+        self.filtros = {campo: valor for campo, valor in (filtros or {}).items() if valor is not None}
+        self.perfil = config.PERFIL if perfil is None else perfil
+        self.filtro_arquivos = filtro_arquivos or FiltroArquivos()
+        self.usar_indice = config.INDICE_PASTAS if usar_indice is None else usar_indice
+        self.pool = pool
+        self.leituras = leituras
+        self.reaproveitar = config.REAPROVEITAR_SAIDAS if reaproveitar is None else reaproveitar
+        self.processos_pdf = config.PDF_PROCESSOS if processos_pdf is None else processos_pdf
+        self.agrupar = (config.AGRUPAR_PDF if agrupar is None else agrupar) or None
+        if self.agrupar is not None and self.agrupar not in AGRUPAMENTOS:
+            raise ValueError(f"Agrupamento não suportado: {self.agrupar} (use {', '.join(AGRUPAMENTOS)})")
+        self.familias = {}
+        self.estatisticas = {}
+        self.resumo = {}
+        self.metricas = MetricasExecucao([])
+        self.workers_efetivos = None
+        self.cancelamento = cancelamento or Cancelamento()
+        self._anteriores = None
+        self._entradas_lidas = None
+
+    def cancelar(self):
+        """Pede o cancelamento da execução em andamento (seguro chamar de outra thread)"""
+        self.cancelamento.cancelar()
+
+    def agrupamento(self):
+        """Função material -> título do grupo (None sem agrupamento)"""
+        if self.agrupar == 'familia':
+            return lambda material: self.familias.get(material[1]) or SEM_FAMILIA
+        if self.agrupar == 'letra':
+            return letra_inicial
+        return None
+
+    @property
+    def saida_principal(self):
+        return self.caminhos_saida.get('pdf') or next(iter(self.caminhos_saida.values()))
+
+    def executar(self):
+        """Roda o fluxo completo e retorna o resumo da execução
+
+        Com perfil ativo (CORTE_CERTO_PERFIL=1), a execução roda sob o cProfile
+        e as estatísticas vão para <saida>.perfil (pstats) e <saida>.perfil.txt.
+        """
+        if not self.perfil:
+            return self._executar()
+
+        import cProfile
+        import pstats
+
+        perfilador = cProfile.Profile()
+        try:
+            return perfilador.runcall(self._executar)
+        finally:
+            caminho = os.path.splitext(self.saida_principal)[0] + SUFIXO_PERFIL
+            perfilador.dump_stats(caminho)
+            with open(caminho + '.txt', 'w', encoding='utf-8') as arquivo:
+                pstats.Stats(perfilador, stream=arquivo).sort_stats('cumulative').print_stats(40)
+            self.log(f"Perfil salvo em: {caminho}")
+
+    def _executar(self):
+        inicio = time.perf_counter()
+        tempos = {}
+        self.metricas = MetricasExecucao([])
+        self._entradas_lidas = None
+        if self.reaproveitar:
+            resumo = self._reaproveitar_saidas(inicio)
+            if resumo is not None:
+                return resumo
+        self._anteriores = carregar_metricas(caminho_metricas(self.saida_principal))
+        pesos = pesos_anteriores(self._anteriores)
+
+        # Dependências e PDF/XLSX em memória são preparados enquanto os INI são lidos
+        saidas = ConjuntoSaidas(self.caminhos_saida, self.processos_pdf, self.agrupamento())
+        preparo = ThreadPoolExecutor(max_workers=1, thread_name_prefix='corte-certo-saidas')
+        preparacao = preparo.submit(saidas.preparar)
+        preparo.shutdown(wait=False)
+        try:
+            return self._executar_etapas(inicio, tempos, saidas, preparacao, pesos)
+        except BaseException:
+            # Descarta quando o preparo terminar, sem esperar por ele aqui
+            preparacao.add_done_callback(lambda _: saidas.descartar())
+            raise
+
+    def ler(self, pesos=None, etapas_seguintes=()):
+        """Lê a origem (pasta, ZIP/RAR ou com filtros) e retorna os pares (campo1, codigo) sem ordenar
+
+        etapas_seguintes entram na divisão da barra de progresso depois da
+        leitura (a exportação completa passa ordenação e saídas).
+        """
+        metricas = self.metricas
+        etapas_seguintes = list(etapas_seguintes)
+
+        # Identificar se é um arquivo compactado ou pasta
+        completo = self.filtros or self.agrupar == 'familia'
+        if completo and (eh_arquivo_compactado(self.origem) or os.path.isdir(self.origem)):
+            metricas.definir_ordem(['parsing'] + etapas_seguintes, pesos)
+            dados = self._ler_origem(self.processar_com_filtros)
+        elif eh_arquivo_compactado(self.origem):
+            metricas.definir_ordem(['extracao', 'parsing'] + etapas_seguintes, pesos)
+            self.log(f"Lendo arquivo compactado: {self.origem}")
+            dados = self._ler_origem(self.processar_arquivo_compactado)
+        elif os.path.isdir(self.origem):
+            metricas.definir_ordem(['descoberta', 'parsing'] + etapas_seguintes, pesos)
+            self.log("Iniciando processamento dos arquivos INI...")
+            dados = self._ler_origem(self.processar_arquivos_pasta)
+        else:
+            raise OrigemNaoEncontrada(f"Pasta ou arquivo não encontrado: {self.origem}")
+
+        if not dados:
+            self.log("Nenhum dado encontrado nos arquivos.")
+            raise NenhumDadoEncontrado("Nenhum dado foi encontrado nos arquivos INI.")
+        self.cancelamento.verificar()
+        return dados
+
+    def _executar_etapas(self, inicio, tempos, saidas, preparacao, pesos):
+        metricas = self.metricas
+        dados = self.ler(pesos, ['ordenacao', 'saidas'])
+        tempos['leitura'] = time.perf_counter() - inicio
+
+        # Ordenar e gerar PDF
+        self.log(f"Encontrados {len(dados)} materiais. Ordenando...")
+        with metricas.etapa('ordenacao') as registro:
+            dados_ordenados = ChavesNaturais().ordenar(dados, self.agrupamento(), self.cancelamento)
+            registro['materiais'] = len(dados_ordenados)
+        tempos['ordenacao'] = registro['segundos']
+        self.progresso(metricas.percentual('ordenacao'))
+        self.cancelamento.verificar()
+
+        with metricas.etapa('saidas') as registro:
+            preparacao.result()
+            self.gerar_saidas(dados_ordenados, saidas)
+            registro['materiais'] = len(dados_ordenados)
+            registro['bytes_escritos'] = sum(
+                os.path.getsize(caminho) for caminho in self.caminhos_saida.values() if os.path.exists(caminho)
+            )
+        tempos['saidas'] = registro['segundos']
+        tempos['total'] = time.perf_counter() - inicio
+
+        self.resumo = {
+            'origem': self.origem,
+            'saida': self.saida_principal,
+            'saidas': self.caminhos_saida,
+            'arquivos': self.estatisticas.get('arquivos', 0),
+            'materiais': len(dados_ordenados),
+            'estatisticas': self.estatisticas,
+            'tempos': {etapa: round(segundos, 4) for etapa, segundos in tempos.items()},
+            'metricas': metricas.como_dict(),
+        }
+        self.registrar_metricas()
+        self.registrar_artefato()
+        return self.resumo
+
+    def registrar_metricas(self):
+        """Resumo das etapas no log e JSON de métricas ao lado da saída"""
+        for linha in self.metricas.linhas_resumo():
+            self.log(linha)
+        if not config.METRICAS:
+            return
+        caminho = caminho_metricas(self.saida_principal)
+        try:
+            self.metricas.salvar(caminho, {
+                'origem': self.origem,
+                'gerado_em': datetime.datetime.now().isoformat(timespec='seconds'),
+                'modo': self.modo or config.POOL_MODO,
+                'workers': self.workers_efetivos,
+                'materiais': self.resumo['materiais'],
+            })
+        except OSError as e:
+            self.log(f"Não foi possível salvar as métricas: {e}")
+            return
+        self.log(f"Métricas salvas em: {caminho}")
+        self.resumo['metricas_arquivo'] = caminho
+
+    def configuracao_artefato(self):
+        """Configuração que muda o resultado e entra no digest do artefato"""
+        configuracao = {
+            'versao': VERSAO_ARTEFATOS,
+            'origem': os.path.abspath(self.origem),
+            'saidas': self.caminhos_saida,
+            'filtros': sorted(self.filtros.items()),
+            'arquivos': self.filtro_arquivos.assinatura(),
+        }
+        if self.agrupar:
+            configuracao['agrupar'] = self.agrupar
+        return configuracao
+
+    def _entradas_origem(self):
+        """(caminho, tamanho, mtime_ns) das entradas, como a exportação as descobriria (None sem origem)"""
+        if eh_arquivo_compactado(self.origem):
+            return [entrada_arquivo(self.origem)]
+        if not os.path.isdir(self.origem):
+            return None
+        cache = CacheParsing.para_pasta(self.origem) if self.usar_cache and self.usar_indice else None
+        try:
+            assinatura = self.filtro_arquivos.assinatura()
+            indice = cache.carregar_indice_pastas(assinatura) if cache else None
+            varredura = VarreduraPasta(self.origem, self.filtro_arquivos, indice)
+            entradas = list(self.cancelamento.interromper(varredura.entradas()))
+            self.cancelamento.verificar()
+            if cache and varredura.indice_novo != indice:
+                cache.gravar_indice_pastas(varredura.indice_novo, assinatura)
+        finally:
+            if cache:
+                cache.fechar()
+        return entradas
+
+    def _reaproveitar_saidas(self, inicio):
+        """Resumo com as saídas existentes se nada mudou desde a última exportação (senão None)"""
+        artefato = carregar_artefato(caminho_artefato(self.saida_principal))
+        if artefato is None or not saidas_intactas(artefato, self.caminhos_saida):
+            return None
+        entradas = self._entradas_origem()
+        if entradas is None or artefato.get('digesto') != digesto_entradas(entradas, self.configuracao_artefato()):
+            self.log("Origem alterada desde a última exportação: gerando novamente")
+            return None
+
+        segundos = time.perf_counter() - inicio
+        self.log(f"Nenhuma alteração desde a última exportação ({len(entradas)} entradas conferidas "
+                 f"em {segundos * 1000:.0f} ms): saídas mantidas")
+        for caminho in self.caminhos_saida.values():
+            self.log(f"Mantido: {caminho}")
+        self.progresso(100)
+        self.resumo = {
+            'origem': self.origem,
+            'saida': self.saida_principal,
+            'saidas': self.caminhos_saida,
+            'arquivos': artefato.get('arquivos', 0),
+            'materiais': artefato.get('materiais', 0),
+            'estatisticas': {},
+            'tempos': {'total': round(segundos, 4)},
+            'reaproveitado': True,
+        }
+        return self.resumo
+
+    def registrar_artefato(self):
+        """Grava o digest das entradas lidas junto com o estado das saídas geradas"""
+        if not self.reaproveitar:
+            return
+        try:
+            entradas = self._entradas_lidas
+            if entradas is None:
+                entradas = self._entradas_origem()
+            self.resumo['reaproveitado'] = False
+            salvar_artefato(
+                caminho_artefato(self.saida_principal),
+                digesto_entradas(entradas or [], self.configuracao_artefato()),
+                self.caminhos_saida,
+                {'origem': self.origem, 'arquivos': self.resumo['arquivos'], 'materiais': self.resumo['materiais']}
+            )
+        except OSError as e:
+            self.log(f"Não foi possível salvar o digest das saídas: {e}")
+
+    def _ler_origem(self, ler):
+        """Lê a origem, ou reaproveita a leitura já feita por outro trabalho do lote (self.leituras)"""
+        if self.leituras is None:
+            return ler(self.origem)
+
+        chave = (
+            os.path.normcase(os.path.abspath(self.origem)),
+            self.filtro_arquivos.assinatura(),
+            tuple(sorted(self.filtros.items())),
+            self.agrupar == 'familia',
+        )
+
+        def ler_e_guardar():
+            dados = ler(self.origem)
+            return dados, self.estatisticas, self.familias
+
+        (dados, estatisticas, familias), reaproveitada = self.leituras.obter(chave, ler_e_guardar, self.cancelamento)
+        if reaproveitada:
+            self.estatisticas = dict(estatisticas)
+            self.familias = familias
+            self.log(f"Leitura reaproveitada de outro trabalho do lote ({len(dados)} materiais)")
+        return dados
+
+    def _novo_motor(self):
+        motor = MotorParsing(workers=self.workers, modo=self.modo, cancelamento=self.cancelamento, pool=self.pool)
+        self.workers_efetivos = motor.workers
+        return motor
+
+    def _progresso_parsing(self, etapas):
+        def progresso(feitos, total):
+            self.progresso(self.metricas.percentual_conjunto(etapas, feitos / total if total else 1.0))
+        return progresso
+
+    def processar_arquivo_compactado(self, caminho_arquivo):
+        """Processa os membros .ini de um ZIP/RAR direto da memória, sem extrair para o disco"""
+        metricas = self.metricas
+        # Estado do arquivo antes da leitura: uma alteração durante a leitura invalida o digest
+        self._entradas_lidas = [entrada_arquivo(caminho_arquivo)]
+        try:
+            with FonteCompactada(caminho_arquivo, self.filtro_arquivos) as fonte:
+                total_arquivos = fonte.total
+                self.log(f"Encontrados {total_arquivos} arquivos INI no arquivo compactado")
+
+                # Leitura e parsing acontecem juntos: o tempo gasto dentro do gerador de
+                # membros é a extração, o restante é o parsing
+                motor = self._novo_motor()
+                extracao = metricas.registrar('extracao')
+                inicio = time.perf_counter()
+                dados = motor.processar_membros(
+                    medir_geracao(fonte.membros(), extracao),
+                    total_arquivos,
+                    progresso=self._progresso_parsing(['extracao', 'parsing']),
+                    log=self.log
+                )
+                metricas.registrar('extracao', arquivos=total_arquivos, bytes=fonte.bytes_lidos)
+                metricas.registrar('parsing', segundos=time.perf_counter() - inicio - extracao['segundos'])
+        except Exception as e:
+            self.log(f"Erro ao ler arquivo compactado: {str(e)}")
+            raise
+
+        self.log(f"Processamento concluído. Dados extraídos: {len(dados)}/{total_arquivos}")
+        metricas.registrar_estatisticas('parsing', motor.estatisticas)
+        self.log_estatisticas(motor.estatisticas)
+        return dados
+
+    def processar_arquivos_pasta(self, caminho_pasta):
+        """Processa todos os arquivos INI na pasta (e subpastas)
+
+        A descoberta roda numa thread e entrega os caminhos em lotes; o parsing
+        começa no primeiro lote. Enquanto a varredura não termina, o total do
+        progresso é estimado pela quantidade de arquivos da execução anterior.
+        """
+        metricas = self.metricas
+        estimativa = contagem_anterior(self._anteriores, 'descoberta')
+        assinatura = self.filtro_arquivos.assinatura()
+        metricas.registrar('descoberta')
+
+        # Entradas como descobertas (antes do parsing), para o digest do artefato
+        lidas = self._entradas_lidas = []
+
+        def registrar(entradas):
+            for entrada in entradas:
+                lidas.append(entrada)
+                yield entrada
+
+        def progresso(feitos, _):
+            total = descoberta.encontrados
+            if not descoberta.concluida:
+                total = max(total, estimativa, feitos + 1)
+            self.progresso(metricas.percentual_conjunto(['descoberta', 'parsing'], feitos / total if total else 0.0))
+
+        # Processar os arquivos em lotes no pool; progresso atualizado por lote
+        motor = self._novo_motor()
+        self.log(f"Processando com {motor.workers} worker(s) ({motor.modo})")
+        with metricas.etapa('parsing'):
+            cache = CacheParsing.para_pasta(caminho_pasta) if self.usar_cache else None
+            indice = cache.carregar_indice_pastas(assinatura) if cache and self.usar_indice else None
+            descoberta = DescobertaEmFluxo(caminho_pasta, self.cancelamento, self.filtro_arquivos, indice)
+            try:
+                descoberta.iniciar()
+                dados = motor.processar(
+                    registrar(descoberta.entradas()),
+                    progresso=progresso,
+                    log=self.log,
+                    cache=cache,
+                    total=estimativa
+                )
+                if cache and self.usar_indice and descoberta.concluida:
+                    cache.gravar_indice_pastas(descoberta.varredura.indice_novo, assinatura)
+            finally:
+                descoberta.parar()
+                if cache:
+                    cache.fechar()
+
+        total_arquivos = descoberta.encontrados
+        varredura = descoberta.varredura
+        metricas.registrar('descoberta', segundos=descoberta.segundos, arquivos=total_arquivos,
+                           pastas_listadas=varredura.pastas_listadas,
+                           pastas_reaproveitadas=varredura.pastas_reaproveitadas)
+        self.log(f"Encontrados {total_arquivos} arquivos INI")
+        if indice is not None:
+            self.log(f"Pastas: {varredura.pastas_listadas} listadas, "
+                     f"{varredura.pastas_reaproveitadas} sem alteração (índice)")
+        self.log(f"Processamento concluído. Dados extraídos: {len(dados)}/{total_arquivos}")
+        if cache:
+            self.log(f"Cache: {cache.hits} reaproveitados, {cache.misses} lidos, {cache.removidos} removidos")
+        metricas.registrar_estatisticas('parsing', motor.estatisticas)
+        self.log_estatisticas(motor.estatisticas)
+        return dados
+
+    def processar_com_filtros(self, origem):
+        """Lê os registros completos dos materiais e mantém só os que atendem aos filtros"""
+        compactado = eh_arquivo_compactado(origem)
+        if self.reaproveitar and compactado:
+            # Estado do arquivo antes da leitura, como em processar_arquivo_compactado
+            self._entradas_lidas = [entrada_arquivo(origem)]
+        motivo = f"filtros: {self.filtros}" if self.filtros else "agrupamento por família"
+        self.log(f"Lendo registros completos dos materiais ({motivo})")
+        with self.metricas.etapa('parsing'):
+            armazem = carregar_materiais(
+                origem,
+                workers=self.workers,
+                modo=self.modo,
+                log=self.log,
+                progresso=self._progresso_parsing(['parsing']),
+                cancelamento=self.cancelamento,
+                filtro=self.filtro_arquivos,
+                pool=self.pool
+            )
+        if self.reaproveitar and not compactado:
+            # O digest usa as entradas que a leitura descobriu, sem varrer a pasta de novo
+            self._entradas_lidas = armazem.entradas
+        self.workers_efetivos = self.workers or config.POOL_WORKERS or workers_padrao(self.modo or config.POOL_MODO)
+        posicoes = armazem.filtrar(**self.filtros)
+        dados = armazem.dados(posicoes)
+        if self.agrupar == 'familia':
+            self.familias = {armazem.codigos[i]: armazem.valor('familia', i) for i in posicoes}
+        self.log(f"Processamento concluído. {len(posicoes)} de {len(armazem)} materiais atendem aos filtros")
+        self.metricas.registrar_estatisticas('parsing', armazem.estatisticas)
+        self.log_estatisticas(armazem.estatisticas)
+        return dados
+
+    def log_estatisticas(self, estatisticas):
+        """Resume as trocas de codificação e erros de leitura em uma única linha"""
+        self.estatisticas = dict(estatisticas)
+        if estatisticas['fallbacks'] or estatisticas['erros']:
+            self.log(
+                f"Trocas de codificação: {estatisticas['fallbacks']} | Arquivos com erro de leitura: {estatisticas['erros']}"
+            )
+
+    def gerar_saidas(self, dados, saidas=None):
+        """Gera o PDF (e as demais saídas pedidas) em uma única passada pelos dados"""
+        for formato, caminho in self.caminhos_saida.items():
+            self.log(f"Gerando {formato.upper()}: {caminho}")
+        (saidas or ConjuntoSaidas(self.caminhos_saida, self.processos_pdf, self.agrupamento())).escrever(
+            dados,
+            progresso=lambda feitos, total: self.progresso(self.metricas.percentual('saidas', feitos / total)),
+            cancelamento=self.cancelamento
+        )
+        self.progresso(100)
+        if 'pdf' in self.caminhos_saida:
+            self.log("PDF salvo com sucesso!")
+        else:
+            self.log("Arquivos salvos com sucesso!")
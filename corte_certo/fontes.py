@@ -0,0 +1,301 @@
+"""Origens dos arquivos INI: pastas e arquivos compactados (.zip/.rar).
+
+As pastas são percorridas com os.scandir (VarreduraPasta), com filtros de
+nome e pastas ignoradas. Os membros .ini dos compactados são lidos em
+memória e entregues ao parser, sem extração para diretório temporário e sem
+uma segunda varredura no disco.
+"""
+import fnmatch
+import os
+import re
+import subprocess
+import time
+import zipfile
+import zlib
+
+from . import config
+
+# Imports otimizados - carregados apenas quando necessário
+rarfile = None
+
+EXTENSOES_COMPACTADAS = ('.zip', '.rar')
+
+# Pastas com mtime mais recente que isto (em relação ao início da varredura) não vão para o índice
+JANELA_MTIME_NS = 2 * 10**9
+
+
+def eh_arquivo_compactado(caminho):
+    """Indica se o caminho aponta para um arquivo .zip ou .rar"""
+    return os.path.isfile(caminho) and caminho.lower().endswith(EXTENSOES_COMPACTADAS)
+
+
+class FiltroArquivos:
+    """Padrões de inclusão/exclusão de arquivos e pastas puladas na descoberta
+
+    Os padrões seguem o fnmatch (ex: 'M*.INI') e não diferenciam maiúsculas,
+    como no Windows. Sem argumentos, usa os valores do config.
+    """
+
+    def __init__(self, incluir=None, excluir=None, ignorar_pastas=None):
+        self.incluir = list(config.PADROES_INCLUIR if incluir is None else incluir) or ['*']
+        self.excluir = list(config.PADROES_EXCLUIR if excluir is None else excluir)
+        self.ignorar_pastas = list(config.PASTAS_IGNORADAS if ignorar_pastas is None else ignorar_pastas)
+        self._incluir = _compilar(self.incluir)
+        self._excluir = _compilar(self.excluir)
+        self._ignorar = _compilar(self.ignorar_pastas)
+        # Caso comum (só inclusão): o match da regex direto, sem chamada extra por arquivo
+        if self._excluir is None:
+            self.aceita_arquivo = self._incluir.match
+
+    def aceita_arquivo(self, nome):
+        return bool(self._incluir.match(nome)) and not (self._excluir and self._excluir.match(nome))
+
+    def aceita_pasta(self, nome):
+        return not (self._ignorar and self._ignorar.match(nome))
+
+    def aceita_membro(self, nome):
+        """Membro de ZIP/RAR: pastas do caminho interno e nome do arquivo"""
+        *pastas, arquivo = nome.replace('\\', '/').split('/')
+        return self.aceita_arquivo(arquivo) and all(self.aceita_pasta(pasta) for pasta in pastas if pasta)
+
+    def assinatura(self):
+        """Identifica os padrões; o índice de pastas só vale para a mesma assinatura"""
+        return '|'.join([','.join(self.incluir), ','.join(self.excluir), ','.join(self.ignorar_pastas)]).lower()
+
+
+def _compilar(padroes):
+    """Junta os padrões fnmatch em uma única regex (None se a lista estiver vazia)"""
+    if not padroes:
+        return None
+    return re.compile('|'.join(fnmatch.translate(padrao) for padrao in padroes), re.IGNORECASE)
+
+
+class VarreduraPasta:
+    """Descoberta dos INI com os.scandir, reaproveitando o stat de cada DirEntry
+
+    entradas() gera (caminho, tamanho, mtime_ns) de cada arquivo aceito pelo
+    filtro. Com um `indice` da varredura anterior (caminho relativo da pasta ->
+    (mtime_ns, arquivos, subpastas)), as pastas cujo mtime não mudou não são
+    listadas de novo: os nomes dos arquivos e subpastas vêm do índice. Ao
+    final, `indice_novo` tem o índice atualizado para a próxima execução.
+    Se a própria pasta não pôde ser lida (removida, compartilhamento fora do
+    ar), nada é gerado e `raiz_inacessivel` fica True.
+
+    O mtime de uma pasta muda quando arquivos são criados, apagados ou
+    renomeados nela, mas não quando um arquivo é regravado no lugar. Por
+    isso o índice só evita a listagem: cada arquivo de uma pasta reaproveitada
+    recebe um stat, e o tamanho e o mtime entregues (ao cache de parsing e ao
+    digest das saídas) são sempre os atuais, nunca os guardados no índice.
+    """
+
+    def __init__(self, pasta, filtro=None, indice=None):
+        self.pasta = os.path.abspath(pasta)
+        self.filtro = filtro or FiltroArquivos()
+        self.indice = indice
+        self.indice_novo = {}
+        self.pastas_listadas = 0
+        self.pastas_reaproveitadas = 0
+        self.raiz_inacessivel = False
+
+    def entradas(self):
+        # Pastas alteradas há menos de JANELA_MTIME_NS não entram no índice: uma
+        # alteração no mesmo "tique" do relógio passaria despercebida na próxima vez
+        limite_estavel = time.time_ns() - JANELA_MTIME_NS
+        aceita_arquivo = self.filtro.aceita_arquivo
+        aceita_pasta = self.filtro.aceita_pasta
+        try:
+            pilha = [('', os.stat(self.pasta).st_mtime_ns)]
+        except OSError:
+            self.raiz_inacessivel = True
+            return
+        while pilha:
+            relativo, mtime_ns = pilha.pop()
+            caminho_pasta = os.path.join(self.pasta, relativo) if relativo else self.pasta
+            anterior = self.indice.get(relativo) if self.indice else None
+
+            if anterior is not None and anterior[0] == mtime_ns:
+                self.pastas_reaproveitadas += 1
+                _, arquivos_anteriores, subpastas = anterior
+                arquivos = []
+                for nome, _, _ in arquivos_anteriores:
+                    caminho_arquivo = os.path.join(caminho_pasta, nome)
+                    try:
+                        info = os.stat(caminho_arquivo)
+                    except OSError:
+                        continue  # arquivo removido desde a varredura anterior
+                    arquivos.append((nome, info.st_size, info.st_mtime_ns))
+                    yield caminho_arquivo, info.st_size, info.st_mtime_ns
+                for nome in subpastas:
+                    caminho_sub = os.path.join(caminho_pasta, nome)
+                    try:
+                        pilha.append((os.path.join(relativo, nome), os.stat(caminho_sub).st_mtime_ns))
+                    except OSError:
+                        continue  # pasta removida desde a varredura anterior
+                self.indice_novo[relativo] = (mtime_ns, arquivos, subpastas)
+                continue
+
+            arquivos, subpastas = [], []
+            try:
+                with os.scandir(caminho_pasta) as iterador:
+                    for entrada in iterador:
+                        try:
+                            if entrada.is_dir(follow_symlinks=False):
+                                if aceita_pasta(entrada.name):
+                                    subpastas.append(entrada.name)
+                                    pilha.append((os.path.join(relativo, entrada.name), entrada.stat().st_mtime_ns))
+                            elif aceita_arquivo(entrada.name) and entrada.is_file():
+                                info = entrada.stat()
+                                arquivos.append((entrada.name, info.st_size, info.st_mtime_ns))
+                                yield entrada.path, info.st_size, info.st_mtime_ns
+                        except OSError:
+                            continue
+            except OSError:
+                if not relativo:
+                    self.raiz_inacessivel = True
+                continue  # sem permissão ou removida no meio da varredura (os.walk também ignora)
+            self.pastas_listadas += 1
+            if mtime_ns < limite_estavel:
+                self.indice_novo[relativo] = (mtime_ns, arquivos, subpastas)
+
+
+def listar_arquivos_ini(caminho_pasta, filtro=None):
+    """Encontra todos os arquivos INI na pasta (e subpastas)"""
+    return [caminho for caminho, _, _ in VarreduraPasta(caminho_pasta, filtro).entradas()]
+
+
+def itens_com_stat(arquivos):
+    """Converte caminhos em (caminho, tamanho, mtime_ns); -1 quando o stat falha"""
+    itens = []
+    for caminho_arquivo in arquivos:
+        try:
+            info = os.stat(caminho_arquivo)
+        except OSError:
+            itens.append((caminho_arquivo, -1, -1))
+            continue
+        itens.append((caminho_arquivo, info.st_size, info.st_mtime_ns))
+    return itens
+
+
+def carregar_rarfile():
+    """Importa o rarfile e configura o caminho do UnRAR em sistemas Windows"""
+    global rarfile
+    if rarfile is None:
+        import rarfile as modulo
+
+        if os.name == 'nt':
+            unrar_paths = [
+                r'C:\Program Files\WinRAR\UnRAR.exe',
+                r'C:\Program Files (x86)\WinRAR\UnRAR.exe',
+                os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'UnRAR.exe')
+            ]
+
+            for path in unrar_paths:
+                if os.path.exists(path):
+                    modulo.UNRAR_TOOL = path
+                    break
+        rarfile = modulo
+    return rarfile
+
+
+class FonteCompactada:
+    """Itera os membros .ini de um ZIP ou RAR como pares (nome, conteudo)
+
+    Os membros passam pelo mesmo FiltroArquivos da descoberta em pastas.
+
+    Uso:
+        with FonteCompactada(caminho) as fonte:
+            motor.processar_membros(fonte.membros(), fonte.total)
+    """
+
+    def __init__(self, caminho, filtro=None):
+        self.caminho = caminho
+        self.filtro = filtro or FiltroArquivos()
+        self.tipo = os.path.splitext(caminho)[1].lower()
+        if self.tipo not in EXTENSOES_COMPACTADAS:
+            raise ValueError(f"Formato de arquivo não suportado: {caminho}")
+        self._arquivo = None
+        self._infos = []
+        self.bytes_lidos = 0
+
+    def __enter__(self):
+        if self.tipo == '.zip':
+            self._arquivo = zipfile.ZipFile(self.caminho, 'r')
+            self._infos = [
+                i for i in self._arquivo.infolist() if not i.is_dir() and self.filtro.aceita_membro(i.filename)
+            ]
+        else:
+            self._arquivo = carregar_rarfile().RarFile(self.caminho, 'r')
+            self._infos = [i for i in self._arquivo.infolist() if not i.is_dir()]
+        return self
+
+    def __exit__(self, *exc):
+        if self._arquivo is not None:
+            self._arquivo.close()
+            self._arquivo = None
+        return False
+
+    @property
+    def total(self):
+        """Quantidade de membros .ini no arquivo"""
+        return sum(1 for i in self._infos if self.filtro.aceita_membro(i.filename))
+
+    def membros(self):
+        """Gera (nome, conteudo) para cada membro .ini, na ordem do arquivo"""
+        if self.tipo == '.zip':
+            for info in self._infos:
+                conteudo = self._arquivo.read(info)
+                self.bytes_lidos += len(conteudo)
+                yield info.filename, conteudo
+        else:
+            yield from self._membros_rar()
+
+    def _membros_rar(self):
+        """Lê o RAR em uma única chamada do UnRAR ('p' imprime todos os membros em sequência)
+
+        Se a ferramenta não estiver disponível ou a saída não bater com o CRC
+        dos membros, cai para a leitura membro a membro do rarfile.
+        """
+        entregues = 0
+        try:
+            for nome, conteudo in self._ler_rar_em_lote():
+                entregues += 1
+                yield nome, conteudo
+            return
+        except (OSError, ValueError):
+            pass
+
+        # Fallback: leitura individual (pulando o que já foi entregue)
+        for info in [i for i in self._infos if self.filtro.aceita_membro(i.filename)][entregues:]:
+            conteudo = self._arquivo.read(info)
+            self.bytes_lidos += len(conteudo)
+            yield info.filename, conteudo
+
+    def _ler_rar_em_lote(self):
+        comando = [rarfile.UNRAR_TOOL, 'p', '-inul', '-p-', self.caminho]
+        processo = subprocess.Popen(comando, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        try:
+            saida = processo.stdout
+            for info in self._infos:
+                conteudo = _ler_exato(saida, info.file_size)
+                if info.CRC is not None and zlib.crc32(conteudo) != info.CRC:
+                    raise ValueError(f"CRC divergente no membro {info.filename}")
+                if self.filtro.aceita_membro(info.filename):
+                    self.bytes_lidos += len(conteudo)
+                    yield info.filename, conteudo
+        finally:
+            processo.stdout.close()
+            processo.kill()
+            processo.wait()
+
+
+def _ler_exato(fluxo, tamanho):
+    """Lê exatamente `tamanho` bytes do fluxo (ValueError se terminar antes)"""
+    partes = []
+    faltam = tamanho
+    while faltam > 0:
+        parte = fluxo.read(faltam)
+        if not parte:
+            raise ValueError("Saída do UnRAR terminou antes do esperado")
+        partes.append(parte)
+        faltam -= len(parte)
+    return b''.join(partes)
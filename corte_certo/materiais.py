@@ -0,0 +1,302 @@
+"""Registro completo dos materiais (não só o CAMPO1) em um armazenamento colunar.
+
+Cada arquivo INI é lido uma única vez, extraindo o conjunto configurável de
+campos (seção/chave) em uma só passada. Os valores vão para colunas compactas
+(array do módulo padrão, com famílias codificadas por índice), o que permite
+filtrar e agrupar dezenas de milhares de materiais sem reler os arquivos.
+
+Os campos padrão são os mesmos que o corteCertoService.loadMaterial do bot lê.
+"""
+import os
+import posixpath
+import re
+from array import array
+from collections import namedtuple
+from functools import partial
+
+from . import config
+from .fontes import FonteCompactada, VarreduraPasta, eh_arquivo_compactado
+from .parser import MotorParsing, codigo_do_arquivo, extrator_do_processo, novas_estatisticas
+
+# Imports otimizados - carregados apenas quando necessário
+numpy = None
+
+# tipo: 'texto', 'categoria' (texto repetido, guardado por índice), 'int', 'float' ou 'bool'
+CampoINI = namedtuple('CampoINI', 'nome secao chave tipo padrao')
+
+CAMPOS_PADRAO = (
+    CampoINI('nome', 'DESC', 'CAMPO1', 'texto', ''),
+    CampoINI('familia', 'DESC', 'FAMILIA', 'categoria', ''),
+    CampoINI('espessura', 'PROP_FISIC', 'ESPESSURA', 'int', 0),
+    CampoINI('veio_horizontal', 'PROP_FISIC', 'VEIO_HORIZONTAL', 'bool', False),
+    CampoINI('veio_vertical', 'PROP_FISIC', 'VEIO_VERTICAL', 'bool', False),
+    CampoINI('giro', 'PROP_FISIC', 'GIRO', 'int', 0),
+    CampoINI('preco', 'PROP_COMERC', 'PRECO_CHAPA', 'float', 0.0),
+    CampoINI('qtd_min_chp', 'ESTOQUE', 'QTD_MIN_CHP', 'int', config.QTD_MIN_CHP),
+)
+
+_CODIGOS_ARRAY = {'int': 'q', 'float': 'd', 'bool': 'b'}
+
+_INTEIRO = re.compile(rb'[+-]?\d+')
+
+
+def _para_int(valor):
+    """Como o parseInt do JavaScript: aceita '18', '18.0' ou '18mm'; senão None"""
+    encontrado = _INTEIRO.match(valor)
+    return int(encontrado.group()) if encontrado else None
+
+
+def _para_float(valor):
+    try:
+        return float(valor.replace(b',', b'.'))
+    except ValueError:
+        return None
+
+
+def limpar_nome(nome):
+    """Mesma limpeza do CAMPO1 usada na lista: valor até o próximo '=' e sem 'MDF'"""
+    return nome.split('=', 1)[0].strip().replace("MDF", "").strip()
+
+
+def extrair_campos(conteudo, campos, decodificar):
+    """Extrai os campos do conteúdo de um INI em uma única passada pelas linhas
+
+    decodificar(valor_bytes) converte os valores de texto. Retorna a tupla de
+    valores na ordem de `campos` (com o padrão de cada campo quando ausente).
+    """
+    procurados = {(c.secao.encode('ascii'), c.chave.encode('ascii')): i for i, c in enumerate(campos)}
+    valores = [campo.padrao for campo in campos]
+    faltam = len(procurados)
+    secao = None
+
+    for linha in conteudo.splitlines():
+        linha = linha.strip()
+        if not linha:
+            continue
+        if linha[:1] == b'[' and linha[-1:] == b']':
+            secao = linha[1:-1]
+            continue
+        chave, separador, valor = linha.partition(b'=')
+        if not separador:
+            continue
+        indice = procurados.pop((secao, chave.strip()), None)
+        if indice is None:
+            continue
+
+        campo = campos[indice]
+        valor = valor.strip()
+        if campo.tipo in ('texto', 'categoria'):
+            convertido = decodificar(valor)
+        elif campo.tipo == 'int':
+            convertido = _para_int(valor)
+            # Como no bot: 0 ou inválido vira o padrão (ex: QTD_MIN_CHP)
+            convertido = convertido or campo.padrao
+        elif campo.tipo == 'float':
+            convertido = _para_float(valor)
+        else:
+            convertido = valor == b'1'
+        if convertido is not None:
+            valores[indice] = convertido
+
+        faltam -= 1
+        if not faltam:
+            break
+    return tuple(valores)
+
+
+def _decodificador(extrator, pasta, estatisticas):
+    def decodificar(valor):
+        texto, fallback = extrator.decodificar(valor, pasta)
+        if fallback:
+            estatisticas['fallbacks'] += 1
+        return texto or ''
+    return decodificar
+
+
+def _contabilizar_registro(estatisticas, campos, valores):
+    """Conta como extraído só o registro com nome (CAMPO1) que entra na lista, como em dados()"""
+    for campo, valor in zip(campos, valores):
+        if campo.nome == 'nome':
+            if not limpar_nome(valor):
+                estatisticas['sem_campo1'] += 1
+                return
+            break
+    estatisticas['extraidos'] += 1
+
+
+def processar_lote_materiais(caminhos, extrator=None, campos=CAMPOS_PADRAO):
+    """Lê um lote de arquivos INI e retorna ([(codigo, valores)], mensagens, estatisticas)"""
+    extrator = extrator or extrator_do_processo()
+    registros = []
+    mensagens = []
+    estatisticas = novas_estatisticas()
+    for caminho_arquivo in caminhos:
+        estatisticas['arquivos'] += 1
+        try:
+            with open(caminho_arquivo, 'rb') as arquivo:
+                conteudo = arquivo.read()
+        except OSError as e:
+            estatisticas['erros'] += 1
+            mensagens.append(f"Não foi possível ler o arquivo: {os.path.basename(caminho_arquivo)} | Erro: {e}")
+            continue
+        estatisticas['bytes_lidos'] += len(conteudo)
+        decodificar = _decodificador(extrator, os.path.dirname(caminho_arquivo), estatisticas)
+        valores = extrair_campos(conteudo, campos, decodificar)
+        registros.append((codigo_do_arquivo(caminho_arquivo), valores))
+        _contabilizar_registro(estatisticas, campos, valores)
+    return registros, mensagens, estatisticas
+
+
+def processar_lote_membros_materiais(membros, extrator=None, campos=CAMPOS_PADRAO):
+    """Mesmo que processar_lote_materiais, para membros (nome, conteudo) de ZIP/RAR"""
+    extrator = extrator or extrator_do_processo()
+    registros = []
+    estatisticas = novas_estatisticas()
+    for nome, conteudo in membros:
+        estatisticas['arquivos'] += 1
+        estatisticas['bytes_lidos'] += len(conteudo)
+        decodificar = _decodificador(extrator, posixpath.dirname(nome), estatisticas)
+        valores = extrair_campos(conteudo, campos, decodificar)
+        registros.append((codigo_do_arquivo(posixpath.basename(nome)), valores))
+        _contabilizar_registro(estatisticas, campos, valores)
+    return registros, [], estatisticas
+
+
+class ArmazemMateriais:
+    """Materiais em colunas compactas, uma coluna por campo configurado
+
+    Colunas numéricas e booleanas são array.array; colunas 'categoria' guardam
+    o índice do valor em self.categorias[nome]. O código do material fica em
+    self.codigos (mesma posição das colunas).
+    """
+
+    def __init__(self, campos=CAMPOS_PADRAO):
+        self.campos = tuple(campos)
+        self.codigos = []
+        self.colunas = {}
+        self.categorias = {}
+        self._indices_categoria = {}
+        self._posicao_codigo = None
+        self._booleanos = {campo.nome for campo in self.campos if campo.tipo == 'bool'}
+        self.estatisticas = novas_estatisticas()
+        for campo in self.campos:
+            if campo.tipo == 'texto':
+                self.colunas[campo.nome] = []
+            elif campo.tipo == 'categoria':
+                self.colunas[campo.nome] = array('I')
+                self.categorias[campo.nome] = []
+                self._indices_categoria[campo.nome] = {}
+            else:
+                self.colunas[campo.nome] = array(_CODIGOS_ARRAY[campo.tipo])
+
+    def __len__(self):
+        return len(self.codigos)
+
+    def adicionar(self, codigo, valores):
+        """Acrescenta um material (valores na ordem de self.campos)"""
+        self.codigos.append(codigo)
+        self._posicao_codigo = None
+        for campo, valor in zip(self.campos, valores):
+            if campo.tipo == 'categoria':
+                indices = self._indices_categoria[campo.nome]
+                indice = indices.get(valor)
+                if indice is None:
+                    indice = indices[valor] = len(self.categorias[campo.nome])
+                    self.categorias[campo.nome].append(valor)
+                self.colunas[campo.nome].append(indice)
+            else:
+                self.colunas[campo.nome].append(valor)
+
+    def valor(self, nome, indice):
+        """Valor do campo `nome` na posição `indice` (categorias já convertidas em texto)"""
+        valor = self.colunas[nome][indice]
+        if nome in self.categorias:
+            return self.categorias[nome][valor]
+        if nome in self._booleanos:
+            return bool(valor)
+        return valor
+
+    def registro(self, indice):
+        """Dicionário com todos os campos do material na posição `indice`"""
+        registro = {'codigo': self.codigos[indice]}
+        for campo in self.campos:
+            registro[campo.nome] = self.valor(campo.nome, indice)
+        return registro
+
+    def posicao(self, codigo):
+        """Posição do material pelo código (None se não existir)"""
+        if self._posicao_codigo is None:
+            self._posicao_codigo = {c: i for i, c in enumerate(self.codigos)}
+        return self._posicao_codigo.get(codigo)
+
+    def filtrar(self, **criterios):
+        """Posições dos materiais que atendem a todos os critérios (campo=valor)
+
+        Ex: armazem.filtrar(familia='MDF', espessura=18)
+        """
+        posicoes = range(len(self))
+        for nome, esperado in criterios.items():
+            if esperado is None:
+                continue
+            coluna = self.colunas[nome]
+            if nome in self.categorias:
+                esperado = self._indices_categoria[nome].get(esperado)
+                if esperado is None:
+                    return []
+            posicoes = [i for i in posicoes if coluna[i] == esperado]
+        return list(posicoes)
+
+    def agrupar(self, nome, posicoes=None):
+        """Agrupa as posições pelo valor do campo: {valor: [posições]}"""
+        coluna = self.colunas[nome]
+        grupos = {}
+        for i in (range(len(self)) if posicoes is None else posicoes):
+            grupos.setdefault(coluna[i], []).append(i)
+        if nome in self.categorias:
+            rotulos = self.categorias[nome]
+            return {rotulos[chave]: valores for chave, valores in grupos.items()}
+        return grupos
+
+    def dados(self, posicoes=None):
+        """Pares (campo1, codigo) no formato da lista de materiais, sem nomes vazios"""
+        nomes = self.colunas['nome']
+        dados = []
+        for i in (range(len(self)) if posicoes is None else posicoes):
+            nome = limpar_nome(nomes[i])
+            if nome:
+                dados.append((nome, self.codigos[i]))
+        return dados
+
+    def coluna_numpy(self, nome):
+        """Coluna numérica como array NumPy sem cópia (NumPy carregado sob demanda)"""
+        global numpy
+        if numpy is None:
+            import numpy
+        return numpy.frombuffer(self.colunas[nome], dtype=self.colunas[nome].typecode)
+
+
+def carregar_materiais(origem, campos=CAMPOS_PADRAO, workers=None, modo=None, log=None, progresso=None,
+                       cancelamento=None, filtro=None, pool=None):
+    """Lê todos os INI da pasta ou arquivo compactado para um ArmazemMateriais
+
+    Para uma pasta, armazem.entradas fica com os (caminho, tamanho,
+    mtime_ns) da descoberta, antes da leitura (None para ZIP/RAR).
+    """
+    motor = MotorParsing(workers=workers, modo=modo, cancelamento=cancelamento, pool=pool)
+    campos = tuple(campos)
+    entradas = None
+    if eh_arquivo_compactado(origem):
+        with FonteCompactada(origem, filtro) as fonte:
+            registros = motor.mapear(partial(processar_lote_membros_materiais, campos=campos),
+                                     fonte.membros(), fonte.total, progresso, log)
+    else:
+        entradas = list(VarreduraPasta(origem, filtro).entradas())
+        registros = motor.mapear(partial(processar_lote_materiais, campos=campos),
+                                 [caminho for caminho, _, _ in entradas], len(entradas), progresso, log)
+
+    armazem = ArmazemMateriais(campos)
+    for codigo, valores in registros:
+        armazem.adicionar(codigo, valores)
+    armazem.estatisticas = motor.estatisticas
+    armazem.entradas = entradas
+    return armazem
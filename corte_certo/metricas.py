@@ -0,0 +1,204 @@
+"""Métricas por etapa da exportação e divisão da barra de progresso.
+
+Cada etapa (descoberta, extração, parsing, ordenação, saídas) registra
+tempo de parede, arquivos, bytes lidos, trocas de codificação e acertos de
+cache. Ao final, o resumo vai para o log e para um JSON ao lado do PDF
+(lista_materiais.metricas.json).
+
+A barra de progresso é dividida entre as etapas pelo tempo que cada uma
+levou na execução anterior (lido desse mesmo JSON); sem histórico, usa
+PESOS_PADRAO.
+"""
+import json
+import os
+import time
+from contextlib import contextmanager
+
+SUFIXO_METRICAS = '.metricas.json'
+SUFIXO_PERFIL = '.perfil'
+
+# Participação de cada etapa na barra de progresso quando não há execução anterior
+PESOS_PADRAO = {'descoberta': 5, 'extracao': 30, 'parsing': 45, 'ordenacao': 5, 'saidas': 15}
+
+# Contadores do MotorParsing copiados para as métricas da etapa
+_CAMPOS_ESTATISTICAS = ('fallbacks', 'erros', 'cache_hits', 'cache_misses')
+
+
+def caminho_metricas(caminho_saida):
+    """JSON de métricas ao lado da saída: lista_materiais.pdf -> lista_materiais.metricas.json"""
+    return os.path.splitext(caminho_saida)[0] + SUFIXO_METRICAS
+
+
+def carregar_metricas(caminho_json):
+    """Conteúdo do JSON de métricas da execução anterior (None se não existir ou for inválido)"""
+    try:
+        with open(caminho_json, encoding='utf-8') as arquivo:
+            dados = json.load(arquivo)
+    except (OSError, ValueError):
+        return None
+    return dados if isinstance(dados, dict) else None
+
+
+def pesos_anteriores(anteriores):
+    """Tempo de cada etapa na execução anterior (None se não houver histórico válido)"""
+    try:
+        etapas = anteriores.get('etapas', {})
+        pesos = {nome: float(etapa['segundos']) for nome, etapa in etapas.items()}
+    except (ValueError, KeyError, TypeError, AttributeError):
+        return None
+    if sum(pesos.values()) <= 0:
+        return None
+    return pesos
+
+
+def contagem_anterior(anteriores, etapa, campo='arquivos'):
+    """Contagem registrada numa etapa da execução anterior (0 se não houver)
+
+    Serve de estimativa de total enquanto a descoberta ainda está andando.
+    """
+    try:
+        return int(anteriores['etapas'][etapa].get(campo, 0))
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return 0
+
+
+class MetricasExecucao:
+    """Acumula as métricas das etapas e converte o avanço de cada uma em percentual geral
+
+    Uso:
+        metricas = MetricasExecucao(['descoberta', 'parsing', 'ordenacao', 'saidas'])
+        with metricas.etapa('parsing') as registro:
+            ...
+            registro['arquivos'] = 1000
+        progresso(metricas.percentual('parsing', 0.5))
+    """
+
+    def __init__(self, ordem, pesos=None):
+        self.ordem = list(ordem)
+        self.etapas = {}
+        self.inicio = time.perf_counter()
+        self.pesos = {}
+        self.definir_ordem(self.ordem, pesos)
+
+    def definir_ordem(self, ordem, pesos=None):
+        """Etapas previstas (na ordem) e seus pesos; etapas sem peso usam PESOS_PADRAO"""
+        self.ordem = list(ordem)
+        pesos = pesos or {}
+        self.pesos = {}
+        for nome in self.ordem:
+            peso = pesos.get(nome)
+            if peso is None or peso <= 0:
+                peso = PESOS_PADRAO.get(nome, 1) * (sum(pesos.values()) / 100 if pesos else 1)
+            self.pesos[nome] = max(peso, 1e-6)
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o tempo de parede da etapa; o dicionário recebe os demais valores"""
+        registro = self.etapas.setdefault(nome, {'segundos': 0.0})
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['segundos'] += time.perf_counter() - inicio
+
+    def registrar(self, nome, **valores):
+        """Acrescenta valores a uma etapa (segundos são somados aos já medidos)"""
+        registro = self.etapas.setdefault(nome, {'segundos': 0.0})
+        segundos = valores.pop('segundos', None)
+        if segundos is not None:
+            registro['segundos'] += segundos
+        registro.update(valores)
+        return registro
+
+    def registrar_estatisticas(self, nome, estatisticas):
+        """Copia os contadores do MotorParsing (arquivos, bytes, fallbacks, cache) para a etapa"""
+        registro = self.etapas.setdefault(nome, {'segundos': 0.0})
+        registro['arquivos'] = estatisticas.get('arquivos', 0)
+        registro['bytes'] = estatisticas.get('bytes_lidos', 0)
+        for campo in _CAMPOS_ESTATISTICAS:
+            registro[campo] = estatisticas.get(campo, 0)
+        return registro
+
+    def percentual(self, nome, fracao=1.0):
+        """Percentual geral (0-100) com a etapa `nome` na fração informada"""
+        total = sum(self.pesos.values())
+        anteriores = 0.0
+        for etapa in self.ordem:
+            if etapa == nome:
+                break
+            anteriores += self.pesos[etapa]
+        else:
+            return 0
+        atual = self.pesos[nome] * min(max(fracao, 0.0), 1.0)
+        return min(100, int((anteriores + atual) / total * 100))
+
+    def percentual_conjunto(self, nomes, fracao):
+        """Percentual geral para etapas que acontecem intercaladas (ex: extração + parsing)"""
+        inicio = self.percentual(nomes[0], 0.0)
+        fim = self.percentual(nomes[-1], 1.0)
+        return inicio + int((fim - inicio) * min(max(fracao, 0.0), 1.0))
+
+    def como_dict(self):
+        """Métricas finais, com vazão calculada por etapa"""
+        etapas = {}
+        for nome, registro in self.etapas.items():
+            registro = dict(registro)
+            segundos = registro['segundos']
+            registro['segundos'] = round(segundos, 4)
+            for contagem in ('arquivos', 'materiais'):
+                if registro.get(contagem) and segundos > 0:
+                    registro[f'{contagem}_por_s'] = round(registro[contagem] / segundos, 1)
+            if registro.get('bytes') and segundos > 0:
+                registro['mb_por_s'] = round(registro['bytes'] / 1024 / 1024 / segundos, 2)
+            etapas[nome] = registro
+        return {
+            'total_segundos': round(time.perf_counter() - self.inicio, 4),
+            'etapas': etapas,
+        }
+
+    def linhas_resumo(self):
+        """Resumo legível, uma linha por etapa, para o log"""
+        dados = self.como_dict()
+        linhas = [f"Métricas ({dados['total_segundos']:.2f}s no total):"]
+        for nome, registro in dados['etapas'].items():
+            partes = [f"{nome}: {registro['segundos']:.2f}s"]
+            for contagem in ('arquivos', 'materiais'):
+                if registro.get(contagem):
+                    vazao = registro.get(f'{contagem}_por_s')
+                    partes.append(f"{registro[contagem]} {contagem}" + (f" ({vazao:.0f}/s)" if vazao else ''))
+            if registro.get('pastas_reaproveitadas'):
+                partes.append(f"{registro['pastas_listadas']} pastas listadas, "
+                              f"{registro['pastas_reaproveitadas']} do índice")
+            if registro.get('bytes'):
+                partes.append(f"{registro['bytes'] / 1024 / 1024:.1f} MB lidos")
+            if registro.get('fallbacks'):
+                partes.append(f"{registro['fallbacks']} trocas de codificação")
+            if registro.get('cache_hits') or registro.get('cache_misses'):
+                partes.append(f"cache {registro['cache_hits']}/{registro['cache_hits'] + registro['cache_misses']}")
+            linhas.append("  " + " | ".join(partes))
+        return linhas
+
+    def salvar(self, caminho_json, extras=None):
+        """Grava o JSON de métricas (extras entram no nível de cima: origem, versão...)"""
+        dados = dict(extras or {})
+        dados.update(self.como_dict())
+        with open(caminho_json, 'w', encoding='utf-8') as arquivo:
+            json.dump(dados, arquivo, ensure_ascii=False, indent=2)
+        return caminho_json
+
+
+def medir_geracao(gerador, registro):
+    """Repassa os itens do gerador somando em registro['segundos'] o tempo gasto dentro dele
+
+    Usado na leitura de ZIP/RAR, em que extração e parsing acontecem intercalados.
+    """
+    iterador = iter(gerador)
+    while True:
+        inicio = time.perf_counter()
+        try:
+            item = next(iterador)
+        except StopIteration:
+            registro['segundos'] += time.perf_counter() - inicio
+            return
+        registro['segundos'] += time.perf_counter() - inicio
+        yield item
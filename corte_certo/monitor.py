@@ -0,0 +1,287 @@
+"""Modo watch: mantém a lista de materiais em memória e regenera o PDF quando a pasta muda.
+
+Usa o watchdog (inotify no Linux, ReadDirectoryChangesW no Windows) quando
+estiver instalado; caso contrário, faz polling com os.scandir comparando
+tamanho e mtime. Rajadas de alterações são agrupadas em uma única atualização
+e apenas os arquivos INI afetados são lidos de novo.
+"""
+import os
+import threading
+import time
+
+from . import config
+from .cache import CacheParsing
+from .exportacao import ChavesNaturais
+from .fontes import FiltroArquivos, VarreduraPasta
+from .parser import MotorParsing, codigo_do_arquivo
+from .saidas import escrever_saidas
+
+# Imports otimizados - carregados apenas quando necessário
+watchdog_observers = None
+
+
+def varrer_pasta(caminho_pasta, filtro=None):
+    """Lista os INI da pasta com (tamanho, mtime_ns), usando o stat do próprio scandir
+
+    Retorna None se a pasta estava inacessível no início ou no fim da
+    varredura (ex: compartilhamento de rede fora do ar): uma listagem vazia
+    ou parcial não pode ser confundida com arquivos apagados.
+    """
+    varredura = VarreduraPasta(caminho_pasta, filtro)
+    atual = {caminho: (tamanho, mtime_ns) for caminho, tamanho, mtime_ns in varredura.entradas()}
+    if varredura.raiz_inacessivel or not os.path.isdir(caminho_pasta):
+        return None
+    return atual
+
+
+def _carregar_watchdog():
+    """Importa o watchdog se estiver instalado (retorna False caso contrário)"""
+    global watchdog_observers
+    if watchdog_observers is None:
+        try:
+            import watchdog.observers as modulo
+            watchdog_observers = modulo
+        except ImportError:
+            watchdog_observers = False
+    return watchdog_observers
+
+
+class MonitorPasta:
+    """Acompanha uma pasta de materiais e regenera o PDF a cada mudança
+
+    self.registros guarda caminho -> (tamanho, mtime_ns, campo1) de todos os
+    INI da pasta, então a regeneração não precisa varrer nem ler a pasta de novo.
+    """
+
+    def __init__(self, pasta, caminho_pdf, workers=None, modo=None, usar_cache=True,
+                 intervalo=None, debounce=None, usar_watchdog=True, log=None, filtro=None):
+        self.pasta = os.path.abspath(pasta)
+        self.filtro = filtro or FiltroArquivos()
+        self.caminho_pdf = caminho_pdf
+        self.motor = MotorParsing(workers=workers, modo=modo)
+        self.usar_cache = usar_cache
+        self.intervalo = intervalo if intervalo is not None else config.WATCH_INTERVALO
+        self.debounce = debounce if debounce is not None else config.WATCH_DEBOUNCE
+        self.usar_watchdog = usar_watchdog
+        self.log = log or (lambda mensagem: None)
+        self.registros = {}
+        self.backend = None
+        self._cache = None
+        self._pendentes = set()
+        self._varredura_completa = False
+        self._trava = threading.Lock()
+        self._evento = threading.Event()
+        self._parar = threading.Event()
+        self._observador = None
+        self._chaves = None
+
+    # ----- estado em memória -----
+
+    def carregar(self):
+        """Leitura inicial completa (aproveitando o cache incremental, se houver)"""
+        if self.usar_cache and self._cache is None:
+            self._cache = CacheParsing.para_pasta(self.pasta)
+
+        entradas = list(VarreduraPasta(self.pasta, self.filtro).entradas())
+        if self._cache:
+            conhecidos, pendentes = self._cache.classificar(entradas)
+            self._cache.concluir_varredura()
+        else:
+            conhecidos, pendentes = {}, entradas
+
+        self.registros = dict(conhecidos)
+        self.ler_itens(pendentes)
+        self.log(f"Carregados {len(self.registros)} arquivos INI ({len(pendentes)} lidos do disco)")
+
+    def dados(self):
+        """Pares (campo1, codigo) de todos os materiais em memória"""
+        return [
+            (campo1, codigo_do_arquivo(caminho))
+            for caminho, (_, _, campo1) in self.registros.items()
+            if campo1
+        ]
+
+    def aplicar_mudancas(self, caminhos):
+        """Relê apenas os arquivos alterados; retorna True se algo mudou"""
+        itens = []
+        removidos = []
+        for caminho in caminhos:
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                if caminho in self.registros:
+                    removidos.append(caminho)
+                continue
+            except OSError:
+                continue
+            registro = self.registros.get(caminho)
+            if registro and registro[0] == info.st_size and registro[1] == info.st_mtime_ns:
+                continue
+            itens.append((caminho, info.st_size, info.st_mtime_ns))
+
+        if removidos and not os.path.isdir(self.pasta):
+            # A pasta inteira sumiu: queda da rede, não arquivos apagados
+            self.log(f"Pasta inacessível, remoções ignoradas: {self.pasta}")
+            removidos = []
+        for caminho in removidos:
+            del self.registros[caminho]
+        if removidos and self._cache:
+            self._cache.remover(removidos)
+        if itens:
+            self.ler_itens(itens)
+
+        if itens or removidos:
+            self.log(f"Alterações aplicadas: {len(itens)} lidos, {len(removidos)} removidos")
+        return bool(itens or removidos)
+
+    def ler_itens(self, itens):
+        """Lê os (caminho, tamanho, mtime_ns) e guarda os registros em memória"""
+        lido_ns = time.time_ns()
+        self._aplicar_registros(self.motor.ler_registros(itens, log=self.log), lido_ns)
+
+    def _aplicar_registros(self, registros, lido_ns):
+        for caminho, tamanho, mtime_ns, _, campo1 in registros:
+            if tamanho >= 0:
+                self.registros[caminho] = (tamanho, mtime_ns, campo1)
+        if self._cache and registros:
+            self._cache.gravar(registros, lido_ns)
+
+    def _diferencas_varredura(self):
+        """Compara uma varredura completa com o estado em memória (nada muda se a pasta estiver inacessível)"""
+        atual = varrer_pasta(self.pasta, self.filtro)
+        if atual is None:
+            self.log(f"Pasta inacessível, varredura ignorada: {self.pasta}")
+            return set()
+        mudados = {c for c, (t, m) in atual.items() if self.registros.get(c, (None, None))[:2] != (t, m)}
+        mudados.update(c for c in self.registros if c not in atual)
+        return mudados
+
+    def regenerar(self):
+        """Gera o PDF a partir dos dados em memória (num temporário que substitui o anterior)"""
+        inicio = time.perf_counter()
+        # As chaves do natsort ficam guardadas: só as dos materiais alterados são calculadas de novo
+        if self._chaves is None:
+            self._chaves = ChavesNaturais()
+        dados_ordenados = self._chaves.ordenar(self.dados())
+        escrever_saidas(dados_ordenados, {'pdf': self.caminho_pdf})
+        duracao = time.perf_counter() - inicio
+        self.log(f"PDF atualizado: {self.caminho_pdf} ({len(dados_ordenados)} materiais em {duracao:.2f}s)")
+        return {'saida': self.caminho_pdf, 'materiais': len(dados_ordenados), 'tempo_pdf': round(duracao, 4)}
+
+    # ----- fontes de eventos -----
+
+    def _aceita(self, caminho):
+        """Aplica o filtro da descoberta a um caminho recebido do watchdog"""
+        return self.filtro.aceita_membro(os.path.relpath(caminho, self.pasta))
+
+    def _sinalizar(self, caminhos=(), varredura_completa=False):
+        with self._trava:
+            self._pendentes.update(caminhos)
+            self._varredura_completa = self._varredura_completa or varredura_completa
+        self._evento.set()
+
+    def _retirar_pendentes(self):
+        with self._trava:
+            caminhos, self._pendentes = self._pendentes, set()
+            completa, self._varredura_completa = self._varredura_completa, False
+        return caminhos, completa
+
+    def _iniciar_watchdog(self):
+        observers = _carregar_watchdog() if self.usar_watchdog else False
+        if not observers:
+            return False
+
+        from watchdog.events import FileSystemEventHandler
+        monitor = self
+
+        class _Handler(FileSystemEventHandler):
+            def on_any_event(self, evento):
+                if evento.event_type in ('opened', 'closed_no_write'):
+                    return
+                if evento.is_directory:
+                    # Pasta movida/removida: mais simples conferir a árvore toda
+                    if evento.event_type in ('moved', 'deleted'):
+                        monitor._sinalizar(varredura_completa=True)
+                    return
+                caminhos = [evento.src_path, getattr(evento, 'dest_path', '')]
+                caminhos = [os.fsdecode(c) for c in caminhos if c]
+                caminhos = [c for c in caminhos if monitor._aceita(c)]
+                if caminhos:
+                    monitor._sinalizar(caminhos)
+
+        self._observador = observers.Observer()
+        self._observador.schedule(_Handler(), self.pasta, recursive=True)
+        self._observador.start()
+        self.backend = 'watchdog'
+        return True
+
+    def _loop_polling(self, anterior):
+        # Roda em outra thread: compara varreduras entre si, sem tocar em self.registros
+        while not self._parar.wait(self.intervalo):
+            atual = varrer_pasta(self.pasta, self.filtro)
+            if atual is None:
+                # Pasta fora do ar: compara com a última varredura boa quando ela voltar
+                continue
+            mudados = {c for c, estado in atual.items() if anterior.get(c) != estado}
+            mudados.update(c for c in anterior if c not in atual)
+            anterior = atual
+            if mudados:
+                self._sinalizar(mudados)
+
+    # ----- laço principal -----
+
+    def iniciar(self, ao_atualizar=None):
+        """Carrega a pasta, gera o PDF e liga o watchdog (ou o polling)"""
+        self.carregar()
+        resultado = self.regenerar()
+        if ao_atualizar:
+            ao_atualizar(resultado)
+
+        if not self._iniciar_watchdog():
+            self.backend = 'polling'
+            estado_inicial = {c: (t, m) for c, (t, m, _) in self.registros.items()}
+            threading.Thread(target=self._loop_polling, args=(estado_inicial,),
+                             name='corte-certo-polling', daemon=True).start()
+        self.log(f"Monitorando {self.pasta} ({self.backend})")
+
+    def executar(self, ao_atualizar=None):
+        """Carrega a pasta, gera o PDF e fica aguardando mudanças até parar()"""
+        self.iniciar(ao_atualizar)
+        self.acompanhar(ao_atualizar)
+
+    def acompanhar(self, ao_atualizar=None):
+        """Aplica as mudanças sinalizadas e regenera, até parar(); fecha o monitor no fim"""
+        try:
+            while not self._parar.is_set():
+                if not self._evento.wait(timeout=0.5):
+                    continue
+                # Aguarda a rajada de alterações terminar antes de atualizar
+                while True:
+                    self._evento.clear()
+                    if self._parar.wait(self.debounce):
+                        return
+                    if not self._evento.is_set():
+                        break
+
+                caminhos, completa = self._retirar_pendentes()
+                if completa:
+                    caminhos |= self._diferencas_varredura()
+                if self.aplicar_mudancas(caminhos):
+                    resultado = self.regenerar()
+                    if ao_atualizar:
+                        ao_atualizar(resultado)
+        finally:
+            self.fechar()
+
+    def parar(self):
+        self._parar.set()
+        self._evento.set()
+
+    def fechar(self):
+        if self._observador is not None:
+            self._observador.stop()
+            self._observador.join()
+            self._observador = None
+        if self._cache is not None:
+            self._cache.fechar()
+            self._cache = None
@@ -0,0 +1,459 @@
+"""Extração do CAMPO1 dos arquivos INI e motor de parsing paralelo.
+
+As funções deste módulo ficam no nível do módulo (e não dentro do
+ProcessWorker) para que possam ser enviadas a um pool de processos.
+"""
+import itertools
+import os
+import posixpath
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from . import config
+from .cache import hash_conteudo
+from .fontes import itens_com_stat
+from .pipeline import INTERVALO_CANCELAMENTO, Cancelamento
+
+# A Latin-1 aceita qualquer byte: fica por último, só para os cinco bytes que o
+# cp1252 não define (antes dela, o cp1252 nunca seria tentado)
+CODIFICACOES = ['utf-8', 'cp1252', 'latin-1']
+ULTIMO_RECURSO = CODIFICACOES[-1]
+
+CHAVE_CAMPO1 = b'CAMPO1='
+
+# Quantidade lida na primeira tentativa; o CAMPO1 fica na seção [DESC], no topo do arquivo
+LEITURA_INICIAL = 4096
+
+# Sequência multibyte típica de UTF-8 (ex: 'ç' = C3 A7). Codificações de 1 byte
+# aceitam (quase) qualquer sequência, então é isso que denuncia um arquivo UTF-8
+# numa pasta que até então era cp1252.
+_UTF8_MULTIBYTE = re.compile(rb'[\xc2-\xf4][\x80-\xbf]')
+
+
+def localizar_campo1(conteudo, completo=True):
+    """Localiza o valor bruto (bytes) da primeira linha CAMPO1= do conteúdo
+
+    Retorna None se a linha não existir. Com completo=False, retorna None
+    também quando a linha pode ter sido cortada no fim do buffer.
+    """
+    inicio = 0
+    while True:
+        posicao = conteudo.find(CHAVE_CAMPO1, inicio)
+        if posicao < 0:
+            return None
+        # A chave só vale no início da linha
+        if posicao == 0 or conteudo[posicao - 1] in b'\r\n':
+            break
+        inicio = posicao + 1
+
+    inicio_valor = posicao + len(CHAVE_CAMPO1)
+    fim = len(conteudo)
+    for separador in (b'\n', b'\r'):
+        indice = conteudo.find(separador, inicio_valor, fim)
+        if indice >= 0:
+            fim = indice
+    if fim == len(conteudo) and not completo:
+        return None
+    # Mesmo comportamento de linha.split('=')[1]: o valor termina no próximo '='
+    return conteudo[inicio_valor:fim].split(b'=', 1)[0]
+
+
+class ExtratorCampo1:
+    """Lê o CAMPO1 dos arquivos INI em uma única passada em bytes
+
+    Só o valor do CAMPO1 é decodificado. A codificação detectada é lembrada
+    por pasta, e as trocas de codificação são apenas contadas (sem log por arquivo).
+    """
+
+    def __init__(self):
+        self.codificacao_pasta = {}
+
+    def ler_valor(self, caminho_arquivo):
+        """Lê o arquivo uma única vez e devolve (valor bruto do CAMPO1, bytes lidos)"""
+        with open(caminho_arquivo, 'rb') as arquivo:
+            conteudo = arquivo.read(LEITURA_INICIAL)
+            if len(conteudo) < LEITURA_INICIAL:
+                return localizar_campo1(conteudo), len(conteudo)
+            valor = localizar_campo1(conteudo, completo=False)
+            if valor is not None:
+                return valor, len(conteudo)
+            conteudo += arquivo.read()
+            return localizar_campo1(conteudo), len(conteudo)
+
+    def decodificar(self, valor, pasta):
+        """Decodifica o valor e retorna (texto, houve_fallback)"""
+        if valor.isascii():
+            return valor.decode('ascii'), False
+
+        preferida = self.codificacao_pasta.get(pasta, CODIFICACOES[0])
+        if preferida != 'utf-8' and _UTF8_MULTIBYTE.search(valor):
+            preferida = 'utf-8'
+        candidatas = [preferida] + [c for c in CODIFICACOES if c != preferida]
+
+        for indice, codificacao in enumerate(candidatas):
+            try:
+                texto = valor.decode(codificacao)
+            except UnicodeDecodeError:
+                continue
+            fallback = indice > 0 or codificacao != self.codificacao_pasta.get(pasta, codificacao)
+            # O último recurso não vira a codificação da pasta: os próximos arquivos tentam o cp1252 antes
+            if codificacao != ULTIMO_RECURSO:
+                self.codificacao_pasta[pasta] = codificacao
+            return texto, fallback
+        return None, True
+
+    def extrair(self, caminho_arquivo):
+        """Extrai o CAMPO1 (já limpo) e retorna (campo1, houve_fallback, bytes_lidos)
+
+        Erros de leitura (OSError) são propagados para o chamador.
+        """
+        valor, lidos = self.ler_valor(caminho_arquivo)
+        return self._finalizar(valor, os.path.dirname(caminho_arquivo)) + (lidos,)
+
+    def extrair_conteudo(self, conteudo, pasta=''):
+        """Extrai o CAMPO1 de um conteúdo já carregado em memória (ex: membro de ZIP/RAR)"""
+        return self._finalizar(localizar_campo1(conteudo), pasta)
+
+    def _finalizar(self, valor, pasta):
+        if valor is None:
+            return None, False
+        texto, fallback = self.decodificar(valor, pasta)
+        if texto is None:
+            return None, fallback
+        campo1 = texto.strip().replace("MDF", "").strip()  # Remove "MDF" e espaços em branco
+        return campo1, fallback
+
+
+# Extrator do processo atual (cada processo do pool mantém a sua memória de codificações)
+_extrator_processo = None
+
+
+def extrair_dados_arquivo_ini(caminho_arquivo):
+    """Extrai o CAMPO1 de um arquivo INI (atalho sem estatísticas)"""
+    try:
+        return extrator_do_processo().extrair(caminho_arquivo)[0]
+    except OSError:
+        return None
+
+
+def codigo_do_arquivo(caminho_arquivo):
+    """Obtém o código do material a partir do nome do arquivo (M259.INI -> 259)"""
+    nome_arquivo = os.path.basename(caminho_arquivo)
+    return os.path.splitext(nome_arquivo)[0].replace("M", "")  # Remove o 'M' do nome do arquivo
+
+
+def novas_estatisticas():
+    """Contadores agregados da extração"""
+    return {
+        'arquivos': 0, 'extraidos': 0, 'sem_campo1': 0, 'fallbacks': 0, 'erros': 0,
+        'cache_hits': 0, 'cache_misses': 0, 'bytes_lidos': 0,
+    }
+
+
+def extrator_do_processo():
+    """Extrator do processo atual, criado na primeira chamada"""
+    global _extrator_processo
+    if _extrator_processo is None:
+        _extrator_processo = ExtratorCampo1()
+    return _extrator_processo
+
+
+def processar_lote(caminhos, extrator=None):
+    """Processa um lote de arquivos INI
+
+    Retorna (dados, mensagens, estatisticas) com os pares (campo1, codigo)
+    na mesma ordem dos caminhos recebidos.
+    """
+    extrator = extrator or extrator_do_processo()
+    dados = []
+    mensagens = []
+    estatisticas = novas_estatisticas()
+    for caminho_arquivo in caminhos:
+        estatisticas['arquivos'] += 1
+        try:
+            campo1, fallback, lidos = extrator.extrair(caminho_arquivo)
+        except OSError as e:
+            estatisticas['erros'] += 1
+            mensagens.append(f"Não foi possível ler o arquivo: {os.path.basename(caminho_arquivo)} | Erro: {e}")
+            continue
+        estatisticas['bytes_lidos'] += lidos
+        _contabilizar(dados, estatisticas, campo1, fallback, caminho_arquivo)
+    return dados, mensagens, estatisticas
+
+
+def processar_lote_membros(membros, extrator=None):
+    """Processa um lote de membros (nome, conteudo) lidos de um arquivo compactado
+
+    Mesmo retorno de processar_lote; nada é lido do disco.
+    """
+    extrator = extrator or extrator_do_processo()
+    dados = []
+    estatisticas = novas_estatisticas()
+    for nome, conteudo in membros:
+        estatisticas['arquivos'] += 1
+        estatisticas['bytes_lidos'] += len(conteudo)
+        campo1, fallback = extrator.extrair_conteudo(conteudo, posixpath.dirname(nome))
+        _contabilizar(dados, estatisticas, campo1, fallback, posixpath.basename(nome))
+    return dados, [], estatisticas
+
+
+def processar_lote_registros(itens, extrator=None):
+    """Processa (caminho, tamanho, mtime_ns) lendo o arquivo inteiro para o cache
+
+    Retorna (registros, mensagens, estatisticas), com registros no formato
+    (caminho, tamanho, mtime_ns, hash, campo1) esperado por CacheParsing.gravar.
+    """
+    extrator = extrator or extrator_do_processo()
+    registros = []
+    mensagens = []
+    estatisticas = novas_estatisticas()
+    for caminho_arquivo, tamanho, mtime_ns in itens:
+        estatisticas['arquivos'] += 1
+        try:
+            with open(caminho_arquivo, 'rb') as arquivo:
+                conteudo = arquivo.read()
+        except OSError as e:
+            estatisticas['erros'] += 1
+            mensagens.append(f"Não foi possível ler o arquivo: {os.path.basename(caminho_arquivo)} | Erro: {e}")
+            continue
+        estatisticas['bytes_lidos'] += len(conteudo)
+        campo1, fallback = extrator.extrair_conteudo(conteudo, os.path.dirname(caminho_arquivo))
+        _contabilizar([], estatisticas, campo1, fallback, caminho_arquivo)
+        registros.append((caminho_arquivo, tamanho, mtime_ns, hash_conteudo(conteudo), campo1 or None))
+    return registros, mensagens, estatisticas
+
+
+def _contabilizar(dados, estatisticas, campo1, fallback, caminho_arquivo):
+    if fallback:
+        estatisticas['fallbacks'] += 1
+    if campo1:
+        estatisticas['extraidos'] += 1
+        dados.append((campo1, codigo_do_arquivo(caminho_arquivo)))  # (nome do material, código)
+    else:
+        estatisticas['sem_campo1'] += 1
+
+
+def _em_lotes(itens, tamanho):
+    """Agrupa um iterável (inclusive um gerador) em listas de até `tamanho` itens"""
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def workers_padrao(modo):
+    """Quantidade padrão de workers para o modo de pool informado"""
+    cpus = os.cpu_count() or 1
+    if modo == 'process':
+        return cpus
+    # Threads passam a maior parte do tempo esperando I/O (principalmente em rede)
+    return min(32, cpus + 4)
+
+
+def criar_pool(modo, workers):
+    """Pool de threads ou processos com `workers` workers"""
+    if modo == 'process':
+        return ProcessPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers)
+
+
+class MotorParsing:
+    """Distribui os arquivos INI em lotes para um pool de threads ou processos
+
+    O resultado é sempre mesclado na ordem original dos arquivos, independente
+    da ordem em que os lotes terminam.
+
+    Com `pool`, usa um pool já criado (compartilhado entre vários motores,
+    como nos trabalhos em lote) em vez de subir e encerrar um próprio; ele
+    precisa ser do mesmo modo e ter `workers` workers.
+    """
+
+    def __init__(self, workers=None, modo=None, tamanho_lote=None, cancelamento=None, pool=None):
+        self.modo = (modo or config.POOL_MODO).lower()
+        if self.modo not in ('thread', 'process'):
+            raise ValueError(f"Modo de pool inválido: {self.modo} (use 'thread' ou 'process')")
+        self.workers = workers or config.POOL_WORKERS or workers_padrao(self.modo)
+        self.tamanho_lote = max(1, tamanho_lote or config.TAMANHO_LOTE)
+        self.cancelamento = cancelamento or Cancelamento()
+        self.pool = pool
+        # Extrator compartilhado pelas threads (a memória de codificação por pasta vale para todas)
+        self.extrator = ExtratorCampo1()
+        self.estatisticas = novas_estatisticas()
+
+    def _criar_pool(self):
+        return criar_pool(self.modo, self.workers)
+
+    def processar(self, arquivos, progresso=None, log=None, cache=None, total=None):
+        """Processa os arquivos e retorna os pares (campo1, codigo)
+
+        progresso(concluidos, total) é chamado a cada lote concluído e
+        log(mensagem) recebe os avisos gerados pela extração. Com um
+        CacheParsing, apenas os arquivos novos ou alterados são lidos.
+
+        `arquivos` pode ser um gerador (ex: a descoberta ainda em andamento);
+        nesse caso `total` é só a estimativa repassada ao progresso. Os itens
+        podem ser caminhos ou (caminho, tamanho, mtime_ns) já com o stat da
+        descoberta, que o cache aproveita sem um novo os.stat.
+        """
+        if total is None:
+            arquivos = list(arquivos)
+            total = len(arquivos)
+        if cache is None:
+            caminhos = (item if isinstance(item, str) else item[0] for item in arquivos)
+            return self._executar(processar_lote, _em_lotes(caminhos, self.tamanho_lote),
+                                  total, progresso, log)
+
+        ordem = []
+        conhecidos = {}
+
+        def pendentes():
+            # Classifica lote a lote, à medida que os caminhos chegam
+            for lote in _em_lotes(arquivos, self.tamanho_lote):
+                entradas = itens_com_stat(lote) if isinstance(lote[0], str) else lote
+                ordem.extend(caminho for caminho, _, _ in entradas)
+                lote_conhecidos, lote_pendentes = cache.classificar(entradas)
+                conhecidos.update(lote_conhecidos)
+                self.estatisticas['cache_hits'] += len(lote_conhecidos)
+                self.estatisticas['cache_misses'] += len(lote_pendentes)
+                self.estatisticas['arquivos'] += len(lote_conhecidos)
+                if progresso and lote_conhecidos:
+                    progresso(len(conhecidos), max(total, len(ordem)))
+                yield from lote_pendentes
+
+        progresso_pendentes = None
+        if progresso:
+            progresso_pendentes = lambda feitos, _: progresso(len(conhecidos) + feitos, max(total, len(ordem)))
+
+        lido_ns = time.time_ns()
+        registros = self._executar(processar_lote_registros, _em_lotes(pendentes(), self.tamanho_lote),
+                                   total, progresso_pendentes, log)
+        # Só depois da varredura completa dá para saber quais arquivos sumiram
+        cache.concluir_varredura()
+        cache.gravar(registros, lido_ns)
+
+        campos = {caminho: registro[2] for caminho, registro in conhecidos.items()}
+        for registro in registros:
+            campos[registro[0]] = registro[4]
+
+        # Mantém a ordem original dos arquivos, igual ao caminho sem cache
+        dados = []
+        for caminho_arquivo in ordem:
+            campo1 = campos.get(caminho_arquivo)
+            if campo1:
+                if caminho_arquivo in conhecidos:
+                    self.estatisticas['extraidos'] += 1
+                dados.append((campo1, codigo_do_arquivo(caminho_arquivo)))
+            elif caminho_arquivo in conhecidos:
+                self.estatisticas['sem_campo1'] += 1
+        return dados
+
+    def ler_registros(self, itens, progresso=None, log=None):
+        """Lê (caminho, tamanho, mtime_ns) e retorna os registros completos
+
+        Cada registro é (caminho, tamanho, mtime_ns, hash, campo1), no formato
+        usado pelo CacheParsing e pelo monitoramento da pasta.
+        """
+        itens = list(itens)
+        return self._executar(processar_lote_registros, _em_lotes(itens, self.tamanho_lote),
+                              len(itens), progresso, log)
+
+    def processar_membros(self, membros, total, progresso=None, log=None):
+        """Processa membros (nome, conteudo) vindos de um arquivo compactado
+
+        `membros` pode ser um gerador: os lotes vão para o pool à medida que
+        são lidos, com no máximo dois lotes por worker em memória.
+        """
+        return self._executar(processar_lote_membros, _em_lotes(membros, self.tamanho_lote),
+                              total, progresso, log)
+
+    def mapear(self, funcao, itens, total, progresso=None, log=None):
+        """Aplica funcao(lote, extrator) aos itens em lotes, no pool
+
+        funcao deve retornar (resultados, mensagens, estatisticas), como
+        processar_lote; os resultados voltam concatenados na ordem dos itens.
+        Em modo 'process', funcao precisa ser serializável (nível de módulo).
+        """
+        return self._executar(funcao, _em_lotes(itens, self.tamanho_lote), total, progresso, log)
+
+    def _executar(self, funcao, lotes, total, progresso, log):
+        """Executa os lotes no pool; levanta ExportacaoCancelada se o cancelamento for pedido
+
+        O cancelamento é verificado antes de cada lote, durante as esperas
+        (a cada INTERVALO_CANCELAMENTO) e, com threads, entre os arquivos
+        de um mesmo lote.
+        """
+        resultados = []
+        concluidos = 0
+
+        def concluir(indice, tamanho, resultado):
+            nonlocal concluidos
+            resultados[indice] = self._concluir_lote(resultado, log)
+            concluidos += tamanho
+            if progresso:
+                progresso(concluidos, max(total, concluidos))
+
+        # Só sobe o pool se houver mais de um lote (o segundo é lido antes de decidir)
+        lotes = iter(lotes)
+        iniciais = list(itertools.islice(lotes, 2))
+        lotes = itertools.chain(iniciais, lotes)
+
+        if len(iniciais) < 2 or self.workers == 1:
+            for lote in lotes:
+                self.cancelamento.verificar()
+                resultados.append(None)
+                resultado = funcao(self.cancelamento.interromper(lote), self.extrator)
+                self.cancelamento.verificar()
+                concluir(len(resultados) - 1, len(lote), resultado)
+        else:
+            pool = self.pool or self._criar_pool()
+            interrompido = False
+            pendentes = {}
+            try:
+                # Processos não compartilham memória: cada um usa o seu próprio extrator
+                extrator = self.extrator if self.modo == 'thread' else None
+                for lote in lotes:
+                    self.cancelamento.verificar()
+                    resultados.append(None)
+                    # Geradores não vão para outro processo; lá o lote roda até o fim
+                    enviado = self.cancelamento.interromper(lote) if self.modo == 'thread' else lote
+                    pendentes[pool.submit(funcao, enviado, extrator)] = (len(resultados) - 1, len(lote))
+                    while len(pendentes) >= self.workers * 2:
+                        self._aguardar(pendentes, concluir)
+                while pendentes:
+                    self._aguardar(pendentes, concluir)
+            except BaseException:
+                interrompido = True
+                raise
+            finally:
+                # No cancelamento não espera os lotes em andamento nem inicia os da fila
+                if self.pool is None:
+                    pool.shutdown(wait=not interrompido, cancel_futures=interrompido)
+                elif interrompido:
+                    for futuro in pendentes:
+                        futuro.cancel()
+
+        dados = []
+        for parcial in resultados:
+            dados.extend(parcial)
+        return dados
+
+    def _aguardar(self, pendentes, concluir):
+        """Espera algum lote terminar, verificando o cancelamento a cada intervalo"""
+        feitos, _ = wait(pendentes, timeout=INTERVALO_CANCELAMENTO, return_when=FIRST_COMPLETED)
+        self.cancelamento.verificar()
+        for futuro in feitos:
+            concluir(*pendentes.pop(futuro), futuro.result())
+
+    def _concluir_lote(self, resultado, log):
+        dados, mensagens, estatisticas = resultado
+        for chave, valor in estatisticas.items():
+            self.estatisticas[chave] += valor
+        if log:
+            for mensagem in mensagens:
+                log(mensagem)
+        return dados
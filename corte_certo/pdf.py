@@ -0,0 +1,332 @@
+"""Geração do PDF da lista de materiais.
+
+O renderizador recebe os materiais um a um e guarda apenas a página atual:
+cada página é montada com um objeto de texto por coluna (em vez de um
+drawString por célula) e enviada ao canvas assim que fica cheia. O carimbo
+de data do rodapé é calculado uma única vez por documento.
+
+Na lista agrupada (por família ou letra inicial), o layout inteiro é
+calculado antes de desenhar (montar_layout): sumário, cabeçalhos e
+marcadores já saem com as páginas certas numa única passada.
+"""
+import datetime
+import threading
+from collections import namedtuple
+
+TITULO = "Lista de Materiais (Ordenada Alfabeticamente)"
+MARGEM = 30
+ESPACAMENTO = 20  # Espaçamento entre as linhas
+TOPO = 40
+LIMITE_INFERIOR = 50
+FONTE = "Helvetica"
+FONTE_CABECALHO = "Helvetica-Bold"
+TAMANHO_FONTE = 12
+
+
+def linhas_por_pagina(altura, primeira_pagina):
+    """Quantidade de linhas (dois materiais por linha) que cabem na página"""
+    y = altura - TOPO
+    if primeira_pagina:
+        y -= ESPACAMENTO * 2  # Espaço maior após o título
+    linhas = 0
+    while y >= LIMITE_INFERIOR:
+        linhas += 1
+        y -= ESPACAMENTO
+    return linhas
+
+
+# Layout antecipado: cada página sabe o seu número, as linhas do sumário e os
+# trechos de materiais que recebe, com a altura (y) de cada um
+PaginaLayout = namedtuple('PaginaLayout', 'numero sumario segmentos')
+# Trecho dos materiais (posições inicio:fim da lista completa) a partir de y;
+# com título, a primeira linha é o cabeçalho do grupo e marcador é o índice do
+# marcador do PDF (None no cabeçalho do sumário e nas continuações)
+Segmento = namedtuple('Segmento', 'titulo inicio fim y marcador')
+# Linha do sumário: título do grupo e página/altura do seu cabeçalho
+EntradaSumario = namedtuple('EntradaSumario', 'titulo pagina y destino')
+# Marcador (outline) do PDF: título e página/altura do cabeçalho do grupo
+Marcador = namedtuple('Marcador', 'titulo pagina y')
+Layout = namedtuple('Layout', 'paginas marcadores')
+
+TITULO_SUMARIO = "Sumário"
+
+
+def montar_layout(grupos, altura, sumario=False):
+    """Distribui os grupos [(titulo, quantidade)] pelas páginas em uma única passada
+
+    Sem título (None) o grupo é a lista corrida, sem cabeçalho. Com
+    sumario=True, as páginas do sumário vêm primeiro: a quantidade delas só
+    depende da quantidade de grupos, então as páginas dos grupos já saem
+    com a numeração final e o sumário é preenchido no fim da mesma passada.
+    O cabeçalho de um grupo nunca fica sozinho no pé da página. Sem
+    materiais ainda há uma página, como no PDF original.
+    """
+    paginas = []
+    estado = {}
+
+    def nova_pagina():
+        primeira = not paginas
+        paginas.append(PaginaLayout(len(paginas) + 1, [], []))
+        estado['y'] = altura - TOPO - (ESPACAMENTO * 2 if primeira else 0)
+        estado['livres'] = linhas_por_pagina(altura, primeira)
+
+    def ocupar(linhas):
+        estado['y'] -= ESPACAMENTO * linhas
+        estado['livres'] -= linhas
+
+    linhas_sumario = []
+    if sumario:
+        nova_pagina()
+        paginas[-1].segmentos.append(Segmento(TITULO_SUMARIO, 0, 0, estado['y'], None))
+        ocupar(1)
+        for _ in grupos:
+            if estado['livres'] < 1:
+                nova_pagina()
+            linhas_sumario.append((paginas[-1], estado['y']))
+            ocupar(1)
+
+    marcadores = []
+    posicao = 0
+    if not sumario or grupos:
+        nova_pagina()
+    for titulo, quantidade in grupos:
+        restante = quantidade
+        cabecalho = titulo is not None
+        while cabecalho or restante:
+            # Cabeçalho precisa de ao menos uma linha de materiais abaixo dele
+            if estado['livres'] < (2 if cabecalho and restante else 1):
+                nova_pagina()
+            pagina = paginas[-1]
+            cabem = 2 * (estado['livres'] - cabecalho)
+            feitos = min(restante, cabem)
+            marcador = None
+            if cabecalho:
+                marcador = len(marcadores)
+                marcadores.append(Marcador(titulo, pagina.numero, estado['y']))
+            pagina.segmentos.append(Segmento(titulo if cabecalho else None, posicao, posicao + feitos,
+                                             estado['y'], marcador))
+            ocupar(cabecalho + (feitos + 1) // 2)
+            posicao += feitos
+            restante -= feitos
+            cabecalho = False
+
+    for (pagina, y), (indice, marcador) in zip(linhas_sumario, enumerate(marcadores)):
+        pagina.sumario.append(EntradaSumario(marcador.titulo, marcador.pagina, y, indice))
+    return Layout(paginas, marcadores)
+
+
+def agrupar_consecutivos(materiais, rotulo):
+    """[(titulo, quantidade)] das sequências de materiais com o mesmo rótulo (já ordenados por grupo)"""
+    grupos = []
+    for material in materiais:
+        titulo = rotulo(material)
+        if grupos and grupos[-1][0] == titulo:
+            grupos[-1][1] += 1
+        else:
+            grupos.append([titulo, 1])
+    return [tuple(grupo) for grupo in grupos]
+
+
+def formatar_material(material):
+    """Texto de uma célula: 'codigo = nome'"""
+    return f"{material[1]} = {material[0]}"
+
+
+def adicionar_titulo(pdf, largura, altura):
+    """Título do documento na primeira página; retorna o y da primeira linha"""
+    y = altura - TOPO
+    pdf.setFont("Helvetica-Bold", 14)
+    pdf.drawString(MARGEM, y, TITULO)
+    pdf.line(MARGEM, y - 5, largura - MARGEM, y - 5)  # Linha horizontal abaixo do título
+    return y - ESPACAMENTO * 2
+
+
+def adicionar_rodape(pdf, largura, data_hora):
+    """Adiciona rodapé na página atual"""
+    pdf.saveState()
+
+    # Linha separadora do rodapé
+    pdf.line(MARGEM, 35, largura - MARGEM, 35)
+
+    # Texto do rodapé com crédito ao desenvolvedor
+    pdf.setFont("Helvetica", 8)
+    pdf.drawString(MARGEM, 25, "© RedBlack")
+
+    # Número da página e data e hora
+    pdf.drawString(MARGEM, 15, f"Página {pdf.getPageNumber()}")
+    pdf.drawRightString(largura - MARGEM, 15, f"Gerado em: {data_hora}")
+
+    pdf.restoreState()
+
+
+def desenhar_coluna(pdf, x, y, linhas, tamanho=TAMANHO_FONTE, espacamento=ESPACAMENTO):
+    """Desenha uma coluna inteira em um único bloco de texto (BT ... ET)"""
+    texto = pdf.beginText(x, y)
+    texto.setFont(FONTE, tamanho, espacamento)
+    texto.textLines(linhas)
+    pdf.drawText(texto)
+
+
+def desenhar_itens(pdf, itens, largura, y):
+    """Desenha os materiais da página em duas colunas, um bloco de texto por coluna"""
+    for x, coluna in ((MARGEM, itens[0::2]), (largura / 2 + 10, itens[1::2])):
+        if coluna:
+            desenhar_coluna(pdf, x, y, [formatar_material(material) for material in coluna])
+
+
+def chave_marcador(indice):
+    """Nome do destino do marcador `indice` (usado pelos links do sumário)"""
+    return f'grupo{indice}'
+
+
+def desenhar_cabecalho(pdf, largura, y, titulo):
+    """Cabeçalho de um grupo (ou do sumário): título em negrito com um traço abaixo"""
+    pdf.setFont(FONTE_CABECALHO, TAMANHO_FONTE)
+    pdf.drawString(MARGEM, y, titulo)
+    pdf.line(MARGEM, y - 4, largura - MARGEM, y - 4)
+
+
+def desenhar_sumario(pdf, largura, entradas):
+    """Linhas do sumário: título do grupo, página à direita e link para o cabeçalho do grupo"""
+    pdf.setFont(FONTE, TAMANHO_FONTE)
+    for entrada in entradas:
+        pdf.drawString(MARGEM + 10, entrada.y, entrada.titulo)
+        pdf.drawRightString(largura - MARGEM, entrada.y, str(entrada.pagina))
+        pdf.linkAbsolute('', chave_marcador(entrada.destino),
+                         (MARGEM, entrada.y - 4, largura - MARGEM, entrada.y + TAMANHO_FONTE), thickness=0)
+
+
+def carimbo_data_hora():
+    return datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+
+# Gravações em andamento com o ASCII85 desligado (a opção do reportlab é global)
+_trava_ascii85 = threading.Lock()
+_gravacoes_sem_ascii85 = 0
+_ascii85_anterior = None
+
+
+def salvar_sem_ascii85(pdf):
+    """Salva o canvas com as páginas comprimidas em binário, sem a camada ASCII85 (mais rápido e menor)
+
+    O reportlab só consulta rl_config.useA85 ao montar o arquivo, no
+    save(); a opção é desligada só durante a gravação e volta ao valor
+    anterior quando a última gravação em andamento (de qualquer thread)
+    termina, sem afetar outros canvas do processo.
+    """
+    global _gravacoes_sem_ascii85, _ascii85_anterior
+    from reportlab import rl_config
+
+    with _trava_ascii85:
+        if not _gravacoes_sem_ascii85:
+            _ascii85_anterior = rl_config.useA85
+            rl_config.useA85 = 0
+        _gravacoes_sem_ascii85 += 1
+    try:
+        pdf.save()
+    finally:
+        with _trava_ascii85:
+            _gravacoes_sem_ascii85 -= 1
+            if not _gravacoes_sem_ascii85:
+                rl_config.useA85 = _ascii85_anterior
+
+
+class RenderizadorPDF:
+    """Escreve o PDF de forma incremental: escrever(material) ... fechar()"""
+
+    def __init__(self, caminho_pdf):
+        # Reportlab só é carregado quando um PDF é realmente gerado
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+
+        self.caminho = caminho_pdf
+        self.largura, self.altura = A4
+        self.pdf = canvas.Canvas(caminho_pdf, pagesize=A4, pageCompression=1)
+        self.data_hora = carimbo_data_hora()
+        self.paginas = 0
+        self._pagina = []
+        self._capacidade = 2 * linhas_por_pagina(self.altura, True)
+
+    def escrever(self, material):
+        self._pagina.append(material)
+        if len(self._pagina) >= self._capacidade:
+            self._desenhar_pagina()
+
+    def _desenhar_pagina(self):
+        self.paginas += 1
+        if self.paginas == 1:
+            y = adicionar_titulo(self.pdf, self.largura, self.altura)
+            self._capacidade = 2 * linhas_por_pagina(self.altura, False)
+        else:
+            self.pdf.showPage()
+            y = self.altura - TOPO
+        desenhar_itens(self.pdf, self._pagina, self.largura, y)
+        adicionar_rodape(self.pdf, self.largura, self.data_hora)
+        self._pagina = []
+
+    def fechar(self):
+        """Desenha a última página e salva o arquivo; retorna a quantidade de páginas"""
+        # Sempre há ao menos uma página (mesmo sem materiais), como o PDF original
+        if self._pagina or not self.paginas:
+            self._desenhar_pagina()
+        salvar_sem_ascii85(self.pdf)
+        return self.paginas
+
+
+class RenderizadorPDFAgrupado(RenderizadorPDF):
+    """PDF com os materiais agrupados, sumário no início e um marcador (outline) por grupo
+
+    grupo(material) dá o título do grupo; os materiais chegam já ordenados
+    por grupo. Eles ficam guardados até o fechar(), que monta o layout uma
+    vez (o sumário já sabe a página de cada grupo) e desenha cada página
+    uma única vez, sem passadas extras do reportlab.
+    """
+
+    def __init__(self, caminho_pdf, grupo):
+        super().__init__(caminho_pdf)
+        self.grupo = grupo
+        self._materiais = []
+        self.grupos = 0
+
+    def escrever(self, material):
+        self._materiais.append(material)
+
+    def fechar(self):
+        materiais, self._materiais = self._materiais, []
+        layout = montar_layout(agrupar_consecutivos(materiais, self.grupo), self.altura, sumario=True)
+        pdf = self.pdf
+        for pagina in layout.paginas:
+            if pagina.numero == 1:
+                adicionar_titulo(pdf, self.largura, self.altura)
+            else:
+                pdf.showPage()
+            desenhar_sumario(pdf, self.largura, pagina.sumario)
+            for segmento in pagina.segmentos:
+                y = segmento.y
+                if segmento.titulo is not None:
+                    if segmento.marcador is not None:
+                        chave = chave_marcador(segmento.marcador)
+                        pdf.bookmarkPage(chave, fit='XYZ', left=0, top=y + ESPACAMENTO)
+                        pdf.addOutlineEntry(segmento.titulo, chave, level=0)
+                    desenhar_cabecalho(pdf, self.largura, y, segmento.titulo)
+                    y -= ESPACAMENTO
+                if segmento.fim > segmento.inicio:
+                    desenhar_itens(pdf, materiais[segmento.inicio:segmento.fim], self.largura, y)
+            adicionar_rodape(pdf, self.largura, self.data_hora)
+        pdf.showOutline()
+        salvar_sem_ascii85(pdf)
+        self.paginas = len(layout.paginas)
+        self.grupos = len(layout.marcadores)
+        return self.paginas
+
+
+def gerar_pdf(dados, caminho_pdf, grupo=None):
+    """Gera o PDF com a lista de materiais
+
+    dados: iterável de pares (campo1, codigo) já ordenados (por grupo, se
+    houver grupo). Retorna a quantidade de páginas geradas.
+    """
+    renderizador = RenderizadorPDF(caminho_pdf) if grupo is None else RenderizadorPDFAgrupado(caminho_pdf, grupo)
+    for material in dados:
+        renderizador.escrever(material)
+    return renderizador.fechar()
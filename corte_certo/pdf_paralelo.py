@@ -0,0 +1,313 @@
+"""Renderização do PDF em paralelo, por faixas de páginas.
+
+O RenderizadorPDF desenha tudo em um único canvas do reportlab, preso ao
+GIL. Aqui o layout é calculado antes (pdf.montar_layout): cada página já
+sabe quais materiais recebe e qual é o seu número. Faixas de páginas vão para
+processos separados, que devolvem o conteúdo de cada página já
+comprimido, e o processo principal só grava os objetos do PDF em ordem
+(fontes, páginas, conteúdos e xref). Não há PDFs parciais para reabrir e
+mesclar, e a numeração e os rodapés saem certos porque vêm do layout.
+Na lista agrupada, sumário (com links), cabeçalhos e marcadores também
+vêm do layout.
+
+As páginas têm o mesmo conteúdo do RenderizadorPDF (posições, fontes,
+título e rodapé). Caracteres fora do cp1252 passam pela mesma troca de
+fonte do reportlab (Symbol, depois ZapfDingbats, e o quadrado do
+ZapfDingbats se nenhuma tiver o caractere).
+"""
+import datetime
+import math
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from .pdf import (ESPACAMENTO, MARGEM, TAMANHO_FONTE, TITULO, TOPO, agrupar_consecutivos, carimbo_data_hora,
+                  formatar_material, montar_layout)
+
+# Fontes padrão do PDF, nomeadas como nos recursos de todas as páginas
+FONTES = (('F1', 'Helvetica'), ('F2', 'Helvetica-Bold'), ('F3', 'ZapfDingbats'), ('F4', 'Symbol'))
+
+# Fontes sem a WinAnsiEncoding (usam a codificação própria)
+FONTES_SIMBOLOS = ('ZapfDingbats', 'Symbol')
+
+# Páginas enviadas a um processo de cada vez
+PAGINAS_POR_PARTE = 32
+
+# Abaixo disto por processo, subir processos custa mais do que renderizar
+PAGINAS_MINIMAS_POR_PROCESSO = 64
+
+# Objetos fixos: catálogo, árvore de páginas, recursos, fontes e informações;
+# depois vêm, para cada página, o objeto da página e o do seu conteúdo
+_CATALOGO, _PAGINAS, _RECURSOS = 1, 2, 3
+_INFORMACOES = _RECURSOS + len(FONTES) + 1
+_PRIMEIRA_PAGINA = _INFORMACOES + 1
+
+
+# Tabela de escape de strings PDF para fontes padrão (WinAnsiEncoding = cp1252)
+_ESCAPE_PDF = {i: chr(i) if 32 <= i <= 126 else f'\\{i:03o}' for i in range(256)}
+_ESCAPE_PDF.update({ord('('): '\\(', ord(')'): '\\)', ord('\\'): '\\\\'})
+
+
+def escapar_texto(texto):
+    """Escapa o texto como string PDF; UnicodeEncodeError se sair do cp1252"""
+    return texto.encode('cp1252').decode('latin-1').translate(_ESCAPE_PDF)
+
+
+def escapar_bytes(dados):
+    """Escapa bytes já codificados na fonte (Symbol, ZapfDingbats) como string PDF"""
+    return dados.decode('latin-1').translate(_ESCAPE_PDF)
+
+
+def _numero(valor):
+    """Número como o reportlab escreve: até 4 casas, sem zeros à direita"""
+    texto = f'{valor:.4f}'.rstrip('0').rstrip('.')
+    return '0' if texto in ('', '-0') else texto
+
+
+def _mostrar(texto, fonte, tamanho, entrelinha):
+    """Operadores Tj do texto; fora do cp1252, troca de fonte como o reportlab (pdfmetrics.unicode2T1)"""
+    try:
+        return f'({escapar_texto(texto)}) Tj'
+    except UnicodeEncodeError:
+        pass
+    from reportlab.pdfbase import pdfmetrics
+    nomes = dict(FONTES)
+    recursos = {nome: recurso for recurso, nome in FONTES}
+    principal = pdfmetrics.getFont(nomes[fonte])
+    troca = f'{_numero(tamanho)} Tf {_numero(entrelinha)} TL'
+    partes = []
+    atual = principal
+    for fonte_trecho, trecho in pdfmetrics.unicode2T1(texto, [principal] + principal.substitutionFonts):
+        if fonte_trecho is not atual:
+            partes.append(f'/{recursos[fonte_trecho.fontName]} {troca}')
+            atual = fonte_trecho
+        partes.append(f'({escapar_bytes(trecho)}) Tj')
+    if atual is not principal:
+        partes.append(f'/{fonte} {troca}')
+    return ' '.join(partes)
+
+
+def bloco_texto(x, y, linhas, fonte='F1', tamanho=TAMANHO_FONTE, entrelinha=ESPACAMENTO):
+    """Um bloco BT ... ET com uma linha de texto por item, a partir de (x, y)"""
+    corpo = ' '.join(f'{_mostrar(linha, fonte, tamanho, entrelinha)} T*' for linha in linhas)
+    return f'BT 1 0 0 1 {_numero(x)} {_numero(y)} Tm /{fonte} {tamanho} Tf {_numero(entrelinha)} TL {corpo} ET'
+
+
+def linha(x1, y1, x2, y2):
+    return f'n {_numero(x1)} {_numero(y1)} m {_numero(x2)} {_numero(y2)} l S'
+
+
+def _texto_unicode(texto):
+    """String PDF em UTF-16BE (títulos dos marcadores aceitam qualquer caractere)"""
+    return f"<FEFF{texto.encode('utf-16-be').hex().upper()}>"
+
+
+def conteudo_pagina(numero, sumario, segmentos, largura, altura, rodape):
+    """Operadores de uma página: título (só na primeira), sumário, grupos em duas colunas e rodapé
+
+    sumario: [(titulo, texto da página, x da página, y)]; segmentos:
+    [(titulo do grupo ou None, y, materiais)]; rodape: (data e hora, x do
+    texto alinhado à direita), iguais em todas as páginas.
+    """
+    operadores = []
+    if numero == 1:
+        y = altura - TOPO
+        operadores.append(bloco_texto(MARGEM, y, [TITULO], 'F2', 14, 14 * 1.2))
+        operadores.append(linha(MARGEM, y - 5, largura - MARGEM, y - 5))
+    for titulo, pagina, x_pagina, y in sumario:
+        operadores.append(bloco_texto(MARGEM + 10, y, [titulo]))
+        operadores.append(bloco_texto(x_pagina, y, [pagina]))
+    for titulo, y, itens in segmentos:
+        if titulo is not None:
+            operadores.append(bloco_texto(MARGEM, y, [titulo], 'F2', TAMANHO_FONTE, TAMANHO_FONTE * 1.2))
+            operadores.append(linha(MARGEM, y - 4, largura - MARGEM, y - 4))
+            y -= ESPACAMENTO
+        for x, coluna in ((MARGEM, itens[0::2]), (largura / 2 + 10, itens[1::2])):
+            if coluna:
+                operadores.append(bloco_texto(x, y, [formatar_material(material) for material in coluna]))
+
+    data_hora, x_data_hora = rodape
+    operadores.extend([
+        'q',
+        linha(MARGEM, 35, largura - MARGEM, 35),
+        bloco_texto(MARGEM, 25, ["© RedBlack"], tamanho=8, entrelinha=9.6),
+        bloco_texto(MARGEM, 15, [f"Página {numero}"], tamanho=8, entrelinha=9.6),
+        bloco_texto(x_data_hora, 15, [f"Gerado em: {data_hora}"], tamanho=8, entrelinha=9.6),
+        'Q',
+    ])
+    return '\n'.join(operadores)
+
+
+def renderizar_paginas(paginas, largura, altura, rodape):
+    """Conteúdo comprimido de cada página (numero, sumario, segmentos) da faixa; roda nos processos do pool"""
+    return [
+        zlib.compress(conteudo_pagina(numero, sumario, segmentos, largura, altura, rodape).encode('ascii'))
+        for numero, sumario, segmentos in paginas
+    ]
+
+
+def gravar_pdf(caminho, quantidade_paginas, conteudos, largura, altura, marcadores=(), links=None):
+    """Grava o PDF com as páginas na ordem de `conteudos` (streams já comprimidos)
+
+    marcadores: [(titulo, pagina, topo)] viram o outline do documento;
+    links: {pagina: [(retângulo, pagina de destino, topo)]} são as áreas
+    clicáveis (linhas do sumário). Os objetos vão para o arquivo à medida
+    que os conteúdos chegam; só os deslocamentos do xref ficam em memória.
+    """
+    links = links or {}
+    deslocamentos = {}
+    with open(caminho, 'wb') as arquivo:
+        def objeto(numero, corpo, stream=None):
+            deslocamentos[numero] = arquivo.tell()
+            arquivo.write(f'{numero} 0 obj\n{corpo}\n'.encode('ascii'))
+            if stream is not None:
+                arquivo.write(b'stream\n')
+                arquivo.write(stream)
+                arquivo.write(b'\nendstream\n')
+            arquivo.write(b'endobj\n')
+
+        arquivo.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+        paginas = [_PRIMEIRA_PAGINA + 2 * i for i in range(quantidade_paginas)]
+        outline = _PRIMEIRA_PAGINA + 2 * quantidade_paginas
+
+        def destino(pagina, topo):
+            return f'[ {paginas[pagina - 1]} 0 R /XYZ 0 {_numero(topo)} 0 ]'
+
+        if marcadores:
+            objeto(_CATALOGO, f'<< /Type /Catalog /Pages {_PAGINAS} 0 R /Outlines {outline} 0 R /PageMode /UseOutlines >>')
+        else:
+            objeto(_CATALOGO, f'<< /Type /Catalog /Pages {_PAGINAS} 0 R >>')
+        objeto(_PAGINAS, f"<< /Type /Pages /Count {quantidade_paginas} /Kids [ {' '.join(f'{p} 0 R' for p in paginas)} ] >>")
+        fontes = ' '.join(f'/{nome} {_RECURSOS + 1 + i} 0 R' for i, (nome, _) in enumerate(FONTES))
+        objeto(_RECURSOS, f'<< /Font << {fontes} >> /ProcSet [ /PDF /Text ] >>')
+        for i, (nome, fonte) in enumerate(FONTES):
+            codificacao = '' if fonte in FONTES_SIMBOLOS else ' /Encoding /WinAnsiEncoding'
+            objeto(_RECURSOS + 1 + i, f'<< /Type /Font /Subtype /Type1 /Name /{nome} /BaseFont /{fonte}{codificacao} >>')
+        criacao = datetime.datetime.now().strftime('D:%Y%m%d%H%M%S')
+        objeto(_INFORMACOES, f'<< /Title ({escapar_texto(TITULO)}) /Producer (Corte Certo) /CreationDate ({criacao}) >>')
+
+        caixa = f'[ 0 0 {_numero(largura)} {_numero(altura)} ]'
+        gravadas = 0
+        for numero, (pagina, conteudo) in enumerate(zip(paginas, conteudos), 1):
+            anotacoes = ''
+            if numero in links:
+                anotacoes = ' /Annots [ ' + ' '.join(
+                    f"<< /Type /Annot /Subtype /Link /Rect [ {' '.join(_numero(v) for v in retangulo)} ] "
+                    f"/Border [ 0 0 0 ] /Dest {destino(alvo, topo)} >>"
+                    for retangulo, alvo, topo in links[numero]
+                ) + ' ]'
+            objeto(pagina, f'<< /Type /Page /Parent {_PAGINAS} 0 R /MediaBox {caixa} '
+                           f'/Resources {_RECURSOS} 0 R /Contents {pagina + 1} 0 R{anotacoes} >>')
+            objeto(pagina + 1, f'<< /Length {len(conteudo)} /Filter /FlateDecode >>', conteudo)
+            gravadas += 1
+        if gravadas != quantidade_paginas:
+            raise RuntimeError(f"PDF com {gravadas} de {quantidade_paginas} páginas renderizadas")
+
+        total = outline
+        if marcadores:
+            quantidade = len(marcadores)
+            objeto(outline, f'<< /Type /Outlines /First {outline + 1} 0 R /Last {outline + quantidade} 0 R '
+                            f'/Count {quantidade} >>')
+            for i, (titulo, pagina, topo) in enumerate(marcadores):
+                numero = outline + 1 + i
+                vizinhos = (f' /Prev {numero - 1} 0 R' if i else '') + \
+                           (f' /Next {numero + 1} 0 R' if i < quantidade - 1 else '')
+                objeto(numero, f'<< /Title {_texto_unicode(titulo)} /Parent {outline} 0 R{vizinhos} '
+                               f'/Dest {destino(pagina, topo)} >>')
+            total = outline + 1 + quantidade
+
+        inicio_xref = arquivo.tell()
+        arquivo.write(f'xref\n0 {total}\n0000000000 65535 f \n'.encode('ascii'))
+        arquivo.write(''.join(f'{deslocamentos[numero]:010d} 00000 n \n' for numero in range(1, total)).encode('ascii'))
+        arquivo.write(f'trailer\n<< /Size {total} /Root {_CATALOGO} 0 R /Info {_INFORMACOES} 0 R >>\n'
+                      f'startxref\n{inicio_xref}\n%%EOF\n'.encode('ascii'))
+
+
+class RenderizadorPDFParalelo:
+    """Mesma interface do RenderizadorPDF; guarda os materiais e renderiza por faixas no fechar()
+
+    processos: quantidade máxima de processos (None = um por núcleo). Listas
+    pequenas, que não ocupariam PAGINAS_MINIMAS_POR_PROCESSO páginas por
+    processo, são renderizadas aqui mesmo, sem subir o pool. grupo: função
+    material -> rótulo para a lista agrupada (com sumário e marcadores), como
+    no RenderizadorPDFAgrupado.
+    """
+
+    def __init__(self, caminho_pdf, processos=None, grupo=None):
+        # Só as medidas vêm do reportlab: tamanho da página e largura do texto do rodapé
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfbase.pdfmetrics import stringWidth
+
+        self.caminho = caminho_pdf
+        self.largura, self.altura = A4
+        self.processos = processos or os.cpu_count() or 1
+        self.data_hora = carimbo_data_hora()
+        texto_data_hora = f"Gerado em: {self.data_hora}"
+        self._rodape = (self.data_hora, self.largura - MARGEM - stringWidth(texto_data_hora, 'Helvetica', 8))
+        self._largura_texto = stringWidth
+        self.grupo = grupo
+        self.grupos = 0
+        self.paginas = 0
+        self.processos_usados = 0
+        self._materiais = []
+
+    def escrever(self, material):
+        self._materiais.append(material)
+
+    def fechar(self):
+        """Pagina, renderiza as faixas em paralelo e grava o PDF; retorna a quantidade de páginas"""
+        materiais, self._materiais = self._materiais, []
+        if self.grupo is not None:
+            grupos = agrupar_consecutivos(materiais, self.grupo)
+        else:
+            grupos = [(None, len(materiais))]
+        layout = montar_layout(grupos, self.altura, sumario=self.grupo is not None)
+        x_numero = self.largura - MARGEM
+        paginas = []
+        links = {}
+        for pagina in layout.paginas:
+            sumario = [
+                (entrada.titulo, str(entrada.pagina),
+                 x_numero - self._largura_texto(str(entrada.pagina), 'Helvetica', TAMANHO_FONTE), entrada.y)
+                for entrada in pagina.sumario
+            ]
+            if pagina.sumario:
+                links[pagina.numero] = [
+                    ((MARGEM, entrada.y - 4, x_numero, entrada.y + TAMANHO_FONTE),
+                     layout.marcadores[entrada.destino].pagina, layout.marcadores[entrada.destino].y + ESPACAMENTO)
+                    for entrada in pagina.sumario
+                ]
+            segmentos = [(segmento.titulo, segmento.y, materiais[segmento.inicio:segmento.fim])
+                         for segmento in pagina.segmentos]
+            paginas.append((pagina.numero, sumario, segmentos))
+        marcadores = [(marcador.titulo, marcador.pagina, marcador.y + ESPACAMENTO) for marcador in layout.marcadores]
+        partes = [paginas[i:i + PAGINAS_POR_PARTE] for i in range(0, len(paginas), PAGINAS_POR_PARTE)]
+        medidas = (self.largura, self.altura, self._rodape)
+
+        self.processos_usados = min(self.processos, math.ceil(len(paginas) / PAGINAS_MINIMAS_POR_PROCESSO))
+        if self.processos_usados <= 1:
+            self.processos_usados = 1
+            conteudos = (conteudo for parte in partes for conteudo in renderizar_paginas(parte, *medidas))
+            gravar_pdf(self.caminho, len(paginas), conteudos, self.largura, self.altura, marcadores, links)
+        else:
+            with ProcessPoolExecutor(max_workers=self.processos_usados) as pool:
+                # map devolve as faixas na ordem: as páginas são gravadas assim que a sua faixa fica pronta
+                faixas = pool.map(renderizar_paginas, partes, *(repeat(medida) for medida in medidas))
+                conteudos = (conteudo for faixa in faixas for conteudo in faixa)
+                gravar_pdf(self.caminho, len(paginas), conteudos, self.largura, self.altura, marcadores, links)
+        self.grupos = len(layout.marcadores)
+        self.paginas = len(paginas)
+        return self.paginas
+
+
+def gerar_pdf_paralelo(dados, caminho_pdf, processos=None, grupo=None):
+    """Gera o PDF com a lista de materiais renderizando faixas de páginas em paralelo
+
+    dados: iterável de pares (campo1, codigo) já ordenados (por grupo, se
+    houver grupo). Retorna a quantidade de páginas geradas.
+    """
+    renderizador = RenderizadorPDFParalelo(caminho_pdf, processos, grupo)
+    for material in dados:
+        renderizador.escrever(material)
+    return renderizador.fechar()
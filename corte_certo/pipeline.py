@@ -0,0 +1,143 @@
+"""Execução em fluxo da exportação: descoberta, parsing e saídas sobrepostos, com cancelamento.
+
+A descoberta dos INI (fontes.VarreduraPasta, com os.scandir) roda numa
+thread própria e entrega lotes de (caminho, tamanho, mtime_ns) por uma fila
+limitada; o parsing começa no primeiro lote encontrado, sem esperar a
+varredura das pastas terminar. Todas as etapas consultam o mesmo Cancelamento
+(entre arquivos, entre lotes e durante as esperas), então um pedido de
+cancelamento da interface interrompe a execução em poucos milissegundos.
+"""
+import queue
+import threading
+import time
+
+from .fontes import VarreduraPasta
+
+# Lotes de caminhos aguardando o parsing (a descoberta espera quando a fila enche)
+TAMANHO_FILA = 8
+
+# Arquivos por lote entregue pela descoberta
+LOTE_DESCOBERTA = 256
+
+# Intervalo máximo entre duas verificações de cancelamento nas esperas (segundos)
+INTERVALO_CANCELAMENTO = 0.01
+
+_FIM = object()
+
+
+class ExportacaoCancelada(Exception):
+    """A exportação foi cancelada antes de terminar"""
+
+
+class Cancelamento:
+    """Sinal de cancelamento compartilhado entre a interface e as etapas"""
+
+    def __init__(self):
+        self._evento = threading.Event()
+
+    def cancelar(self):
+        self._evento.set()
+
+    @property
+    def cancelado(self):
+        return self._evento.is_set()
+
+    def verificar(self):
+        """Levanta ExportacaoCancelada se o cancelamento foi pedido"""
+        if self._evento.is_set():
+            raise ExportacaoCancelada("Processamento cancelado pelo usuário")
+
+    def interromper(self, itens):
+        """Repassa os itens até o cancelamento ser pedido (o chamador verifica depois)"""
+        for item in itens:
+            if self._evento.is_set():
+                return
+            yield item
+
+
+class DescobertaEmFluxo:
+    """Percorre a pasta numa thread e entrega os INI em lotes pela fila limitada
+
+    Uso:
+        descoberta = DescobertaEmFluxo(pasta, cancelamento)
+        for caminho, tamanho, mtime_ns in descoberta.entradas():
+            ...
+    `encontrados` cresce enquanto a varredura anda; `concluida` indica o fim
+    (e só então `varredura.indice_novo` está completo).
+    """
+
+    def __init__(self, pasta, cancelamento=None, filtro=None, indice=None,
+                 tamanho_fila=TAMANHO_FILA, tamanho_lote=LOTE_DESCOBERTA):
+        self.pasta = pasta
+        self.varredura = VarreduraPasta(pasta, filtro, indice)
+        self.cancelamento = cancelamento or Cancelamento()
+        self.tamanho_lote = tamanho_lote
+        self.encontrados = 0
+        self.segundos = 0.0
+        self.concluida = False
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._parar = threading.Event()
+        self._thread = None
+
+    def iniciar(self):
+        self._thread = threading.Thread(target=self._varrer, name='corte-certo-descoberta', daemon=True)
+        self._thread.start()
+        return self
+
+    def _entregar(self, item):
+        """Coloca na fila esperando vaga, mas desiste se o consumidor parou"""
+        while not self._parar.is_set() and not self.cancelamento.cancelado:
+            try:
+                self._fila.put(item, timeout=INTERVALO_CANCELAMENTO)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _varrer(self):
+        inicio = time.perf_counter()
+        try:
+            lote = []
+            for entrada in self.varredura.entradas():
+                if self._parar.is_set() or self.cancelamento.cancelado:
+                    return
+                lote.append(entrada)
+                if len(lote) >= self.tamanho_lote:
+                    self.encontrados += len(lote)
+                    if not self._entregar(lote):
+                        return
+                    lote = []
+            self.encontrados += len(lote)
+            if lote and not self._entregar(lote):
+                return
+            self.concluida = True
+            self._entregar(_FIM)
+        except BaseException as e:  # repassado ao consumidor
+            self._entregar(e)
+        finally:
+            self.segundos = time.perf_counter() - inicio
+
+    def entradas(self):
+        """Gera (caminho, tamanho, mtime_ns) à medida que são encontrados (inicia a varredura se preciso)"""
+        if self._thread is None:
+            self.iniciar()
+        try:
+            while True:
+                self.cancelamento.verificar()
+                try:
+                    item = self._fila.get(timeout=INTERVALO_CANCELAMENTO)
+                except queue.Empty:
+                    continue
+                if item is _FIM:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield from item
+        finally:
+            self.parar()
+
+    def parar(self):
+        """Encerra a varredura (usado no cancelamento ou quando o consumidor desiste)"""
+        self._parar.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=1)
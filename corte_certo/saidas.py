@@ -0,0 +1,265 @@
+"""Saídas da exportação (PDF, CSV, XLSX, JSON Lines e índice de busca) alimentadas em uma única passada.
+
+Todas as saídas seguem a mesma interface: escrever(material) para cada par
+(campo1, codigo), já ordenado, e fechar() no final. Só o índice de busca
+guarda os pares até o fechar() (ele precisa de todos para montar as listas
+de trigramas); as demais escrevem à medida que recebem.
+"""
+import csv
+import json
+import os
+import uuid
+
+from .busca import gravar_indice
+from .pdf import RenderizadorPDF, RenderizadorPDFAgrupado
+from .pdf_paralelo import RenderizadorPDFParalelo
+
+# Imports otimizados - carregados apenas quando necessário
+openpyxl = None
+
+CABECALHO = ('codigo', 'material')
+
+# A cada quantos materiais escritos o progresso é informado
+INTERVALO_PROGRESSO = 2000
+
+# A cada quantos materiais escritos o cancelamento é verificado
+INTERVALO_CANCELAMENTO = 256
+
+
+class SaidaCSV:
+    """CSV separado por ';' com BOM, para abrir direto no Excel em português"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = open(caminho, 'w', encoding='utf-8-sig', newline='')
+        self._escritor = csv.writer(self._arquivo, delimiter=';')
+        self._escritor.writerow(CABECALHO)
+
+    def escrever(self, material):
+        self._escritor.writerow((material[1], material[0]))
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+class SaidaJSONL:
+    """Um objeto JSON por linha: {"codigo": ..., "material": ...}"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._arquivo = open(caminho, 'w', encoding='utf-8', newline='\n')
+
+    def escrever(self, material):
+        self._arquivo.write(json.dumps({'codigo': material[1], 'material': material[0]}, ensure_ascii=False))
+        self._arquivo.write('\n')
+
+    def fechar(self):
+        self._arquivo.close()
+
+
+class SaidaXLSX:
+    """Planilha Excel no modo write_only do openpyxl (linhas vão direto para o disco)"""
+
+    def __init__(self, caminho):
+        global openpyxl
+        if openpyxl is None:
+            import openpyxl
+        self.caminho = caminho
+        self._pasta_trabalho = openpyxl.Workbook(write_only=True)
+        self._planilha = self._pasta_trabalho.create_sheet('Materiais')
+        self._planilha.append(CABECALHO)
+
+    def escrever(self, material):
+        self._planilha.append((material[1], material[0]))
+
+    def fechar(self):
+        self._pasta_trabalho.save(self.caminho)
+
+    def descartar(self):
+        """Abandona a planilha sem gravar (o temporário do openpyxl é apagado na saída do programa)"""
+        self._planilha.close()
+
+
+class SaidaIndiceBusca:
+    """Índice de busca aproximada (corte_certo.busca) para o bot consultar sem reler os INI"""
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._materiais = []
+
+    def escrever(self, material):
+        self._materiais.append(material)
+
+    def fechar(self):
+        gravar_indice(self._materiais, self.caminho)
+        self._materiais = []
+
+
+SAIDAS = {
+    'pdf': RenderizadorPDF,
+    'csv': SaidaCSV,
+    'xlsx': SaidaXLSX,
+    'jsonl': SaidaJSONL,
+    'busca': SaidaIndiceBusca,
+}
+
+# Saídas que só escrevem no destino ao fechar(): podem ser montadas antes dos dados
+PREPARAVEIS = {'pdf', 'xlsx', 'busca'}
+
+
+def caminhos_por_formato(caminho_base, formatos):
+    """Um caminho por formato, trocando a extensão do caminho base"""
+    raiz = os.path.splitext(caminho_base)[0]
+    caminhos = {}
+    for formato in formatos:
+        formato = formato.lower().lstrip('.')
+        if formato not in SAIDAS:
+            raise ValueError(f"Formato de saída não suportado: {formato} (use {', '.join(SAIDAS)})")
+        caminhos[formato] = f"{raiz}.{formato}"
+    if not caminhos:
+        raise ValueError("Nenhum formato de saída informado")
+    return caminhos
+
+
+def caminho_temporario(caminho):
+    """Temporário oculto na mesma pasta do destino (o os.replace para o destino é atômico)"""
+    pasta, nome = os.path.split(caminho)
+    return os.path.join(pasta, f'.{nome}.{uuid.uuid4().hex[:8]}.tmp')
+
+
+def publicar_arquivos(caminhos, escrever, temporarios=None):
+    """Grava os formatos em temporários e só substitui os arquivos finais quando todos deram certo
+
+    caminhos: dict formato -> caminho. escrever(temporarios) grava todos os
+    formatos, recebendo o dict formato -> temporário, e o seu retorno é
+    devolvido. `temporarios` permite informar nomes já em uso (saídas
+    montadas antes dos dados). Se a escrita falhar (ou for cancelada), os
+    temporários são apagados e os arquivos anteriores continuam intactos.
+    """
+    if temporarios is None:
+        temporarios = {formato: caminho_temporario(caminho) for formato, caminho in caminhos.items()}
+    pendentes = dict(temporarios)
+    try:
+        resultado = escrever(temporarios)
+        for formato, caminho in caminhos.items():
+            os.replace(pendentes.pop(formato), caminho)
+    except BaseException:
+        for temporario in pendentes.values():
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+        raise
+    return resultado
+
+
+class ConjuntoSaidas:
+    """Saídas de uma exportação, alimentadas juntas em uma única passada
+
+    preparar() importa as dependências e monta as saídas que só tocam o
+    destino no fechar() (PDF, XLSX e índice de busca); pode rodar em outra
+    thread enquanto o parsing acontece.
+
+    Cada saída é escrita num temporário na mesma pasta do destino e
+    publicada por publicar_arquivos depois que todas fecharam sem erro: quem
+    estiver lendo o PDF anterior nunca vê um arquivo pela metade. Se a
+    escrita falhar ou for cancelada, descartar() fecha o que estiver aberto
+    e apaga os temporários, e as saídas anteriores continuam intactas.
+
+    processos_pdf diferente de 1 troca o RenderizadorPDF pelo
+    RenderizadorPDFParalelo com essa quantidade de processos (0 = um por
+    núcleo). agrupamento(material) -> título do grupo gera o PDF agrupado,
+    com sumário e marcadores (os dados chegam ordenados por grupo).
+    """
+
+    def __init__(self, caminhos, processos_pdf=1, agrupamento=None):
+        self.caminhos = dict(caminhos)
+        self.processos_pdf = processos_pdf
+        self.agrupamento = agrupamento
+        self._saidas = {}
+        self._temporarios = {formato: caminho_temporario(caminho) for formato, caminho in self.caminhos.items()}
+
+    def _criar(self, formato):
+        temporario = self._temporarios[formato]
+        if formato == 'pdf' and self.processos_pdf != 1:
+            self._saidas[formato] = RenderizadorPDFParalelo(temporario, self.processos_pdf or None, self.agrupamento)
+        elif formato == 'pdf' and self.agrupamento is not None:
+            self._saidas[formato] = RenderizadorPDFAgrupado(temporario, self.agrupamento)
+        else:
+            self._saidas[formato] = SAIDAS[formato](temporario)
+
+    def preparar(self):
+        for formato in self.caminhos:
+            if formato in PREPARAVEIS and formato not in self._saidas:
+                self._criar(formato)
+        return self
+
+    def _abrir(self):
+        for formato in self.caminhos:
+            if formato not in self._saidas:
+                self._criar(formato)
+        return [self._saidas[formato] for formato in self.caminhos]
+
+    def escrever(self, dados, progresso=None, cancelamento=None):
+        """Escreve os dados em todas as saídas, fecha e publica os arquivos; retorna a quantidade escrita
+
+        progresso(feitos, total) é chamado a cada INTERVALO_PROGRESSO materiais
+        quando `dados` tem tamanho conhecido; o cancelamento é verificado a
+        cada INTERVALO_CANCELAMENTO materiais.
+        """
+        quantidade = len(dados) if progresso and hasattr(dados, '__len__') else 0
+
+        def escrever_temporarios(_):
+            saidas = self._abrir()
+            total = 0
+            for material in dados:
+                for saida in saidas:
+                    saida.escrever(material)
+                total += 1
+                if cancelamento and not total % INTERVALO_CANCELAMENTO:
+                    cancelamento.verificar()
+                if quantidade and not total % INTERVALO_PROGRESSO:
+                    progresso(total, quantidade)
+            if cancelamento:
+                cancelamento.verificar()
+            for formato, saida in zip(self.caminhos, saidas):
+                saida.fechar()
+                del self._saidas[formato]
+            return total
+
+        try:
+            total = publicar_arquivos(self.caminhos, escrever_temporarios, self._temporarios)
+        except BaseException:
+            self.descartar()
+            raise
+        self._temporarios = {}
+        return total
+
+    def descartar(self):
+        """Fecha as saídas abertas e apaga os temporários (os arquivos finais não são tocados)"""
+        for formato in list(self._saidas):
+            saida = self._saidas.pop(formato)
+            try:
+                if hasattr(saida, 'descartar'):
+                    saida.descartar()
+                elif formato not in PREPARAVEIS:
+                    saida.fechar()
+            except Exception:
+                pass
+        # PDF e índice nunca fechados ficaram só em memória: o temporário pode nem existir
+        for temporario in self._temporarios.values():
+            try:
+                os.remove(temporario)
+            except OSError:
+                pass
+        self._temporarios = {}
+
+
+def escrever_saidas(dados, caminhos, progresso=None, cancelamento=None, processos_pdf=1, agrupamento=None):
+    """Percorre os dados uma única vez alimentando todas as saídas
+
+    caminhos: dict formato -> caminho. progresso(feitos, total) é chamado a
+    cada INTERVALO_PROGRESSO materiais quando `dados` tem tamanho conhecido.
+    Retorna a quantidade de materiais escritos.
+    """
+    return ConjuntoSaidas(caminhos, processos_pdf, agrupamento).escrever(dados, progresso, cancelamento)
@@ -0,0 +1,370 @@
+"""Modo serviço: processo local que responde ao bot com os materiais já em memória.
+
+O materialListService do bot relê todos os INI a cada lista pedida. Aqui a
+pasta é lida uma vez (o registro completo de cada INI, como em
+materiais.py, reaproveitando os registros do cache de parsing para os
+arquivos inalterados) e fica em memória; o monitoramento do modo watch
+(monitor.py) relê só os arquivos alterados e gera uma nova versão dos
+dados. Os pedidos chegam em JSON, um por linha, pela entrada padrão ou por
+um socket Unix, e cada resposta é uma linha JSON com o mesmo "id":
+
+    {"id": 1, "acao": "gerar", "saida": "C:/listas/lista.pdf", "espessura": 18}
+    {"id": 1, "ok": true, "saidas": {"pdf": "C:/listas/lista.pdf"}, "materiais": 812, ...}
+
+Ações:
+- gerar: lista de materiais (saida, formatos, familia, espessura, agrupar);
+- codigo: registro completo de um material (os campos do loadMaterial do bot);
+- buscar: busca aproximada (termo, limite, espessura), a mesma do índice de busca;
+- estado: quantidade de materiais, versão dos dados e backend do monitoramento;
+- atualizar: confere a pasta agora, sem esperar o monitoramento;
+- encerrar: termina o serviço.
+
+A cada versão os materiais são guardados já em ordem natural
+(ChavesNaturais só calcula as chaves dos materiais novos), então uma lista
+filtrada sai ordenada sem ordenar de novo. O índice de busca é montado uma
+vez por versão, no primeiro pedido, e uma lista já gerada para a mesma
+versão e opções é devolvida sem gerar de novo.
+"""
+import json
+import os
+import socketserver
+import stat
+import sys
+import threading
+import time
+
+from . import config
+from .busca import IndiceBusca, busca_linear_trigramas, construir_indice
+from .cache import CacheParsing
+from .exportacao import AGRUPAMENTOS, SEM_FAMILIA, ChavesNaturais, caminho_saida_padrao, letra_inicial
+from .fontes import VarreduraPasta
+from .materiais import CAMPOS_PADRAO, ArmazemMateriais, limpar_nome, processar_lote_materiais
+from .monitor import MonitorPasta
+from .parser import extrator_do_processo, novas_estatisticas
+from .saidas import caminhos_por_formato, escrever_saidas
+
+ACOES = ('gerar', 'codigo', 'buscar', 'estado', 'atualizar', 'encerrar')
+
+# Campos dos registros guardados no cache: com outros campos (ou outros padrões) eles são relidos
+ASSINATURA_CAMPOS = repr(CAMPOS_PADRAO)
+
+
+class PedidoInvalido(ValueError):
+    """Pedido sem os campos necessários ou com valores inválidos"""
+
+
+def _eh_inteiro(valor):
+    """Inteiro do JSON (true/false chegam como bool, que também é int no Python)"""
+    return isinstance(valor, int) and not isinstance(valor, bool)
+
+
+def processar_lote_servico(itens, extrator=None):
+    """Lê o registro completo de um lote de (caminho, tamanho, mtime_ns)
+
+    Retorna ([(caminho, tamanho, mtime_ns, (codigo, valores))], mensagens,
+    estatisticas), como o processar_lote_registros do parser; arquivos que
+    não puderam ser lidos ficam de fora.
+    """
+    extrator = extrator or extrator_do_processo()
+    resultados = []
+    mensagens = []
+    estatisticas = novas_estatisticas()
+    for caminho, tamanho, mtime_ns in itens:
+        registros, erros, contagem = processar_lote_materiais([caminho], extrator)
+        mensagens.extend(erros)
+        for chave, valor in contagem.items():
+            estatisticas[chave] += valor
+        if registros:
+            resultados.append((caminho, tamanho, mtime_ns, registros[0]))
+    return resultados, mensagens, estatisticas
+
+
+def _estado_saidas(caminhos):
+    """(tamanho, mtime_ns) de cada saída, para saber se o arquivo gerado ainda é o mesmo"""
+    estados = []
+    for caminho in caminhos.values():
+        try:
+            informacoes = os.stat(caminho)
+        except OSError:
+            return None
+        estados.append((informacoes.st_size, informacoes.st_mtime_ns))
+    return estados
+
+
+class ServicoMateriais(MonitorPasta):
+    """Materiais da pasta em memória, atualizados pelo monitoramento, servindo pedidos JSON
+
+    self.registros guarda caminho -> (tamanho, mtime_ns, (codigo, valores));
+    self.armazem é a versão atual dos dados (ArmazemMateriais em ordem
+    natural). Os pedidos e a aplicação das mudanças passam pela mesma trava,
+    então um pedido sempre vê uma versão inteira.
+    """
+
+    def __init__(self, pasta, caminho_pdf=None, workers=None, modo=None, usar_cache=True, intervalo=None,
+                 debounce=None, usar_watchdog=True, log=None, filtro=None):
+        super().__init__(pasta, caminho_pdf or caminho_saida_padrao(pasta), workers=workers, modo=modo,
+                         usar_cache=usar_cache, intervalo=intervalo, debounce=debounce,
+                         usar_watchdog=usar_watchdog, log=log, filtro=filtro)
+        self.armazem = ArmazemMateriais()
+        self.versao = 0
+        self.encerrado = threading.Event()
+        self._trava_dados = threading.RLock()
+        self._indice = None
+        self._geradas = {}
+
+    # ----- estado em memória -----
+
+    def carregar(self):
+        """Leitura inicial completa (só os arquivos fora do cache de registros são lidos)"""
+        if self.usar_cache and self._cache is None:
+            self._cache = CacheParsing.para_pasta(self.pasta)
+
+        entradas = list(VarreduraPasta(self.pasta, self.filtro).entradas())
+        if self._cache:
+            conhecidos, pendentes = self._cache.classificar_registros(entradas, ASSINATURA_CAMPOS)
+        else:
+            conhecidos, pendentes = {}, entradas
+
+        self.registros = dict(conhecidos)
+        self.ler_itens(pendentes)
+        self.log(f"Carregados {len(self.registros)} arquivos INI ({len(pendentes)} lidos do disco)")
+
+    def ler_itens(self, itens):
+        lido_ns = time.time_ns()
+        lidos = list(self.motor.mapear(processar_lote_servico, itens, len(itens), log=self.log))
+        for caminho, tamanho, mtime_ns, registro in lidos:
+            self.registros[caminho] = (tamanho, mtime_ns, registro)
+        if self._cache and lidos:
+            self._cache.gravar_registros(lidos, lido_ns)
+
+    def aplicar_mudancas(self, caminhos):
+        with self._trava_dados:
+            return super().aplicar_mudancas(caminhos)
+
+    def _diferencas_varredura(self):
+        with self._trava_dados:
+            return super()._diferencas_varredura()
+
+    def dados(self):
+        return self.armazem.dados()
+
+    def fechar(self):
+        # Sob a trava: o cache não é fechado no meio de uma atualização
+        with self._trava_dados:
+            super().fechar()
+
+    def regenerar(self):
+        """Monta a nova versão dos dados a partir dos registros em memória"""
+        inicio = time.perf_counter()
+        with self._trava_dados:
+            if self._chaves is None:
+                self._chaves = ChavesNaturais()
+            registros = [registro for _, _, registro in self.registros.values()]
+            # O nome é o primeiro campo de CAMPOS_PADRAO; a chave é a do par (campo1, codigo) da lista
+            pares = [(limpar_nome(valores[0]), codigo) for codigo, valores in registros]
+            chaves = self._chaves.chaves(pares)
+            armazem = ArmazemMateriais()
+            for indice in sorted(range(len(registros)), key=lambda i: chaves[pares[i]]):
+                armazem.adicionar(*registros[indice])
+            self.armazem = armazem
+            self.versao += 1
+            self._indice = None
+            self._geradas = {}
+        duracao = time.perf_counter() - inicio
+        self.log(f"Dados em memória: versão {self.versao}, {len(armazem)} materiais ({duracao:.2f}s)")
+        return {'versao': self.versao, 'materiais': len(armazem), 'tempo': round(duracao, 4)}
+
+    def atualizar(self):
+        """Confere a pasta inteira agora e aplica o que mudou; retorna True se algo mudou"""
+        with self._trava_dados:
+            alterado = self.aplicar_mudancas(self._diferencas_varredura())
+            if alterado:
+                self.regenerar()
+            return alterado
+
+    # ----- pedidos -----
+
+    def atender(self, pedido):
+        """Resposta (dict) de um pedido já decodificado; erros viram {'ok': False, 'erro': ...}"""
+        identificador = pedido.get('id') if isinstance(pedido, dict) else None
+        inicio = time.perf_counter()
+        try:
+            if not isinstance(pedido, dict):
+                raise PedidoInvalido("O pedido precisa ser um objeto JSON")
+            acao = pedido.get('acao')
+            if acao not in ACOES:
+                raise PedidoInvalido(f"Ação inválida: {acao} (use {', '.join(ACOES)})")
+            with self._trava_dados:
+                resposta = getattr(self, f'_pedido_{acao}')(pedido)
+        except ValueError as e:
+            resposta = {'ok': False, 'erro': str(e)}
+        except ImportError as e:
+            resposta = {'ok': False, 'erro': f"Dependência ausente: {e.name or e}"}
+        except Exception as e:
+            resposta = {'ok': False, 'erro': f"Erro ao processar: {e}"}
+        else:
+            resposta = dict(resposta, ok=True)
+        resposta['id'] = identificador
+        resposta['segundos'] = round(time.perf_counter() - inicio, 4)
+        return resposta
+
+    def atender_linha(self, linha):
+        """Linha JSON de resposta para uma linha JSON de pedido (None para linhas vazias)"""
+        if not linha.strip():
+            return None
+        try:
+            pedido = json.loads(linha)
+        except ValueError as e:
+            resposta = {'id': None, 'ok': False, 'erro': f"JSON inválido: {e}"}
+        else:
+            resposta = self.atender(pedido)
+        return json.dumps(resposta, ensure_ascii=False)
+
+    def _filtros(self, pedido):
+        filtros = {campo: pedido[campo] for campo in ('familia', 'espessura') if pedido.get(campo) is not None}
+        if 'espessura' in filtros and not _eh_inteiro(filtros['espessura']):
+            raise PedidoInvalido("'espessura' precisa ser um número inteiro")
+        return filtros
+
+    def _pedido_gerar(self, pedido):
+        if pedido.get('atualizar'):
+            self.atualizar()
+        formatos = pedido.get('formatos') or ('pdf',)
+        if isinstance(formatos, str):
+            formatos = [formato.strip() for formato in formatos.split(',') if formato.strip()]
+        caminhos = caminhos_por_formato(pedido.get('saida') or self.caminho_pdf, formatos)
+        filtros = self._filtros(pedido)
+        agrupar = pedido.get('agrupar') or None
+        if agrupar is not None and agrupar not in AGRUPAMENTOS:
+            raise PedidoInvalido(f"Agrupamento não suportado: {agrupar} (use {', '.join(AGRUPAMENTOS)})")
+
+        chave = (tuple(caminhos.items()), tuple(sorted(filtros.items())), agrupar)
+        gerada = self._geradas.get(chave)
+        if gerada is not None and gerada[0] == _estado_saidas(caminhos):
+            return dict(gerada[1], reaproveitado=True)
+
+        posicoes = self.armazem.filtrar(**filtros)
+        dados = self.armazem.dados(posicoes)
+        grupo = self._agrupamento(agrupar)
+        if grupo is not None:
+            # Os materiais já estão em ordem natural: a ordenação estável só separa os grupos
+            ordem_grupos = {}
+            for material in dados:
+                titulo = grupo(material)
+                if titulo not in ordem_grupos:
+                    ordem_grupos[titulo] = self._chaves.ordem_grupo(titulo)
+            dados.sort(key=lambda material: ordem_grupos[grupo(material)])
+        escrever_saidas(dados, caminhos, processos_pdf=config.PDF_PROCESSOS, agrupamento=grupo)
+        resultado = {'saida': next(iter(caminhos.values())), 'saidas': caminhos, 'materiais': len(dados),
+                     'versao': self.versao}
+        self._geradas[chave] = (_estado_saidas(caminhos), resultado)
+        self.log(f"Lista gerada: {resultado['saida']} ({len(dados)} materiais)")
+        return dict(resultado, reaproveitado=False)
+
+    def _agrupamento(self, agrupar):
+        if agrupar == 'letra':
+            return letra_inicial
+        if agrupar == 'familia':
+            armazem = self.armazem
+            return lambda material: armazem.valor('familia', armazem.posicao(material[1])) or SEM_FAMILIA
+        return None
+
+    def _pedido_codigo(self, pedido):
+        codigo = pedido.get('codigo')
+        if codigo is None:
+            raise PedidoInvalido("Informe o 'codigo' do material")
+        posicao = self.armazem.posicao(str(codigo))
+        return {'material': None if posicao is None else self.armazem.registro(posicao), 'versao': self.versao}
+
+    def _pedido_buscar(self, pedido):
+        termo = pedido.get('termo')
+        if not isinstance(termo, str) or not termo.strip():
+            raise PedidoInvalido("Informe o 'termo' da busca")
+        limite = pedido.get('limite')
+        if limite is None:
+            limite = 10
+        elif not _eh_inteiro(limite) or limite < 1:
+            raise PedidoInvalido("'limite' precisa ser um número inteiro maior que zero")
+        filtros = self._filtros(pedido)
+        if filtros:
+            # Com filtro, a busca percorre só os materiais filtrados (o índice cobre a base inteira)
+            dados = self.armazem.dados(self.armazem.filtrar(**filtros))
+            resultados = busca_linear_trigramas(dados, termo, limite)
+        else:
+            if self._indice is None:
+                self._indice = IndiceBusca(construir_indice(self.armazem.dados()))
+            resultados = self._indice.buscar(termo, limite)
+        return {'resultados': [resultado._asdict() for resultado in resultados], 'versao': self.versao}
+
+    def _pedido_estado(self, pedido):
+        return {'pasta': self.pasta, 'arquivos': len(self.registros), 'materiais': len(self.armazem),
+                'versao': self.versao, 'backend': self.backend}
+
+    def _pedido_atualizar(self, pedido):
+        return {'alterado': self.atualizar(), 'versao': self.versao, 'materiais': len(self.armazem)}
+
+    def _pedido_encerrar(self, pedido):
+        self.encerrado.set()
+        self.parar()
+        return {}
+
+    # ----- execução -----
+
+    def iniciar_monitoramento(self):
+        """Carrega a pasta, liga o monitoramento e acompanha as mudanças numa thread"""
+        self.iniciar()
+        threading.Thread(target=self.acompanhar, name='corte-certo-servico', daemon=True).start()
+
+
+def atender_fluxo(servico, entrada=None, saida=None):
+    """Responde aos pedidos lidos da entrada (uma linha JSON cada) até o fim dela ou 'encerrar'"""
+    entrada = entrada or sys.stdin
+    saida = saida or sys.stdout
+    for linha in entrada:
+        resposta = servico.atender_linha(linha)
+        if resposta is None:
+            continue
+        saida.write(resposta + '\n')
+        saida.flush()
+        if servico.encerrado.is_set():
+            break
+
+
+def atender_socket(servico, caminho):
+    """Responde aos pedidos de várias conexões no socket Unix `caminho` até 'encerrar'"""
+    if not hasattr(socketserver, 'ThreadingUnixStreamServer'):
+        raise OSError("Socket Unix não disponível neste sistema: use a entrada padrão")
+
+    class _Conexao(socketserver.StreamRequestHandler):
+        def handle(self):
+            for linha in self.rfile:
+                resposta = servico.atender_linha(linha.decode('utf-8'))
+                if resposta is None:
+                    continue
+                self.wfile.write(resposta.encode('utf-8') + b'\n')
+                self.wfile.flush()
+                if servico.encerrado.is_set():
+                    # shutdown() espera o serve_forever terminar: não pode rodar na thread dele
+                    threading.Thread(target=servidor.shutdown, daemon=True).start()
+                    return
+
+    try:
+        modo = os.lstat(caminho).st_mode
+    except FileNotFoundError:
+        pass
+    else:
+        # Só um socket que sobrou de uma execução anterior pode ser apagado
+        if not stat.S_ISSOCK(modo):
+            raise FileExistsError(f"{caminho} já existe e não é um socket: informe outro caminho em --socket")
+        os.remove(caminho)
+    servidor = socketserver.ThreadingUnixStreamServer(caminho, _Conexao)
+    servidor.daemon_threads = True
+    servico.log(f"Atendendo em {caminho}")
+    try:
+        servidor.serve_forever()
+    finally:
+        servidor.server_close()
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
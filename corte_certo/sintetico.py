@@ -0,0 +1,168 @@
+"""Gerador de bases de materiais sintéticas para o benchmark.
+
+Monta pastas no formato da pasta MAT do Corte Certo (M{codigo}.INI) com
+tamanho configurável, subpastas aninhadas e arquivos em UTF-8, Latin-1 e
+cp1252 misturados (cada pasta tem uma codificação predominante, com alguns
+arquivos "fora do padrão", como acontece nas bases reais). Opcionalmente
+gera cópias .zip e .rar da pasta (o .rar só se o executável do WinRAR/rar
+estiver disponível).
+
+Os arquivos são determinísticos para uma mesma semente, então duas
+execuções do benchmark medem exatamente a mesma base.
+"""
+import os
+import random
+import shutil
+import subprocess
+import zipfile
+
+CORES = [
+    'Branco', 'Preto', 'Carvalho', 'Nogueira', 'Cinza Cristal', 'Amêndoa', 'Freijó',
+    'Jequitibá', 'Açaí', 'Grafite', 'Louro Freijó', 'Castanho', 'Areia', 'Titânio',
+    'Cerejeira', 'Mogno', 'Marfim', 'Ébano', 'Pau-Ferro', 'Rovere',
+]
+TIPOS = ['MDF', 'MDP', 'Compensado', 'HDF', 'OSB']
+ACABAMENTOS = ['TX', 'Brilho', 'Matt', 'Essencial', 'Trama', 'Linho', 'Nature', '']
+ESPESSURAS = [3, 6, 9, 12, 15, 18, 25]
+
+# Caracteres que só existem no cp1252 (não no Latin-1): travessão e aspas curvas
+EXTRAS_CP1252 = [' – Premium', ' “Design”', ' – Linha Nova']
+
+CODIFICACOES = ('utf-8', 'latin-1', 'cp1252')
+
+# Proporção de arquivos sem CAMPO1 (INI incompleto/corrompido)
+PROPORCAO_SEM_CAMPO1 = 0.01
+
+
+def _nome_material(aleatorio, codificacao):
+    nome = f"{aleatorio.choice(CORES)} {aleatorio.choice(TIPOS)} {aleatorio.choice(ESPESSURAS)}mm"
+    acabamento = aleatorio.choice(ACABAMENTOS)
+    if acabamento:
+        nome += f" {acabamento}"
+    if codificacao == 'cp1252' and aleatorio.random() < 0.3:
+        nome += aleatorio.choice(EXTRAS_CP1252)
+    return nome
+
+
+def conteudo_ini(codigo, aleatorio, codificacao):
+    """Conteúdo (bytes) de um M{codigo}.INI com as seções que o bot e o exportador leem"""
+    tipo = aleatorio.choice(TIPOS)
+    linhas = ['[DESC]']
+    if aleatorio.random() >= PROPORCAO_SEM_CAMPO1:
+        linhas.append(f'CAMPO1={_nome_material(aleatorio, codificacao)}')
+    linhas += [
+        f'CAMPO2=Material {codigo}',
+        f'FAMILIA={tipo}',
+        f'FORNECEDOR=Fornecedor {aleatorio.randint(1, 40)}',
+        '',
+        '[PROP_FISIC]',
+        f'ESPESSURA={aleatorio.choice(ESPESSURAS)}',
+        f'VEIO_HORIZONTAL={aleatorio.randint(0, 1)}',
+        f'VEIO_VERTICAL={aleatorio.randint(0, 1)}',
+        f'GIRO={aleatorio.randint(0, 1)}',
+        f'DENSIDADE={aleatorio.randint(550, 800)}',
+        '',
+        '[PROP_COMERC]',
+        f'PRECO_CHAPA={aleatorio.uniform(80, 900):.2f}',
+        f'PRECO_M2={aleatorio.uniform(15, 180):.2f}',
+        '',
+        '[ESTOQUE]',
+        f'QTD_MIN_CHP={aleatorio.choice([0, 5, 10, 15, 20])}',
+        '',
+        '[CORTE]',
+    ]
+    # Parâmetros de corte: deixam o arquivo com o tamanho típico (1-3 KB)
+    linhas += [f'PARAM{i:02d}={aleatorio.randint(0, 9999)}' for i in range(aleatorio.randint(40, 120))]
+    return ('\r\n'.join(linhas) + '\r\n').encode(codificacao)
+
+
+def _pastas(raiz, quantidade, aleatorio):
+    """Raiz + subpastas aninhadas (até 3 níveis), cada uma com uma codificação predominante"""
+    pastas = [(raiz, 'utf-8')]
+    for i in range(max(1, quantidade // 2000)):
+        grupo = os.path.join(raiz, f'GRUPO_{i:02d}')
+        pastas.append((grupo, aleatorio.choice(CODIFICACOES)))
+        for j in range(aleatorio.randint(1, 3)):
+            sub = os.path.join(grupo, f'SUB_{j}')
+            pastas.append((sub, aleatorio.choice(CODIFICACOES)))
+            if aleatorio.random() < 0.5:
+                pastas.append((os.path.join(sub, 'ANTIGOS'), aleatorio.choice(CODIFICACOES)))
+    return pastas
+
+
+def gerar_pasta(destino, quantidade, semente=42):
+    """Cria `quantidade` arquivos M*.INI em `destino`; retorna o total de bytes escritos"""
+    aleatorio = random.Random(semente)
+    pastas = _pastas(destino, quantidade, aleatorio)
+    for pasta, _ in pastas:
+        os.makedirs(pasta, exist_ok=True)
+
+    total_bytes = 0
+    for codigo in range(1, quantidade + 1):
+        # Metade na raiz, o resto espalhado pelas subpastas
+        pasta, codificacao = pastas[0] if aleatorio.random() < 0.5 else aleatorio.choice(pastas)
+        if aleatorio.random() < 0.2:
+            codificacao = aleatorio.choice(CODIFICACOES)
+        conteudo = conteudo_ini(codigo, aleatorio, codificacao)
+        with open(os.path.join(pasta, f'M{codigo}.INI'), 'wb') as arquivo:
+            arquivo.write(conteudo)
+        total_bytes += len(conteudo)
+    return total_bytes
+
+
+def gerar_zip(pasta, caminho_zip):
+    """Cópia compactada da pasta, com os caminhos relativos à raiz da pasta"""
+    with zipfile.ZipFile(caminho_zip, 'w', zipfile.ZIP_DEFLATED) as arquivo_zip:
+        for raiz, _, arquivos in os.walk(pasta):
+            for nome in sorted(arquivos):
+                caminho = os.path.join(raiz, nome)
+                arquivo_zip.write(caminho, os.path.relpath(caminho, pasta))
+    return caminho_zip
+
+
+def localizar_rar():
+    """Executável capaz de criar .rar (rar ou WinRAR), ou None"""
+    candidatos = [shutil.which('rar'), shutil.which('WinRAR')]
+    if os.name == 'nt':
+        candidatos += [r'C:\Program Files\WinRAR\Rar.exe', r'C:\Program Files (x86)\WinRAR\Rar.exe']
+    for candidato in candidatos:
+        if candidato and os.path.exists(candidato):
+            return candidato
+    return None
+
+
+def gerar_rar(pasta, caminho_rar):
+    """Cópia .rar da pasta; retorna None se não houver executável para criar RAR"""
+    executavel = localizar_rar()
+    if executavel is None:
+        return None
+    if os.path.exists(caminho_rar):
+        os.remove(caminho_rar)
+    subprocess.run([executavel, 'a', '-r', '-ep1', '-idq', caminho_rar, os.path.join(pasta, '*')],
+                   check=True, stdout=subprocess.DEVNULL)
+    return caminho_rar
+
+
+def gerar_base(destino, quantidade, semente=42, compactados=('zip', 'rar'), log=None):
+    """Gera a pasta mat_{quantidade} e as cópias compactadas pedidas dentro de `destino`
+
+    Retorna dict com os caminhos gerados ('pasta', 'zip', 'rar') e o total de bytes.
+    """
+    log = log or (lambda mensagem: None)
+    pasta = os.path.join(destino, f'mat_{quantidade}')
+    if os.path.exists(pasta):
+        shutil.rmtree(pasta)
+    total_bytes = gerar_pasta(pasta, quantidade, semente)
+    log(f"Gerados {quantidade} arquivos INI em {pasta} ({total_bytes / 1024 / 1024:.1f} MB)")
+
+    resultado = {'pasta': pasta, 'arquivos': quantidade, 'bytes': total_bytes}
+    if 'zip' in compactados:
+        resultado['zip'] = gerar_zip(pasta, pasta + '.zip')
+        log(f"ZIP gerado: {resultado['zip']}")
+    if 'rar' in compactados:
+        resultado['rar'] = gerar_rar(pasta, pasta + '.rar')
+        if resultado['rar']:
+            log(f"RAR gerado: {resultado['rar']}")
+        else:
+            log("RAR não gerado: executável rar/WinRAR não encontrado")
+    return resultado
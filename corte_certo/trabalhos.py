@@ -0,0 +1,243 @@
+"""Trabalhos em lote: várias origens (filiais, cópias arquivadas) exportadas de uma vez.
+
+A lista de trabalhos é um JSON:
+
+    [
+        {"origem": "C:\\CC_DATA_BASE\\MAT", "saida": "C:\\Listas\\matriz.pdf"},
+        {"origem": "D:\\Filial2\\MAT.zip", "saida": "C:\\Listas\\filial2.pdf", "formatos": ["pdf", "csv"]}
+    ]
+
+(ou {"trabalhos": [...]}), ou um texto com uma linha "origem;saida" por
+trabalho. Sem "saida", o PDF vai para o lugar padrão da origem.
+
+Os trabalhos rodam em paralelo (até TRABALHOS_SIMULTANEOS ao mesmo tempo),
+mas o parsing de todos vai para um único pool limitado, então o total de
+workers não cresce com a quantidade de trabalhos. Trabalhos com a mesma
+origem (e os mesmos filtros) leem os INI uma única vez.
+"""
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+
+from . import config
+from .exportacao import Exportador, caminho_saida_padrao
+from .parser import criar_pool, workers_padrao
+from .pipeline import INTERVALO_CANCELAMENTO, Cancelamento, ExportacaoCancelada
+
+Trabalho = namedtuple('Trabalho', 'origem saida formatos filtros', defaults=(None, ('pdf',), None))
+
+# Situação de cada trabalho
+AGUARDANDO = 'aguardando'
+EXECUTANDO = 'executando'
+CONCLUIDO = 'concluido'
+FALHOU = 'falhou'
+CANCELADO = 'cancelado'
+
+
+def carregar_trabalhos(caminho):
+    """Lê a lista de trabalhos de um JSON ou de um texto 'origem;saida' por linha"""
+    with open(caminho, encoding='utf-8-sig') as arquivo:
+        conteudo = arquivo.read()
+    base = os.path.dirname(os.path.abspath(caminho))
+
+    def resolver(valor):
+        # Caminhos relativos valem a partir da pasta da lista
+        return os.path.normpath(os.path.join(base, valor)) if valor else None
+
+    trabalhos = []
+    if caminho.lower().endswith('.json'):
+        itens = json.loads(conteudo)
+        if isinstance(itens, dict):
+            itens = itens.get('trabalhos', [])
+        for item in itens:
+            if isinstance(item, str):
+                item = {'origem': item}
+            if not item.get('origem'):
+                raise ValueError(f"Trabalho sem 'origem' na lista {caminho}: {item}")
+            formatos = item.get('formatos') or ('pdf',)
+            if isinstance(formatos, str):
+                formatos = [f.strip() for f in formatos.split(',') if f.strip()]
+            filtros = {campo: item[campo] for campo in ('familia', 'espessura') if item.get(campo) is not None}
+            trabalhos.append(Trabalho(resolver(item['origem']), resolver(item.get('saida')),
+                                      tuple(formatos), filtros or None))
+    else:
+        for linha in conteudo.splitlines():
+            linha = linha.strip()
+            if not linha or linha.startswith('#'):
+                continue
+            origem, _, saida = linha.partition(';')
+            trabalhos.append(Trabalho(resolver(origem.strip()), resolver(saida.strip())))
+    if not trabalhos:
+        raise ValueError(f"Nenhum trabalho na lista {caminho}")
+    return trabalhos
+
+
+class LeiturasCompartilhadas:
+    """Leitura de cada origem feita uma vez e entregue a todos os trabalhos que a pedirem
+
+    O primeiro trabalho com uma chave faz a leitura; os outros esperam o
+    resultado (verificando o cancelamento). Se a leitura falhar, quem estava
+    esperando recebe o mesmo erro e a chave é liberada para uma nova tentativa.
+    """
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self._leituras = {}
+
+    def obter(self, chave, ler, cancelamento=None):
+        """Retorna (resultado, reaproveitado)"""
+        with self._trava:
+            futuro = self._leituras.get(chave)
+            dono = futuro is None
+            if dono:
+                futuro = self._leituras[chave] = Future()
+
+        if dono:
+            try:
+                futuro.set_result(ler())
+            except BaseException as e:
+                with self._trava:
+                    del self._leituras[chave]
+                futuro.set_exception(e)
+                raise
+            return futuro.result(), False
+
+        while True:
+            if cancelamento:
+                cancelamento.verificar()
+            try:
+                return futuro.result(timeout=INTERVALO_CANCELAMENTO), True
+            except TimeoutError:
+                continue
+
+
+class ExecutorTrabalhos:
+    """Executa os trabalhos em paralelo sobre um pool de parsing compartilhado
+
+    log(indice, mensagem) e progresso(indice, percentual) informam cada
+    trabalho separadamente; self.situacoes e self.percentuais têm o estado
+    atual de todos (a interface lê daí). executar() retorna o resumo geral.
+    """
+
+    def __init__(self, trabalhos, workers=None, modo=None, simultaneos=None, usar_cache=True,
+                 log=None, progresso=None, cancelamento=None):
+        self.trabalhos = list(trabalhos)
+        self.modo = (modo or config.POOL_MODO).lower()
+        self.workers = workers or config.POOL_WORKERS or workers_padrao(self.modo)
+        self.simultaneos = max(1, min(simultaneos or config.TRABALHOS_SIMULTANEOS, len(self.trabalhos)))
+        self.usar_cache = usar_cache
+        self.log = log or (lambda indice, mensagem: None)
+        self.progresso = progresso or (lambda indice, percentual: None)
+        self.cancelamento = cancelamento or Cancelamento()
+        self.situacoes = [AGUARDANDO] * len(self.trabalhos)
+        self.percentuais = [0] * len(self.trabalhos)
+        self.resultados = [None] * len(self.trabalhos)
+        self.leituras = LeiturasCompartilhadas()
+
+    def cancelar(self):
+        self.cancelamento.cancelar()
+
+    @property
+    def percentual_geral(self):
+        """Média dos trabalhos; os que já terminaram (mesmo com falha) contam como 100"""
+        if not self.percentuais:
+            return 100
+        feitos = [100 if situacao in (CONCLUIDO, FALHOU, CANCELADO) else percentual
+                  for situacao, percentual in zip(self.situacoes, self.percentuais)]
+        return int(sum(feitos) / len(feitos))
+
+    def executar(self):
+        inicio = time.perf_counter()
+        pool = criar_pool(self.modo, self.workers)
+        try:
+            with ThreadPoolExecutor(max_workers=self.simultaneos, thread_name_prefix='corte-certo-trabalho') as fila:
+                for indice in range(len(self.trabalhos)):
+                    fila.submit(self._executar_trabalho, indice, pool)
+        finally:
+            pool.shutdown(wait=not self.cancelamento.cancelado, cancel_futures=self.cancelamento.cancelado)
+        return self.resumo(time.perf_counter() - inicio)
+
+    def _executar_trabalho(self, indice, pool):
+        trabalho = self.trabalhos[indice]
+        if self.cancelamento.cancelado:
+            self._finalizar(indice, CANCELADO, {'erro': "Processamento cancelado"})
+            return
+        self.situacoes[indice] = EXECUTANDO
+        inicio = time.perf_counter()
+
+        def progresso(percentual):
+            self.percentuais[indice] = percentual
+            self.progresso(indice, percentual)
+
+        try:
+            exportador = Exportador(
+                trabalho.origem,
+                trabalho.saida or caminho_saida_padrao(trabalho.origem),
+                workers=self.workers,
+                modo=self.modo,
+                usar_cache=self.usar_cache,
+                log=lambda mensagem: self.log(indice, mensagem),
+                progresso=progresso,
+                formatos=trabalho.formatos,
+                filtros=trabalho.filtros,
+                cancelamento=self.cancelamento,
+                pool=pool,
+                leituras=self.leituras
+            )
+            resumo = exportador.executar()
+        except ExportacaoCancelada as e:
+            self._finalizar(indice, CANCELADO, {'erro': str(e)})
+        except Exception as e:
+            self.log(indice, f"Erro: {e}")
+            self._finalizar(indice, FALHOU, {'erro': str(e)})
+        else:
+            progresso(100)
+            self._finalizar(indice, CONCLUIDO, {
+                'saida': resumo['saida'],
+                'materiais': resumo['materiais'],
+                'arquivos': resumo['arquivos'],
+            })
+        self.resultados[indice]['segundos'] = round(time.perf_counter() - inicio, 4)
+
+    def _finalizar(self, indice, situacao, dados):
+        trabalho = self.trabalhos[indice]
+        self.resultados[indice] = dict(dados, origem=trabalho.origem, situacao=situacao, segundos=0.0)
+        self.situacoes[indice] = situacao
+
+    def resumo(self, segundos):
+        """Resumo geral do lote: um item por trabalho e as contagens por situação"""
+        resultados = [
+            resultado or {'origem': trabalho.origem, 'situacao': CANCELADO}
+            for resultado, trabalho in zip(self.resultados, self.trabalhos)
+        ]
+        contagem = {situacao: 0 for situacao in (CONCLUIDO, FALHOU, CANCELADO)}
+        for resultado in resultados:
+            contagem[resultado['situacao']] = contagem.get(resultado['situacao'], 0) + 1
+        return {
+            'trabalhos': resultados,
+            'concluidos': contagem[CONCLUIDO],
+            'falhas': contagem[FALHOU],
+            'cancelados': contagem[CANCELADO],
+            'materiais': sum(r.get('materiais', 0) for r in resultados),
+            'total_segundos': round(segundos, 4),
+            'workers': self.workers,
+            'modo': self.modo,
+        }
+
+
+def linhas_resumo(resumo):
+    """Resumo do lote legível, uma linha por trabalho, para o log"""
+    linhas = [
+        f"Lote: {resumo['concluidos']} concluídos, {resumo['falhas']} com falha, "
+        f"{resumo['cancelados']} cancelados - {resumo['materiais']} materiais em {resumo['total_segundos']:.2f}s"
+    ]
+    for resultado in resumo['trabalhos']:
+        if resultado['situacao'] == CONCLUIDO:
+            detalhe = f"{resultado['materiais']} materiais -> {resultado['saida']}"
+        else:
+            detalhe = resultado.get('erro', '')
+        linhas.append(f"  [{resultado['situacao']}] {resultado['origem']}: {detalhe}")
+    return linhas
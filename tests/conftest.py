@@ -0,0 +1,48 @@
+"""Bases de materiais pequenas, escritas em pastas temporárias"""
+import os
+import time
+
+import pytest
+
+
+def escrever_ini(pasta, codigo, campo1, familia='MDF', espessura=18, qtd_min=5, codificacao='utf-8'):
+    """Grava o M{codigo}.INI com as seções lidas pelo exportador e pelo relatório de estoque"""
+    os.makedirs(pasta, exist_ok=True)
+    linhas = [
+        '[DESC]', f'CAMPO1={campo1}', f'FAMILIA={familia}', '',
+        '[PROP_FISIC]', f'ESPESSURA={espessura}', '',
+        '[PROP_COMERC]', 'PRECO_CHAPA=100.00', '',
+        '[ESTOQUE]', f'QTD_MIN_CHP={qtd_min}',
+    ]
+    caminho = os.path.join(pasta, f'M{codigo}.INI')
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(('\r\n'.join(linhas) + '\r\n').encode(codificacao))
+    return caminho
+
+
+def editar_no_lugar(caminho, campo1):
+    """Reescreve o CAMPO1 do arquivo sem mexer na pasta (o mtime do arquivo avança 1s)"""
+    pasta = os.path.dirname(caminho)
+    estado_pasta = os.stat(pasta)
+    mtime_ns = os.stat(caminho).st_mtime_ns + 1_000_000_000
+    with open(caminho, 'rb') as arquivo:
+        linhas = arquivo.read().split(b'\r\n')
+    linhas[1] = f'CAMPO1={campo1}'.encode('utf-8')
+    with open(caminho, 'wb') as arquivo:
+        arquivo.write(b'\r\n'.join(linhas))
+    os.utime(caminho, ns=(mtime_ns, mtime_ns))
+    os.utime(pasta, ns=(estado_pasta.st_atime_ns, estado_pasta.st_mtime_ns))
+
+
+@pytest.fixture
+def base(tmp_path):
+    """Pasta MAT com uma subpasta e três materiais"""
+    pasta = tmp_path / 'MAT'
+    escrever_ini(str(pasta), 1, 'Branco Tx 18mm')
+    escrever_ini(str(pasta), 2, 'Carvalho 15mm', familia='MDP', espessura=15)
+    escrever_ini(str(pasta / 'sub'), 10, 'Preto Fosco 6mm', espessura=6)
+    # Pastas alteradas há pouco não entram no índice de pastas: envelhece todas
+    antigo = time.time_ns() - 3600 * 1_000_000_000
+    for caminho in (pasta / 'sub', pasta):
+        os.utime(caminho, ns=(antigo, antigo))
+    return pasta
@@ -0,0 +1,50 @@
+"""Índice de busca: mesmos resultados da busca material por material"""
+import pytest
+
+pytest.importorskip('numpy')
+
+from corte_certo.busca import (  # noqa: E402
+    BONUS_CODIGO, BONUS_CONTEM, IndiceBusca, busca_linear, busca_linear_trigramas, construir_indice,
+)
+
+MATERIAIS = [
+    ('Açaí 18mm', '1'),
+    ('Painel Acaizeiro Rústico Extra Largo Texturizado Premium 18mm', '2'),
+    ('Cristal Acetinado Extra Largo Premium Borda Cinza 15mm', '3'),
+    ('Cinza Cristal 15mm', '4'),
+    ('Branco Tx 15mm', '12'),
+    ('Preto Fosco 6mm', '²'),
+]
+
+
+@pytest.fixture
+def indice():
+    return IndiceBusca(construir_indice(MATERIAIS))
+
+
+def codigos(resultados):
+    return [resultado.codigo for resultado in resultados]
+
+
+def test_quem_contem_o_termo_entra_mesmo_abaixo_da_pontuacao_minima(indice):
+    resultados = indice.buscar('acai', limite=50)
+
+    assert set(codigos(resultados)) >= {codigo for _, codigo in busca_linear(MATERIAIS, 'acai')}
+    assert '2' in codigos(resultados)
+    assert all(r.pontuacao >= BONUS_CONTEM for r in resultados if r.codigo in ('1', '2'))
+
+
+def test_quem_tem_todos_os_trigramas_entra_mesmo_abaixo_da_pontuacao_minima(indice):
+    # '3' tem 'cinza' e 'cristal' fora de ordem, num nome longo (Dice baixo)
+    assert codigos(indice.buscar('cinza cristal', limite=50))[:2] == ['4', '3']
+
+
+@pytest.mark.parametrize('termo', ['acai', 'cinza cristal', '15', 'x', 'tx 15', '12', 'madeira'])
+def test_indice_igual_a_referencia_linear(indice, termo):
+    assert indice.buscar(termo, limite=50) == busca_linear_trigramas(MATERIAIS, termo, limite=50)
+
+
+def test_codigos_com_digitos_nao_decimais(indice):
+    assert indice.buscar('12')[0] == ('12', 'Branco Tx 15mm', pytest.approx(BONUS_CODIGO, abs=1.0))
+    # '²' passa no isdigit(), mas o int() recusa: não é um código numérico do índice
+    assert indice.buscar('²') == []
@@ -0,0 +1,96 @@
+"""CacheParsing: arquivos alterados ou removidos nunca são servidos do cache"""
+import os
+import time
+
+from conftest import editar_no_lugar, escrever_ini
+from corte_certo.cache import CacheParsing, hash_conteudo
+from corte_certo.fontes import itens_com_stat
+
+
+def registros_lidos(caminhos):
+    """Registros (caminho, tamanho, mtime_ns, hash, campo1) como o parser grava"""
+    registros = []
+    for caminho, tamanho, mtime_ns in itens_com_stat(caminhos):
+        with open(caminho, 'rb') as arquivo:
+            registros.append((caminho, tamanho, mtime_ns, hash_conteudo(arquivo.read()), 'x'))
+    return registros
+
+
+def test_arquivo_alterado_fica_pendente(tmp_path):
+    caminhos = [escrever_ini(str(tmp_path), codigo, f'Material {codigo}') for codigo in (1, 2)]
+    with CacheParsing(str(tmp_path / 'cache.sqlite'), str(tmp_path)) as cache:
+        cache.gravar(registros_lidos(caminhos))
+
+        editar_no_lugar(caminhos[0], 'Material 1 novo')
+        conhecidos, pendentes = cache.separar(caminhos)
+
+    assert set(conhecidos) == {caminhos[1]}
+    assert [caminho for caminho, _, _ in pendentes] == [caminhos[0]]
+
+
+def test_arquivo_removido_sai_do_cache(tmp_path):
+    caminhos = [escrever_ini(str(tmp_path), codigo, f'Material {codigo}') for codigo in (1, 2)]
+    with CacheParsing(str(tmp_path / 'cache.sqlite'), str(tmp_path)) as cache:
+        cache.gravar(registros_lidos(caminhos))
+        os.remove(caminhos[0])
+        cache.separar(caminhos[1:])
+        assert cache.removidos == 1
+
+        escrever_ini(str(tmp_path), 1, 'Material 1')
+        _, pendentes = cache.separar(caminhos)
+    assert [caminho for caminho, _, _ in pendentes] == [caminhos[0]]
+
+
+def test_mtime_ambiguo_so_vale_com_o_mesmo_hash(tmp_path):
+    caminhos = [escrever_ini(str(tmp_path), codigo, f'Material {codigo}') for codigo in (1, 2)]
+    with CacheParsing(str(tmp_path / 'cache.sqlite'), str(tmp_path)) as cache:
+        # Lidos no mesmo segundo do mtime: uma gravação logo depois não mudaria o mtime num FAT
+        cache.gravar(registros_lidos(caminhos), lido_ns=time.time_ns())
+
+        estado = os.stat(caminhos[0])
+        editar_no_lugar(caminhos[0], 'Material 9')  # mesmo tamanho
+        os.utime(caminhos[0], ns=(estado.st_atime_ns, estado.st_mtime_ns))
+        conhecidos, pendentes = cache.separar(caminhos)
+
+    assert set(conhecidos) == {caminhos[1]}
+    assert [caminho for caminho, _, _ in pendentes] == [caminhos[0]]
+
+
+def test_mtime_antigo_dispensa_o_hash(tmp_path):
+    caminho = escrever_ini(str(tmp_path), 1, 'Material 1')
+    antigo = time.time_ns() - 3600 * 1_000_000_000
+    os.utime(caminho, ns=(antigo, antigo))
+    with CacheParsing(str(tmp_path / 'cache.sqlite'), str(tmp_path)) as cache:
+        # Hash que não confere: só é usado quando o mtime é ambíguo
+        cache.gravar([(c, t, m, 'outro', 'x') for c, t, m in itens_com_stat([caminho])])
+        conhecidos, pendentes = cache.separar([caminho])
+
+    assert conhecidos == {caminho: (os.path.getsize(caminho), antigo, 'x')}
+    assert not pendentes
+
+
+def test_registros_completos_do_modo_servico(tmp_path):
+    caminhos = [escrever_ini(str(tmp_path), codigo, f'Material {codigo}') for codigo in (1, 2)]
+    # mtime bem antes da leitura: os registros não guardam hash para desempatar
+    antigo = time.time_ns() - 3600 * 1_000_000_000
+    for caminho in caminhos:
+        os.utime(caminho, ns=(antigo, antigo))
+    itens = itens_com_stat(caminhos)
+    registros = [(c, t, m, (c[-5], ('Material', 'MDF', 18, False, 1.5))) for c, t, m in itens]
+    with CacheParsing(str(tmp_path / 'cache.sqlite'), str(tmp_path)) as cache:
+        # Como na partida do serviço: classifica, lê os pendentes e grava
+        assert cache.classificar_registros(itens, 'campos') == ({}, itens)
+        cache.gravar_registros(registros)
+
+        conhecidos, pendentes = cache.classificar_registros(itens, 'campos')
+        assert conhecidos[caminhos[0]] == (itens[0][1], itens[0][2], ('1', ('Material', 'MDF', 18, False, 1.5)))
+        assert not pendentes
+
+        editar_no_lugar(caminhos[0], 'Material 1 novo')
+        conhecidos, pendentes = cache.classificar_registros(itens_com_stat(caminhos), 'campos')
+        assert set(conhecidos) == {caminhos[1]}
+        assert [caminho for caminho, _, _ in pendentes] == [caminhos[0]]
+
+        # Outros campos extraídos: nada do que foi gravado serve
+        conhecidos, pendentes = cache.classificar_registros(itens_com_stat(caminhos), 'outros campos')
+        assert not conhecidos and len(pendentes) == 2
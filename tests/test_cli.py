@@ -0,0 +1,58 @@
+"""Linha de comando: códigos de saída e resumo em --json"""
+import json
+import sys
+
+import pytest
+
+pytest.importorskip('natsort')
+
+from corte_certo import cli, saidas  # noqa: E402
+
+
+def executar(capsys, *argumentos):
+    codigo = cli.main(['-q', '--json', *map(str, argumentos)])
+    return codigo, json.loads(capsys.readouterr().out)
+
+
+def test_sucesso_com_resumo_json(base, tmp_path, capsys):
+    codigo, resumo = executar(capsys, base, '-o', tmp_path / 'lista.pdf', '-f', 'csv,jsonl', '--forcar')
+
+    assert codigo == cli.SAIDA_OK
+    assert resumo['ok'] and resumo['codigo_saida'] == cli.SAIDA_OK
+    assert resumo['materiais'] == 3
+    assert set(resumo['saidas']) == {'csv', 'jsonl'}
+    assert (tmp_path / 'lista.jsonl').exists()
+
+
+def test_sem_json_imprime_os_arquivos_gerados(base, tmp_path, capsys):
+    assert cli.main(['-q', str(base), '-o', str(tmp_path / 'lista.csv'), '-f', 'csv']) == cli.SAIDA_OK
+    saida = capsys.readouterr().out
+    assert f"Gerado: {tmp_path / 'lista.csv'}" in saida
+    assert '3 materiais' in saida
+
+
+def test_origem_inexistente(tmp_path, capsys):
+    codigo, resumo = executar(capsys, tmp_path / 'nao-existe', '-o', tmp_path / 'lista.pdf')
+    assert codigo == cli.SAIDA_ORIGEM_INEXISTENTE
+    assert not resumo['ok'] and resumo['erro']
+
+
+def test_pasta_sem_materiais(tmp_path, capsys):
+    (tmp_path / 'vazia').mkdir()
+    codigo, resumo = executar(capsys, tmp_path / 'vazia', '-o', tmp_path / 'lista.pdf')
+    assert codigo == cli.SAIDA_SEM_DADOS
+    assert resumo['codigo_saida'] == cli.SAIDA_SEM_DADOS
+
+
+def test_dependencia_ausente(base, tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(saidas, 'openpyxl', None)
+    monkeypatch.setitem(sys.modules, 'openpyxl', None)
+    codigo, resumo = executar(capsys, base, '-o', tmp_path / 'lista.xlsx', '-f', 'xlsx', '--forcar')
+    assert codigo == cli.SAIDA_DEPENDENCIA
+    assert 'openpyxl' in resumo['erro']
+
+
+def test_argumento_invalido(base, capsys):
+    with pytest.raises(SystemExit) as erro:
+        cli.main([str(base), '-f', 'doc'])
+    assert erro.value.code == cli.SAIDA_ARGUMENTOS
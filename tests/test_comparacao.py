@@ -0,0 +1,66 @@
+"""Comparação entre versões da base: diferenças e relatório publicado sem apagar o anterior"""
+import csv
+
+import pytest
+
+pytest.importorskip('natsort')
+
+from corte_certo import comparacao  # noqa: E402
+from corte_certo.comparacao import comparar, gerar_comparacao, indexar  # noqa: E402
+
+
+def escrever_exportacao(caminho, materiais):
+    """CSV no formato da exportação (codigo;material)"""
+    with open(caminho, 'w', encoding='utf-8-sig', newline='') as arquivo:
+        escritor = csv.writer(arquivo, delimiter=';')
+        escritor.writerow(('codigo', 'material'))
+        escritor.writerows(materiais)
+
+
+def ler_csv(caminho):
+    with open(caminho, encoding='utf-8-sig', newline='') as arquivo:
+        return list(csv.reader(arquivo, delimiter=';'))[1:]
+
+
+def test_comparar():
+    resultado = comparar({'1': 'A', '2': 'B', '10': 'C', '3': 'D'}, {'1': 'A', '2': 'B2', '11': 'E', '4': 'F'})
+    assert resultado.adicionados == [('4', 'F'), ('11', 'E')]
+    assert resultado.removidos == [('3', 'D'), ('10', 'C')]
+    assert resultado.renomeados == [('2', 'B', 'B2')]
+    assert (resultado.inalterados, resultado.total_anterior, resultado.total_atual) == (1, 4, 4)
+
+
+def test_codigo_repetido_nao_depende_da_ordem():
+    assert indexar([('B', '1'), ('A', '1')]) == indexar([('A', '1'), ('B', '1')]) == ({'1': 'A | B'}, 1)
+
+
+def test_exportacao_anterior_contra_a_pasta(base, tmp_path):
+    anterior = tmp_path / 'anterior.csv'
+    escrever_exportacao(anterior, [('1', 'Branco Tx 18mm'), ('2', 'Carvalho'), ('3', 'Removido')])
+
+    resumo = gerar_comparacao(str(anterior), str(base), {'csv': str(tmp_path / 'diferencas.csv')},
+                              workers=2, modo='thread')
+
+    assert (resumo['adicionados'], resumo['removidos'], resumo['renomeados']) == (1, 1, 1)
+    assert ler_csv(tmp_path / 'diferencas.csv') == [
+        ['adicionado', '10', '', 'Preto Fosco 6mm'],
+        ['removido', '3', 'Removido', ''],
+        ['renomeado', '2', 'Carvalho', 'Carvalho 15mm'],
+    ]
+
+
+def test_falha_mantem_o_relatorio_anterior(tmp_path, monkeypatch):
+    anterior, atual = tmp_path / 'anterior.csv', tmp_path / 'atual.csv'
+    escrever_exportacao(anterior, [('1', 'A')])
+    escrever_exportacao(atual, [('1', 'A'), ('2', 'B')])
+    caminhos = {'csv': str(tmp_path / 'diferencas.csv'), 'pdf': str(tmp_path / 'diferencas.pdf')}
+    (tmp_path / 'diferencas.csv').write_text('relatório anterior', encoding='utf-8')
+
+    def falhar(*args):
+        raise OSError('disco cheio')
+    monkeypatch.setitem(comparacao.ESCRITORES, 'pdf', falhar)
+
+    with pytest.raises(OSError):
+        gerar_comparacao(str(anterior), str(atual), caminhos)
+    assert (tmp_path / 'diferencas.csv').read_text(encoding='utf-8') == 'relatório anterior'
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['anterior.csv', 'atual.csv', 'diferencas.csv']
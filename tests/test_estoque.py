@@ -0,0 +1,55 @@
+"""Relatório de estoque: junção das tabelas CHP/RET com os materiais pelo código"""
+import csv
+
+import pytest
+
+pytest.importorskip('numpy')
+pytest.importorskip('natsort')
+
+from corte_certo.estoque import gerar_relatorio_estoque  # noqa: E402
+
+
+@pytest.fixture
+def chapas(base):
+    pasta = base.parent / 'CHP'
+    pasta.mkdir()
+    # Material 1: só as linhas com '1' no primeiro campo; 4 chapas inteiras (abaixo do mínimo 5)
+    (pasta / 'CHP00001.TAB').write_bytes(b'1 1 4 2740.0 1840.0 INTEIRA\n0 2 5 2750 1850 inativa\n1 3 2 1000 500 meia\n')
+    # Material 2: só retalhos ativos ('+') com quantidade
+    (pasta / 'RET00002.TAB').write_bytes(b'1,+,2,1000,500,a\n2,-,1,300,300,x\n3,+,0,1,1,zero\n')
+    # Código sem material cadastrado
+    (pasta / 'CHP00099.TAB').write_bytes(b'1 1 3 2740 1840 sobra\n')
+    return pasta
+
+
+def test_junta_tabelas_e_materiais(base, chapas, tmp_path):
+    caminho = tmp_path / 'estoque.csv'
+    resumo = gerar_relatorio_estoque(str(base), {'csv': str(caminho)}, workers=2, modo='thread')
+
+    assert resumo['pasta_chapas'] == str(chapas)
+    assert resumo['totais'] == {'materiais': 2, 'chapas': 6, 'retalhos': 2, 'area_retalhos': 1.0,
+                                'valor': 600.0, 'abaixo_minimo': 1}
+    with open(caminho, encoding='utf-8-sig', newline='') as arquivo:
+        linhas = list(csv.reader(arquivo, delimiter=';'))[1:]
+    assert linhas == [
+        ['1', 'Branco Tx 18mm', 'MDF', '6', '4', '0', '0,000', '100,00', '600,00', '5', 'sim'],
+        ['2', 'Carvalho 15mm', 'MDP', '0', '0', '2', '1,000', '100,00', '0,00', '5', ''],
+    ]
+
+
+def test_falha_num_formato_mantem_o_relatorio_anterior(base, chapas, tmp_path, monkeypatch):
+    from corte_certo import estoque
+
+    caminhos = {'csv': str(tmp_path / 'estoque.csv'), 'pdf': str(tmp_path / 'estoque.pdf')}
+    gerar_relatorio_estoque(str(base), {'csv': caminhos['csv']}, workers=1, modo='thread')
+    anterior = open(caminhos['csv'], 'rb').read()
+
+    def falhar(relatorio, caminho):
+        raise OSError('disco cheio')
+
+    monkeypatch.setitem(estoque.ESCRITORES, 'pdf', falhar)
+    with pytest.raises(OSError):
+        gerar_relatorio_estoque(str(base), caminhos, workers=1, modo='thread')
+
+    assert open(caminhos['csv'], 'rb').read() == anterior
+    assert sorted(p.name for p in tmp_path.iterdir() if p.is_file()) == ['estoque.csv']
@@ -0,0 +1,101 @@
+"""Exportação incremental: cache de parsing, índice de pastas e reaproveitamento das saídas"""
+import csv
+
+import pytest
+
+pytest.importorskip('natsort')
+
+from conftest import editar_no_lugar  # noqa: E402
+from corte_certo.exportacao import Exportador  # noqa: E402
+from corte_certo.pipeline import ExportacaoCancelada  # noqa: E402
+
+
+def exportar(origem, saida, reaproveitar=False, **opcoes):
+    exportador = Exportador(str(origem), str(saida), workers=2, modo='thread', formatos=('csv',),
+                            reaproveitar=reaproveitar, **opcoes)
+    return exportador.executar()
+
+
+def ler_csv(caminho):
+    with open(caminho, encoding='utf-8-sig', newline='') as arquivo:
+        return {codigo: material for codigo, material in list(csv.reader(arquivo, delimiter=';'))[1:]}
+
+
+def test_exporta_a_pasta_inteira(base, tmp_path):
+    exportar(base, tmp_path / 'lista.csv')
+    assert ler_csv(tmp_path / 'lista.csv') == {'1': 'Branco Tx 18mm', '2': 'Carvalho 15mm', '10': 'Preto Fosco 6mm'}
+
+
+def test_segunda_execucao_usa_o_cache(base, tmp_path):
+    exportar(base, tmp_path / 'lista.csv')
+    resumo = exportar(base, tmp_path / 'lista.csv')
+    assert resumo['estatisticas']['cache_hits'] == 3
+    assert ler_csv(tmp_path / 'lista.csv')['2'] == 'Carvalho 15mm'
+
+
+def test_edicao_no_lugar_e_relida_com_o_indice_de_pastas(base, tmp_path):
+    exportar(base, tmp_path / 'lista.csv')
+    # A pasta 'sub' não muda: o índice de pastas a reaproveita, mas o arquivo tem de ser relido
+    editar_no_lugar(str(base / 'sub' / 'M10.INI'), 'Preto Fosco 6mm Alterado')
+
+    exportar(base, tmp_path / 'lista.csv')
+    assert ler_csv(tmp_path / 'lista.csv')['10'] == 'Preto Fosco 6mm Alterado'
+
+
+def test_arquivo_removido_sai_da_lista(base, tmp_path):
+    exportar(base, tmp_path / 'lista.csv')
+    (base / 'M2.INI').unlink()
+
+    exportar(base, tmp_path / 'lista.csv')
+    assert set(ler_csv(tmp_path / 'lista.csv')) == {'1', '10'}
+
+
+def test_cancelamento_mantem_a_saida_anterior(base, tmp_path):
+    exportar(base, tmp_path / 'lista.csv')
+    anterior = (tmp_path / 'lista.csv').read_bytes()
+    exportador = Exportador(str(base), str(tmp_path / 'lista.csv'), workers=2, modo='thread',
+                            formatos=('csv', 'jsonl'), reaproveitar=False,
+                            progresso=lambda *_: exportador.cancelar())
+
+    with pytest.raises(ExportacaoCancelada):
+        exportador.executar()
+    assert (tmp_path / 'lista.csv').read_bytes() == anterior
+    assert not (tmp_path / 'lista.jsonl').exists()
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith('.tmp')]
+
+
+def test_reaproveita_as_saidas_sem_alteracao(base, tmp_path):
+    assert not exportar(base, tmp_path / 'lista.csv', reaproveitar=True).get('reaproveitado')
+    assert exportar(base, tmp_path / 'lista.csv', reaproveitar=True)['reaproveitado']
+
+
+def test_edicao_no_lugar_invalida_as_saidas(base, tmp_path):
+    exportar(base, tmp_path / 'lista.csv', reaproveitar=True)
+    editar_no_lugar(str(base / 'sub' / 'M10.INI'), 'Preto Fosco 6mm Alterado')
+
+    assert not exportar(base, tmp_path / 'lista.csv', reaproveitar=True)['reaproveitado']
+    assert ler_csv(tmp_path / 'lista.csv')['10'] == 'Preto Fosco 6mm Alterado'
+
+
+def test_saida_mexida_e_regerada(base, tmp_path):
+    exportar(base, tmp_path / 'lista.csv', reaproveitar=True)
+    (tmp_path / 'lista.csv').write_text('outra coisa', encoding='utf-8')
+
+    assert not exportar(base, tmp_path / 'lista.csv', reaproveitar=True)['reaproveitado']
+    assert len(ler_csv(tmp_path / 'lista.csv')) == 3
+
+
+def test_filtros_usam_as_entradas_da_propria_leitura(base, tmp_path, monkeypatch):
+    varreduras = []
+    entradas_origem = Exportador._entradas_origem
+    monkeypatch.setattr(Exportador, '_entradas_origem',
+                        lambda self: varreduras.append(1) or entradas_origem(self))
+    filtros = {'familia': 'MDF'}
+
+    assert not exportar(base, tmp_path / 'lista.csv', reaproveitar=True, filtros=filtros).get('reaproveitado')
+    assert not varreduras
+    assert set(ler_csv(tmp_path / 'lista.csv')) == {'1', '10'}
+
+    # Só a conferência do artefato varre a pasta
+    assert exportar(base, tmp_path / 'lista.csv', reaproveitar=True, filtros=filtros)['reaproveitado']
+    assert len(varreduras) == 1
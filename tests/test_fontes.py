@@ -0,0 +1,139 @@
+"""Leitura dos membros .ini de arquivos compactados, sem extração para o disco"""
+import os
+import types
+import zipfile
+import zlib
+
+import pytest
+
+from corte_certo import fontes
+from corte_certo.fontes import FiltroArquivos, FonteCompactada
+from corte_certo.parser import MotorParsing
+
+MEMBROS = {
+    'MAT/M1.INI': b'[DESC]\r\nCAMPO1=Branco Tx 18mm\r\n',
+    'MAT/leiame.txt': b'sem material\r\n',
+    'MAT/_old/M3.INI': b'[DESC]\r\nCAMPO1=Antigo\r\n',
+    'MAT/M2.INI': b'[DESC]\r\nCAMPO1=Carvalho 15mm\r\n',
+}
+
+
+def criar_zip(caminho):
+    with zipfile.ZipFile(caminho, 'w', zipfile.ZIP_DEFLATED) as arquivo:
+        for nome, conteudo in MEMBROS.items():
+            arquivo.writestr(nome, conteudo)
+    return str(caminho)
+
+
+def test_zip_entrega_so_os_membros_aceitos_pelo_filtro(tmp_path):
+    caminho = criar_zip(tmp_path / 'base.zip')
+    filtro = FiltroArquivos(incluir=['M*.INI'], excluir=[], ignorar_pastas=['_old'])
+
+    with FonteCompactada(caminho, filtro) as fonte:
+        assert fonte.total == 2
+        membros = list(fonte.membros())
+
+    assert membros == [('MAT/M1.INI', MEMBROS['MAT/M1.INI']), ('MAT/M2.INI', MEMBROS['MAT/M2.INI'])]
+    assert fonte.bytes_lidos == sum(len(conteudo) for _, conteudo in membros)
+    assert os.listdir(tmp_path) == ['base.zip']
+
+
+def test_membros_sao_lidos_sob_demanda(tmp_path):
+    caminho = criar_zip(tmp_path / 'base.zip')
+    filtro = FiltroArquivos(incluir=['*.INI'], excluir=[], ignorar_pastas=[])
+
+    with FonteCompactada(caminho, filtro) as fonte:
+        membros = fonte.membros()
+        assert fonte.bytes_lidos == 0
+        next(membros)
+        assert fonte.bytes_lidos == len(MEMBROS['MAT/M1.INI'])
+
+
+def test_motor_processa_os_membros_do_zip(tmp_path):
+    caminho = criar_zip(tmp_path / 'base.zip')
+    filtro = FiltroArquivos(incluir=['M*.INI'], excluir=[], ignorar_pastas=['_old'])
+
+    with FonteCompactada(caminho, filtro) as fonte:
+        dados = MotorParsing(workers=1, modo='thread').processar_membros(fonte.membros(), fonte.total)
+
+    assert dados == [('Branco Tx 18mm', '1'), ('Carvalho 15mm', '2')]
+
+
+class RarFalso:
+    """Imita o rarfile.RarFile em cima de um ZIP (nome, tamanho e CRC de cada membro)"""
+
+    def __init__(self, caminho, modo='r'):
+        self._zip = zipfile.ZipFile(caminho)
+        self.lidos = []
+
+    def infolist(self):
+        infos = []
+        for info in self._zip.infolist():
+            infos.append(types.SimpleNamespace(
+                filename=info.filename, file_size=info.file_size, CRC=info.CRC,
+                is_dir=info.is_dir,
+            ))
+        return infos
+
+    def read(self, info):
+        self.lidos.append(info.filename)
+        return self._zip.read(info.filename)
+
+    def close(self):
+        self._zip.close()
+
+
+def unrar_falso(pasta, saida):
+    """Executável que imprime `saida` no lugar do 'unrar p'"""
+    dados = pasta / 'saida.bin'
+    dados.write_bytes(saida)
+    script = pasta / 'unrar'
+    script.write_text(f'#!/bin/sh\ncat "{dados}"\n')
+    script.chmod(0o755)
+    return str(script)
+
+
+@pytest.fixture
+def rar(tmp_path, monkeypatch):
+    """Um .rar lido pelo RarFalso; UNRAR_TOOL é ajustado em cada teste"""
+    caminho = tmp_path / 'base.rar'
+    criar_zip(caminho)
+    modulo = types.SimpleNamespace(RarFile=RarFalso, UNRAR_TOOL=str(tmp_path / 'nao-existe'))
+    monkeypatch.setattr(fontes, 'rarfile', modulo)
+    return str(caminho), modulo
+
+
+FILTRO_INI = FiltroArquivos(incluir=['M*.INI'], excluir=[], ignorar_pastas=['_old'])
+ESPERADOS = [('MAT/M1.INI', MEMBROS['MAT/M1.INI']), ('MAT/M2.INI', MEMBROS['MAT/M2.INI'])]
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='UnRAR falso é um script sh')
+def test_rar_lido_em_uma_chamada_do_unrar(tmp_path, rar):
+    caminho, modulo = rar
+    modulo.UNRAR_TOOL = unrar_falso(tmp_path, b''.join(MEMBROS.values()))
+
+    with FonteCompactada(caminho, FILTRO_INI) as fonte:
+        assert list(fonte.membros()) == ESPERADOS
+        assert fonte._arquivo.lidos == []
+
+
+def test_rar_sem_unrar_cai_para_leitura_por_membro(rar):
+    caminho, _ = rar
+
+    with FonteCompactada(caminho, FILTRO_INI) as fonte:
+        assert list(fonte.membros()) == ESPERADOS
+        assert fonte._arquivo.lidos == ['MAT/M1.INI', 'MAT/M2.INI']
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='UnRAR falso é um script sh')
+def test_rar_com_crc_divergente_retoma_sem_repetir_membros(tmp_path, rar):
+    caminho, modulo = rar
+    # O primeiro membro sai certo; o segundo (leiame.txt) vem corrompido
+    conteudos = list(MEMBROS.values())
+    corrompido = bytes(len(conteudos[1]))
+    assert zlib.crc32(corrompido) != zlib.crc32(conteudos[1])
+    modulo.UNRAR_TOOL = unrar_falso(tmp_path, conteudos[0] + corrompido + b''.join(conteudos[2:]))
+
+    with FonteCompactada(caminho, FILTRO_INI) as fonte:
+        assert list(fonte.membros()) == ESPERADOS
+        assert fonte._arquivo.lidos == ['MAT/M2.INI']
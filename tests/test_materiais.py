@@ -0,0 +1,34 @@
+"""Registro completo dos materiais: extração dos campos e estatísticas do lote"""
+import os
+
+from conftest import escrever_ini
+from corte_certo.materiais import processar_lote_materiais, processar_lote_membros_materiais
+
+
+def arquivos_do_lote(pasta):
+    caminhos = [escrever_ini(pasta, 1, 'Branco Tx 18mm'), escrever_ini(pasta, 2, 'MDF')]
+    sem_campo1 = os.path.join(pasta, 'M3.INI')
+    with open(sem_campo1, 'wb') as arquivo:
+        arquivo.write(b'[DESC]\r\nFAMILIA=MDF\r\n')
+    return caminhos + [sem_campo1]
+
+
+def test_so_materiais_com_nome_contam_como_extraidos(tmp_path):
+    registros, mensagens, estatisticas = processar_lote_materiais(arquivos_do_lote(str(tmp_path)))
+
+    assert [codigo for codigo, _ in registros] == ['1', '2', '3']
+    assert registros[0][1][:3] == ('Branco Tx 18mm', 'MDF', 18)
+    assert not mensagens
+    assert (estatisticas['arquivos'], estatisticas['extraidos'], estatisticas['sem_campo1']) == (3, 1, 2)
+
+
+def test_membros_de_compactado_contam_igual(tmp_path):
+    membros = []
+    for caminho in arquivos_do_lote(str(tmp_path)):
+        with open(caminho, 'rb') as arquivo:
+            membros.append((f'MAT/{os.path.basename(caminho)}', arquivo.read()))
+
+    registros, _, estatisticas = processar_lote_membros_materiais(membros)
+
+    assert [codigo for codigo, _ in registros] == ['1', '2', '3']
+    assert (estatisticas['arquivos'], estatisticas['extraidos'], estatisticas['sem_campo1']) == (3, 1, 2)
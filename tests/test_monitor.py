@@ -0,0 +1,107 @@
+"""Modo watch: rajadas agrupadas, releitura só do que mudou e pasta fora do ar"""
+import os
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('natsort')
+
+from conftest import editar_no_lugar, escrever_ini  # noqa: E402
+from corte_certo.monitor import MonitorPasta, varrer_pasta  # noqa: E402
+from corte_certo.servico import ServicoMateriais  # noqa: E402
+
+
+def criar_monitor(pasta, tmp_path, **opcoes):
+    opcoes.setdefault('usar_watchdog', False)
+    return MonitorPasta(str(pasta), str(tmp_path / 'lista.pdf'), workers=1, modo='thread',
+                        usar_cache=False, **opcoes)
+
+
+def campos(monitor):
+    return sorted(campo1 for _, _, campo1 in monitor.registros.values())
+
+
+def test_so_os_arquivos_alterados_sao_relidos(base, tmp_path):
+    monitor = criar_monitor(base, tmp_path)
+    monitor.carregar()
+    lidos = []
+    ler_registros = monitor.motor.ler_registros
+
+    def contar(itens, **opcoes):
+        lidos.extend(caminho for caminho, _, _ in itens)
+        return ler_registros(itens, **opcoes)
+
+    monitor.motor.ler_registros = contar
+    alterado = str(base / 'M1.INI')
+    editar_no_lugar(alterado, 'Branco Tx 18mm Novo')
+    (base / 'M2.INI').unlink()
+
+    assert monitor.aplicar_mudancas(monitor._diferencas_varredura())
+    assert lidos == [alterado]
+    assert campos(monitor) == ['Branco Tx 18mm Novo', 'Preto Fosco 6mm']
+    assert not monitor.aplicar_mudancas([alterado])
+
+
+def test_rajada_de_alteracoes_vira_uma_atualizacao(base, tmp_path):
+    monitor = criar_monitor(base, tmp_path, debounce=0.3)
+    lotes = []
+    monitor.aplicar_mudancas = lambda caminhos: lotes.append(set(caminhos)) or False
+    thread = threading.Thread(target=monitor.acompanhar)
+    thread.start()
+    try:
+        for codigo in range(5):
+            monitor._sinalizar([f'M{codigo}.INI'])
+            time.sleep(0.05)
+        limite = time.monotonic() + 5
+        while not lotes and time.monotonic() < limite:
+            time.sleep(0.05)
+    finally:
+        monitor.parar()
+        thread.join()
+
+    assert lotes == [{f'M{codigo}.INI' for codigo in range(5)}]
+
+
+def test_varredura_de_pasta_inacessivel_nao_remove_nada(base, tmp_path):
+    monitor = criar_monitor(base, tmp_path)
+    monitor.carregar()
+    antes = dict(monitor.registros)
+    os.rename(base, tmp_path / 'fora_do_ar')
+
+    assert varrer_pasta(str(base)) is None
+    assert monitor._diferencas_varredura() == set()
+    # Eventos do watchdog para os arquivos também não apagam nada
+    assert not monitor.aplicar_mudancas(list(antes))
+    assert monitor.registros == antes
+
+
+def test_polling_ignora_a_queda_e_compara_com_a_ultima_varredura_boa(base, tmp_path):
+    monitor = criar_monitor(base, tmp_path, intervalo=0.05)
+    estado = varrer_pasta(str(base))
+    thread = threading.Thread(target=monitor._loop_polling, args=(estado,))
+    thread.start()
+    try:
+        os.rename(base, tmp_path / 'fora_do_ar')
+        time.sleep(0.3)
+        assert not monitor._evento.is_set()
+
+        os.rename(tmp_path / 'fora_do_ar', base)
+        escrever_ini(str(base), 3, 'Novo')
+        assert monitor._evento.wait(5)
+    finally:
+        monitor.parar()
+        thread.join()
+
+    assert monitor._retirar_pendentes() == ({str(base / 'M3.INI')}, False)
+
+
+def test_servico_nao_publica_versao_vazia_com_a_pasta_fora_do_ar(base, tmp_path):
+    servico = ServicoMateriais(str(base), str(tmp_path / 'lista.pdf'), workers=1, modo='thread',
+                               usar_cache=False, usar_watchdog=False)
+    servico.carregar()
+    servico.regenerar()
+    os.rename(base, tmp_path / 'fora_do_ar')
+
+    assert not servico.atualizar()
+    assert servico.versao == 1 and len(servico.dados()) == 3
@@ -0,0 +1,82 @@
+"""Motor de parsing em lotes e extração do CAMPO1"""
+import time
+
+import pytest
+
+from conftest import escrever_ini
+from corte_certo.parser import ExtratorCampo1, MotorParsing, localizar_campo1
+from corte_certo.pipeline import Cancelamento, ExportacaoCancelada
+
+
+def lote_invertido(lote, extrator):
+    """Lotes com números menores demoram mais: terminam fora de ordem no pool"""
+    lote = list(lote)
+    time.sleep(0.002 * (10 - lote[0] % 10))
+    return lote, [], {'arquivos': len(lote)}
+
+
+def test_resultados_na_ordem_dos_lotes_mesmo_terminando_fora_de_ordem():
+    motor = MotorParsing(workers=4, modo='thread', tamanho_lote=1)
+    assert motor.mapear(lote_invertido, range(40), 40) == list(range(40))
+    assert motor.estatisticas['arquivos'] == 40
+
+
+@pytest.mark.parametrize('modo', ['thread', 'process'])
+def test_processar_mantem_a_ordem_dos_arquivos(tmp_path, modo):
+    caminhos = [escrever_ini(str(tmp_path), codigo, f'Material {codigo}') for codigo in range(1, 31)]
+    caminhos.append(str(tmp_path / 'M99.INI'))  # ilegível: vira mensagem, não derruba o lote
+    mensagens = []
+
+    dados = MotorParsing(workers=3, modo=modo, tamanho_lote=4).processar(caminhos, log=mensagens.append)
+
+    assert dados == [(f'Material {codigo}', str(codigo)) for codigo in range(1, 31)]
+    assert len(mensagens) == 1 and 'M99.INI' in mensagens[0]
+
+
+def test_codificacoes_misturadas_na_mesma_pasta(tmp_path):
+    extrator = ExtratorCampo1()
+    utf8 = escrever_ini(str(tmp_path), 1, 'Ação Coração', codificacao='utf-8')
+    cp1252 = escrever_ini(str(tmp_path), 2, 'Ação Coração', codificacao='cp1252')
+
+    assert extrator.extrair(utf8)[:2] == ('Ação Coração', False)
+    # Bytes inválidos em UTF-8: cai para o cp1252, que passa a ser o da pasta
+    assert extrator.extrair(cp1252)[:2] == ('Ação Coração', True)
+    assert extrator.codificacao_pasta[str(tmp_path)] == 'cp1252'
+    # Sequência multibyte denuncia o UTF-8 mesmo numa pasta cp1252
+    assert extrator.extrair(utf8)[0] == 'Ação Coração'
+
+
+def test_caracteres_exclusivos_do_cp1252(tmp_path):
+    # \x96 (travessão) e \x93/\x94 (aspas) são controles na Latin-1
+    caminho = escrever_ini(str(tmp_path), 1, 'Essencial – “Premium”', codificacao='cp1252')
+    assert b'\x96' in open(caminho, 'rb').read()
+    assert ExtratorCampo1().extrair(caminho)[0] == 'Essencial – “Premium”'
+
+
+def test_latin1_so_para_bytes_indefinidos_no_cp1252(tmp_path):
+    extrator = ExtratorCampo1()
+    assert extrator.decodificar(b'Tra\x96o \x81', str(tmp_path)) == ('Tra\x96o \x81', True)
+    # O último recurso não fica como codificação da pasta
+    assert extrator.decodificar(b'Tra\x96o', str(tmp_path)) == ('Tra–o', True)
+
+
+def test_regras_do_campo1():
+    assert localizar_campo1(b'[DESC]\r\nXCAMPO1=errado\r\nCAMPO1=Branco=TX\r\n') == b'Branco'
+    assert localizar_campo1(b'[DESC]\r\nCAMPO2=x\r\n') is None
+    assert ExtratorCampo1().extrair_conteudo(b'CAMPO1= Branco MDF 18mm \r\n')[0] == 'Branco  18mm'
+
+
+@pytest.mark.parametrize('modo', ['thread', 'process'])
+def test_cancelamento_interrompe_o_motor(tmp_path, modo):
+    caminhos = [escrever_ini(str(tmp_path), codigo, f'Material {codigo}') for codigo in range(1, 201)]
+    cancelamento = Cancelamento()
+    lotes = []
+
+    def progresso(feitos, total):
+        lotes.append(feitos)
+        cancelamento.cancelar()
+
+    motor = MotorParsing(workers=2, modo=modo, tamanho_lote=4, cancelamento=cancelamento)
+    with pytest.raises(ExportacaoCancelada):
+        motor.processar(caminhos, progresso=progresso)
+    assert lotes and lotes[-1] < len(caminhos)
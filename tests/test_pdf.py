@@ -0,0 +1,58 @@
+"""Geração do PDF: layout da lista agrupada e páginas em binário sem mexer na configuração global do reportlab"""
+import pytest
+
+from corte_certo.pdf import TITULO_SUMARIO, agrupar_consecutivos, gerar_pdf, montar_layout
+
+ALTURA_A4 = 841.8897637795277
+
+
+def test_pdf_sem_ascii85_e_opcao_global_intacta(tmp_path):
+    rl_config = pytest.importorskip('reportlab.rl_config')
+    antes = rl_config.useA85
+    dados = [(f'Material {i}', str(i)) for i in range(300)]
+
+    assert gerar_pdf(dados, str(tmp_path / 'lista.pdf')) > 1
+    assert gerar_pdf(dados, str(tmp_path / 'agrupada.pdf'), grupo=lambda material: material[0][-1]) > 1
+
+    assert rl_config.useA85 == antes
+    for nome in ('lista.pdf', 'agrupada.pdf'):
+        conteudo = (tmp_path / nome).read_bytes()
+        assert b'/FlateDecode' in conteudo and b'/ASCII85Decode' not in conteudo
+
+
+
+def materiais_do_layout(layout):
+    return [posicao for pagina in layout.paginas for segmento in pagina.segmentos
+            for posicao in range(segmento.inicio, segmento.fim)]
+
+
+def test_agrupar_consecutivos():
+    materiais = [('A1', '1'), ('A2', '2'), ('B1', '3'), ('A3', '4')]
+    assert agrupar_consecutivos(materiais, lambda material: material[0][0]) == [('A', 2), ('B', 1), ('A', 1)]
+
+
+def test_lista_corrida_sem_sumario():
+    layout = montar_layout([(None, 500)], ALTURA_A4)
+    assert materiais_do_layout(layout) == list(range(500))
+    assert not layout.marcadores
+    assert [pagina.numero for pagina in layout.paginas] == list(range(1, len(layout.paginas) + 1))
+
+
+def test_grupos_com_sumario_e_marcadores():
+    grupos = [(f'Família {i}', quantidade) for i, quantidade in enumerate((1, 90, 3, 200, 1))]
+    layout = montar_layout(grupos, ALTURA_A4, sumario=True)
+
+    primeira = layout.paginas[0]
+    assert primeira.segmentos[0].titulo == TITULO_SUMARIO
+    assert [entrada.titulo for entrada in primeira.sumario] == [titulo for titulo, _ in grupos]
+    assert materiais_do_layout(layout) == list(range(sum(quantidade for _, quantidade in grupos)))
+
+    # Cada marcador aponta a página e a altura do cabeçalho do seu grupo, que nunca fica sozinho no pé
+    cabecalhos = [(pagina.numero, segmento) for pagina in layout.paginas for segmento in pagina.segmentos
+                  if segmento.marcador is not None]
+    assert [segmento.titulo for _, segmento in cabecalhos] == [titulo for titulo, _ in grupos]
+    for numero, segmento in cabecalhos:
+        marcador = layout.marcadores[segmento.marcador]
+        assert (marcador.pagina, marcador.y) == (numero, segmento.y)
+        assert segmento.fim > segmento.inicio
+    assert [entrada.pagina for entrada in primeira.sumario] == [marcador.pagina for marcador in layout.marcadores]
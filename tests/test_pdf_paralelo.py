@@ -0,0 +1,30 @@
+"""O RenderizadorPDFParalelo tem de gerar o mesmo texto do RenderizadorPDF (reportlab)"""
+import pytest
+
+pytest.importorskip('reportlab')
+PdfReader = pytest.importorskip('pypdf').PdfReader
+
+from corte_certo import pdf, pdf_paralelo  # noqa: E402
+
+# Fora do cp1252: ✓ vem do ZapfDingbats, α do Symbol e 中 vira o quadrado
+MATERIAIS = [(f'CHAPA {i:03d} MDF ✓ α 中 € “aspas” (x)', f'{i:05d}') for i in range(260)]
+
+
+@pytest.fixture(autouse=True)
+def data_hora_fixa(monkeypatch):
+    monkeypatch.setattr(pdf, 'carimbo_data_hora', lambda: '01/01/2026 12:00:00')
+    monkeypatch.setattr(pdf_paralelo, 'carimbo_data_hora', lambda: '01/01/2026 12:00:00')
+
+
+def textos(caminho):
+    return [pagina.extract_text() for pagina in PdfReader(str(caminho)).pages]
+
+
+@pytest.mark.parametrize('grupo', [None, lambda material: material[0][:8]])
+def test_mesmo_texto_do_reportlab(tmp_path, grupo):
+    paginas = pdf.gerar_pdf(MATERIAIS, str(tmp_path / 'reportlab.pdf'), grupo)
+    assert pdf_paralelo.gerar_pdf_paralelo(MATERIAIS, str(tmp_path / 'paralelo.pdf'), 1, grupo) == paginas
+
+    esperado = textos(tmp_path / 'reportlab.pdf')
+    assert textos(tmp_path / 'paralelo.pdf') == esperado
+    assert '✓ α ■ €' in esperado[-1]
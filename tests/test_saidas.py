@@ -0,0 +1,81 @@
+"""Saídas alimentadas numa única passada e publicadas só quando todas deram certo"""
+import csv
+import json
+import os
+
+import pytest
+
+from corte_certo import saidas
+from corte_certo.pipeline import Cancelamento, ExportacaoCancelada
+from corte_certo.saidas import caminhos_por_formato, escrever_saidas
+
+DADOS = [('Branco Tx 18mm', '1'), ('Carvalho; 15mm', '2'), ('Ação "Coração"', '10')]
+
+
+def test_csv_e_jsonl(tmp_path):
+    caminhos = caminhos_por_formato(str(tmp_path / 'lista.pdf'), ['csv', 'jsonl'])
+    assert escrever_saidas(DADOS, caminhos) == 3
+
+    with open(caminhos['csv'], encoding='utf-8-sig', newline='') as arquivo:
+        assert list(csv.reader(arquivo, delimiter=';')) == [['codigo', 'material']] + [[c, m] for m, c in DADOS]
+    with open(caminhos['jsonl'], encoding='utf-8') as arquivo:
+        assert [json.loads(linha) for linha in arquivo] == [{'codigo': c, 'material': m} for m, c in DADOS]
+    assert open(caminhos['csv'], 'rb').read(3) == b'\xef\xbb\xbf'
+
+
+def test_xlsx(tmp_path):
+    openpyxl = pytest.importorskip('openpyxl')
+    caminho = str(tmp_path / 'lista.xlsx')
+    escrever_saidas(DADOS, {'xlsx': caminho})
+
+    planilha = openpyxl.load_workbook(caminho, read_only=True)['Materiais']
+    assert [tuple(linha) for linha in planilha.iter_rows(values_only=True)] == [('codigo', 'material')] + [
+        (c, m) for m, c in DADOS]
+
+
+def test_indice_de_busca(tmp_path):
+    pytest.importorskip('numpy')
+    from corte_certo.busca import IndiceBusca
+
+    caminho = str(tmp_path / 'lista.busca')
+    escrever_saidas(DADOS, {'busca': caminho})
+    with IndiceBusca.abrir(caminho) as indice:
+        assert len(indice) == 3
+        assert indice.buscar('carvalho', limite=1)[0][:2] == ('2', 'Carvalho; 15mm')
+
+
+def test_formato_desconhecido(tmp_path):
+    with pytest.raises(ValueError):
+        caminhos_por_formato(str(tmp_path / 'lista.pdf'), ['csv', 'doc'])
+
+
+def publicar_com_falha(tmp_path, monkeypatch):
+    """Gera a versão 1, depois tenta a versão 2 com o JSONL falhando no meio"""
+    caminhos = caminhos_por_formato(str(tmp_path / 'lista.pdf'), ['csv', 'jsonl'])
+    escrever_saidas(DADOS, caminhos)
+    anteriores = {formato: open(caminho, 'rb').read() for formato, caminho in caminhos.items()}
+
+    def falhar(self, material):
+        raise OSError('disco cheio')
+
+    monkeypatch.setattr(saidas.SaidaJSONL, 'escrever', falhar)
+    with pytest.raises(OSError):
+        escrever_saidas(DADOS[:1], caminhos)
+    return caminhos, anteriores
+
+
+def test_falha_mantem_as_saidas_anteriores(tmp_path, monkeypatch):
+    caminhos, anteriores = publicar_com_falha(tmp_path, monkeypatch)
+
+    assert {formato: open(caminho, 'rb').read() for formato, caminho in caminhos.items()} == anteriores
+    assert sorted(os.listdir(tmp_path)) == ['lista.csv', 'lista.jsonl']
+
+
+def test_cancelamento_nao_publica_nada(tmp_path):
+    caminhos = caminhos_por_formato(str(tmp_path / 'lista.pdf'), ['csv', 'jsonl'])
+    cancelamento = Cancelamento()
+    cancelamento.cancelar()
+
+    with pytest.raises(ExportacaoCancelada):
+        escrever_saidas(DADOS, caminhos, cancelamento=cancelamento)
+    assert os.listdir(tmp_path) == []
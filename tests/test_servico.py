@@ -0,0 +1,95 @@
+"""Modo serviço: uma linha JSON por pedido, uma linha JSON por resposta"""
+import json
+
+import pytest
+
+pytest.importorskip('natsort')
+pytest.importorskip('reportlab')
+
+from conftest import editar_no_lugar  # noqa: E402
+from corte_certo.servico import ServicoMateriais  # noqa: E402
+
+
+@pytest.fixture
+def servico(base, tmp_path):
+    servico = ServicoMateriais(str(base), str(tmp_path / 'lista.pdf'), workers=1, modo='thread',
+                               usar_cache=False, usar_watchdog=False)
+    servico.carregar()
+    servico.regenerar()
+    yield servico
+    servico.fechar()
+
+
+def pedir(servico, **pedido):
+    return json.loads(servico.atender_linha(json.dumps(pedido)))
+
+
+def test_gerar_e_reaproveitar_a_lista(servico, tmp_path):
+    saida = str(tmp_path / 'saida' / 'lista.pdf')
+    (tmp_path / 'saida').mkdir()
+
+    resposta = pedir(servico, id=7, acao='gerar', saida=saida, formatos='pdf,csv')
+    assert resposta['ok'] and resposta['id'] == 7
+    assert resposta['materiais'] == 3 and resposta['versao'] == 1 and not resposta['reaproveitado']
+    assert resposta['saidas'] == {'pdf': saida, 'csv': str(tmp_path / 'saida' / 'lista.csv')}
+    with open(resposta['saidas']['csv'], encoding='utf-8-sig') as arquivo:
+        assert arquivo.read().splitlines()[1:] == ['1;Branco Tx 18mm', '2;Carvalho 15mm', '10;Preto Fosco 6mm']
+
+    assert pedir(servico, acao='gerar', saida=saida, formatos='pdf,csv')['reaproveitado']
+    filtrada = pedir(servico, acao='gerar', saida=saida, formatos='csv', espessura=18, agrupar='familia')
+    assert filtrada['ok'] and filtrada['materiais'] == 1
+
+
+def test_codigo(servico):
+    resposta = pedir(servico, acao='codigo', codigo=2)
+    assert resposta['ok'] and resposta['versao'] == 1
+    assert resposta['material']['nome'] == 'Carvalho 15mm'
+    assert pedir(servico, acao='codigo', codigo='99')['material'] is None
+
+
+def test_buscar(servico):
+    resposta = pedir(servico, acao='buscar', termo='carvalho', limite=1)
+    assert resposta['ok']
+    assert [(r['codigo'], r['material']) for r in resposta['resultados']] == [('2', 'Carvalho 15mm')]
+
+    filtrada = pedir(servico, acao='buscar', termo='fosco', espessura=18)
+    assert filtrada['ok'] and filtrada['resultados'] == []
+
+
+def test_estado_atualizar_e_encerrar(servico, base):
+    estado = pedir(servico, acao='estado')
+    assert estado['ok'] and (estado['arquivos'], estado['materiais'], estado['versao']) == (3, 3, 1)
+
+    assert pedir(servico, acao='atualizar')['alterado'] is False
+    editar_no_lugar(str(base / 'M1.INI'), 'Branco Tx 18mm Novo')
+    resposta = pedir(servico, acao='atualizar')
+    assert resposta['alterado'] is True and resposta['versao'] == 2
+    assert pedir(servico, acao='codigo', codigo='1')['material']['nome'] == 'Branco Tx 18mm Novo'
+
+    assert pedir(servico, acao='encerrar')['ok']
+    assert servico.encerrado.is_set()
+
+
+def test_linha_vazia_nao_tem_resposta(servico):
+    assert servico.atender_linha('  \n') is None
+
+
+@pytest.mark.parametrize('linha, erro', [
+    ('{ruim', 'JSON inválido'),
+    ('[1, 2]', 'objeto JSON'),
+    ('{"acao": "apagar"}', 'Ação inválida'),
+    ('{"acao": "buscar"}', "'termo'"),
+    ('{"acao": "buscar", "termo": "  "}', "'termo'"),
+    ('{"acao": "codigo"}', "'codigo'"),
+    ('{"acao": "buscar", "termo": "branco", "espessura": true}', "'espessura'"),
+    ('{"acao": "gerar", "espessura": "18"}', "'espessura'"),
+    ('{"acao": "buscar", "termo": "branco", "limite": 0}', "'limite'"),
+    ('{"acao": "buscar", "termo": "branco", "limite": "5"}', "'limite'"),
+    ('{"acao": "buscar", "termo": "branco", "limite": true}', "'limite'"),
+    ('{"acao": "gerar", "agrupar": "cor"}', 'Agrupamento não suportado'),
+    ('{"acao": "gerar", "formatos": "doc"}', 'Formato de saída não suportado'),
+])
+def test_pedidos_invalidos(servico, tmp_path, linha, erro):
+    resposta = json.loads(servico.atender_linha(linha))
+    assert resposta['ok'] is False and erro in resposta['erro']
+    assert not (tmp_path / 'lista.pdf').exists()
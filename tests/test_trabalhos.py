@@ -0,0 +1,74 @@
+"""Trabalhos em lote: leituras compartilhadas entre trabalhos e falhas isoladas"""
+import json
+import threading
+
+import pytest
+
+pytest.importorskip('natsort')
+
+from corte_certo import cli  # noqa: E402
+from corte_certo.trabalhos import (  # noqa: E402
+    CONCLUIDO, FALHOU, ExecutorTrabalhos, LeiturasCompartilhadas, Trabalho,
+)
+
+
+def test_leitura_feita_uma_vez_para_quem_espera():
+    leituras = LeiturasCompartilhadas()
+    liberar = threading.Event()
+    chamadas = []
+    resultados = []
+
+    def ler():
+        chamadas.append(1)
+        liberar.wait(5)
+        return 'dados'
+
+    threads = [threading.Thread(target=lambda: resultados.append(leituras.obter('pasta', ler))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    liberar.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(chamadas) == 1
+    assert sorted(resultados) == [('dados', False), ('dados', True), ('dados', True)]
+
+
+def test_falha_na_leitura_libera_a_chave():
+    leituras = LeiturasCompartilhadas()
+
+    def falhar():
+        raise OSError('rede fora do ar')
+
+    with pytest.raises(OSError):
+        leituras.obter('pasta', falhar)
+    assert leituras.obter('pasta', lambda: 'dados') == ('dados', False)
+
+
+def test_trabalhos_da_mesma_origem_leem_uma_vez(base, tmp_path):
+    mensagens = []
+    trabalhos = [Trabalho(str(base), str(tmp_path / f'lista{i}.csv'), ('csv',)) for i in range(2)]
+    executor = ExecutorTrabalhos(trabalhos, workers=2, modo='thread', simultaneos=2,
+                                 log=lambda indice, mensagem: mensagens.append(mensagem))
+
+    resumo = executor.executar()
+
+    assert resumo['concluidos'] == 2 and resumo['materiais'] == 6
+    assert sum('Leitura reaproveitada' in mensagem for mensagem in mensagens) == 1
+    assert (tmp_path / 'lista0.csv').read_bytes() == (tmp_path / 'lista1.csv').read_bytes()
+
+
+def test_trabalho_com_falha_da_codigo_de_erro(base, tmp_path, capsys):
+    lista = tmp_path / 'lote.json'
+    lista.write_text(json.dumps([
+        {'origem': str(base), 'saida': str(tmp_path / 'ok.csv'), 'formatos': 'csv'},
+        {'origem': str(tmp_path / 'nao-existe'), 'saida': str(tmp_path / 'falha.csv'), 'formatos': 'csv'},
+    ]), encoding='utf-8')
+
+    codigo = cli.main(['-q', '--json', '--lote', str(lista), '--pool', 'thread'])
+    resumo = json.loads(capsys.readouterr().out)
+
+    assert codigo == cli.SAIDA_ERRO
+    assert (resumo['concluidos'], resumo['falhas']) == (1, 1)
+    assert [trabalho['situacao'] for trabalho in resumo['trabalhos']] == [CONCLUIDO, FALHOU]
+    assert (tmp_path / 'ok.csv').exists()